@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-18 00:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('iot', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrafficRollupHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='hour')),
+                ('vehicle_count', models.BigIntegerField(default=0, verbose_name='vehicle count')),
+                ('vehicle_count_samples', models.IntegerField(default=0, verbose_name='vehicle count samples')),
+                ('speed_sum', models.FloatField(default=0, verbose_name='speed sum (km/h)')),
+                ('speed_count', models.IntegerField(default=0, verbose_name='speed samples')),
+                ('occupancy_sum', models.FloatField(default=0, verbose_name='occupancy sum (%)')),
+                ('occupancy_count', models.IntegerField(default=0, verbose_name='occupancy samples')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+                ('sensor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='traffic_rollups', to='iot.sensor')),
+            ],
+            options={
+                'verbose_name': 'hourly traffic rollup',
+                'verbose_name_plural': 'hourly traffic rollups',
+                'db_table': 'traffic_rollups_hourly',
+                'ordering': ['hour'],
+                'indexes': [models.Index(fields=['hour', 'sensor'], name='traffic_rol_hour_f8ec55_idx')],
+                'unique_together': {('sensor', 'hour')},
+            },
+        ),
+    ]
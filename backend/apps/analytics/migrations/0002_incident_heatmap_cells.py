@@ -0,0 +1,35 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('incidents', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentHeatmapCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField(verbose_name='zoom level')),
+                ('cell_x', models.IntegerField(verbose_name='cell column')),
+                ('cell_y', models.IntegerField(verbose_name='cell row')),
+                ('day', models.DateField(verbose_name='day')),
+                ('incident_count', models.IntegerField(default=0, verbose_name='incident count')),
+                ('weighted_count', models.BigIntegerField(default=0, verbose_name='severity-weighted count')),
+                ('incident_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='heatmap_cells', to='incidents.incidenttype')),
+            ],
+            options={
+                'verbose_name': 'incident heatmap cell',
+                'verbose_name_plural': 'incident heatmap cells',
+                'db_table': 'incident_heatmap_cells',
+                'indexes': [models.Index(fields=['day', 'zoom'], name='incident_he_day_1e03ac_idx')],
+                'unique_together': {('zoom', 'cell_x', 'cell_y', 'day', 'incident_type')},
+            },
+        ),
+    ]
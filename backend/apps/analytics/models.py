@@ -1,5 +1,75 @@
 """Analytics models"""
 from django.db import models
+from django.utils.translation import gettext_lazy as _
 
-# Analytics models will be implemented
 
+class TrafficRollupHourly(models.Model):
+    """
+    Pre-aggregated hourly traffic statistics per traffic flow sensor.
+    Maintained incrementally as readings arrive (see services.rollup_service).
+    """
+    sensor = models.ForeignKey('iot.Sensor', on_delete=models.CASCADE, related_name='traffic_rollups')
+    hour = models.DateTimeField(_('hour'))
+    
+    # Sums & sample counts so averages can be combined across hours and sensors
+    vehicle_count = models.BigIntegerField(_('vehicle count'), default=0)
+    vehicle_count_samples = models.IntegerField(_('vehicle count samples'), default=0)
+    speed_sum = models.FloatField(_('speed sum (km/h)'), default=0)
+    speed_count = models.IntegerField(_('speed samples'), default=0)
+    occupancy_sum = models.FloatField(_('occupancy sum (%)'), default=0)
+    occupancy_count = models.IntegerField(_('occupancy samples'), default=0)
+    
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    
+    class Meta:
+        db_table = 'traffic_rollups_hourly'
+        verbose_name = _('hourly traffic rollup')
+        verbose_name_plural = _('hourly traffic rollups')
+        ordering = ['hour']
+        unique_together = [['sensor', 'hour']]
+        indexes = [
+            models.Index(fields=['hour', 'sensor']),
+        ]
+    
+    def __str__(self):
+        return f"{self.sensor_id} @ {self.hour}: {self.vehicle_count} vehicles"
+    
+    @property
+    def avg_speed(self):
+        return self.speed_sum / self.speed_count if self.speed_count else None
+    
+    @property
+    def avg_occupancy(self):
+        return self.occupancy_sum / self.occupancy_count if self.occupancy_count else None
+
+
+class IncidentHeatmapCell(models.Model):
+    """
+    Pre-aggregated incident counts per map grid cell, zoom level, day and incident type.
+
+    Cells are a 2^grid_bits x 2^grid_bits subdivision of each Web Mercator (slippy map)
+    tile, so a z/x/y tile is a single range scan over at most grid² cells per day.
+    Maintained incrementally as incidents change (see services.heatmap_service).
+    """
+    zoom = models.PositiveSmallIntegerField(_('zoom level'))
+    cell_x = models.IntegerField(_('cell column'))
+    cell_y = models.IntegerField(_('cell row'))
+    day = models.DateField(_('day'))
+    incident_type = models.ForeignKey('incidents.IncidentType', on_delete=models.CASCADE,
+                                      related_name='heatmap_cells')
+    
+    incident_count = models.IntegerField(_('incident count'), default=0)
+    # Sum of IncidentSeverity.priority_score over the cell's incidents
+    weighted_count = models.BigIntegerField(_('severity-weighted count'), default=0)
+    
+    class Meta:
+        db_table = 'incident_heatmap_cells'
+        verbose_name = _('incident heatmap cell')
+        verbose_name_plural = _('incident heatmap cells')
+        unique_together = [['zoom', 'cell_x', 'cell_y', 'day', 'incident_type']]
+        indexes = [
+            models.Index(fields=['day', 'zoom']),
+        ]
+    
+    def __str__(self):
+        return f"z{self.zoom} ({self.cell_x}, {self.cell_y}) {self.day}: {self.incident_count}"
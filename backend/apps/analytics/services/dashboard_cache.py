@@ -0,0 +1,120 @@
+"""
+Cached analytics dashboard snapshots
+Sections are cached per time bucket and per section version; writes bump the version
+"""
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .dashboard_service import DashboardService
+
+
+class DashboardCache:
+    """
+    Time-bucketed dashboard cache with per-section invalidation and stampede protection.
+
+    Each section is stored under `analytics:dashboard:<section>:v<version>:<bucket>`.
+    Invalidating a section bumps its version, so the next request recomputes it while
+    the other sections keep being served from cache. Only the worker that wins the
+    recompute lock runs the queries; the others serve the last snapshot (or wait briefly).
+    """
+
+    KEY_PREFIX = 'analytics:dashboard'
+    BUCKET_SECONDS = getattr(settings, 'DASHBOARD_CACHE_BUCKET_SECONDS', 60)
+    STALE_SECONDS = 3600
+    LOCK_SECONDS = 30
+    LOCK_WAIT_SECONDS = 2.0
+    LOCK_POLL_SECONDS = 0.05
+    PERIOD_DAYS = 30
+
+    def __init__(self, service=None, clock=time.time):
+        self.service = service or DashboardService()
+        self.clock = clock
+
+    def get_snapshot(self):
+        """
+        Return (payload, last_modified) for the current time bucket.
+        last_modified is the newest section computation time.
+        """
+        bucket = int(self.clock() // self.BUCKET_SECONDS)
+        end_date = datetime.fromtimestamp(bucket * self.BUCKET_SECONDS, tz=dt_timezone.utc)
+        start_date = end_date - timedelta(days=self.PERIOD_DAYS)
+
+        payload = {}
+        last_modified = None
+        for section in self.service.SECTIONS:
+            entry = self._get_section(section, bucket, start_date, end_date)
+            payload.update(entry['data'])
+            if last_modified is None or entry['computed_at'] > last_modified:
+                last_modified = entry['computed_at']
+
+        payload['period'] = {
+            'start': start_date.isoformat(),
+            'end': end_date.isoformat(),
+        }
+        return payload, last_modified
+
+    @staticmethod
+    def etag_for(payload):
+        body = json.dumps(payload, sort_keys=True, cls=DjangoJSONEncoder)
+        return hashlib.md5(body.encode('utf-8')).hexdigest()
+
+    def invalidate(self, *sections):
+        """Bump section versions so cached snapshots of them are no longer served"""
+        for section in sections or self.service.SECTIONS:
+            key = self._version_key(section)
+            if not cache.add(key, 1, timeout=None):
+                try:
+                    cache.incr(key)
+                except ValueError:
+                    cache.set(key, 1, timeout=None)
+
+    def _get_section(self, section, bucket, start_date, end_date):
+        key = self._section_key(section, bucket)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+
+        lock_key = f'{key}:lock'
+        if cache.add(lock_key, 1, timeout=self.LOCK_SECONDS):
+            try:
+                return self._compute(section, key, start_date, end_date)
+            finally:
+                cache.delete(lock_key)
+
+        # Someone else is recomputing: serve the previous snapshot if we have one
+        stale = cache.get(self._stale_key(section))
+        if stale is not None:
+            return stale
+
+        deadline = self.clock() + self.LOCK_WAIT_SECONDS
+        while self.clock() < deadline:
+            time.sleep(self.LOCK_POLL_SECONDS)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry
+        return self._compute(section, key, start_date, end_date)
+
+    def _compute(self, section, key, start_date, end_date):
+        entry = {
+            'data': self.service.compute_section(section, start_date, end_date),
+            'computed_at': int(self.clock()),
+        }
+        cache.set(key, entry, timeout=self.BUCKET_SECONDS * 2)
+        cache.set(self._stale_key(section), entry, timeout=self.STALE_SECONDS)
+        return entry
+
+    def _section_key(self, section, bucket):
+        version = cache.get(self._version_key(section)) or 0
+        return f'{self.KEY_PREFIX}:{section}:v{version}:{bucket}'
+
+    def _version_key(self, section):
+        return f'{self.KEY_PREFIX}:{section}:version'
+
+    def _stale_key(self, section):
+        return f'{self.KEY_PREFIX}:{section}:stale'
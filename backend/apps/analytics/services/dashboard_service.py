@@ -0,0 +1,152 @@
+"""
+Analytics dashboard service
+Each dashboard section is computed with a single aggregate query
+"""
+from datetime import timedelta
+
+from django.db.models import Avg, CharField, Count, DurationField, ExpressionWrapper, F, Q, Sum, Value
+
+from apps.analytics.models import TrafficRollupHourly
+from apps.incidents.models import Incident
+from apps.iot.models import CCTVCamera, RFIDLog, RFIDReader, Sensor
+from apps.response.models import IncidentAssignment
+from .rollup_service import truncate_to_hour
+
+
+class DashboardService:
+    """
+    Builds the analytics dashboard payload.
+    Query budget: incidents 1, response time 1, IoT status 1, traffic 2.
+    """
+    
+    QUERY_COUNT = 5
+    
+    SECTIONS = ['incidents', 'response_time', 'iot_status', 'traffic_summary']
+    
+    def build(self, start_date, end_date) -> dict:
+        payload = {}
+        for section in self.SECTIONS:
+            payload.update(self.compute_section(section, start_date, end_date))
+        payload['period'] = {
+            'start': start_date.isoformat(),
+            'end': end_date.isoformat(),
+        }
+        return payload
+    
+    def compute_section(self, section, start_date, end_date) -> dict:
+        """Return the top-level payload keys owned by one dashboard section"""
+        if section == 'incidents':
+            return self.get_incident_stats(start_date)
+        if section == 'response_time':
+            return {'avg_response_time_minutes': self.get_avg_response_time(start_date, end_date)}
+        if section == 'iot_status':
+            return {'iot_status': self.get_iot_status()}
+        if section == 'traffic_summary':
+            return {'traffic_summary': self.get_traffic_summary(end_date)}
+        raise ValueError(f'Unknown dashboard section: {section}')
+    
+    def get_incident_stats(self, start_date):
+        """Incident totals for the period"""
+        stats = Incident.objects.filter(created_at__gte=start_date).aggregate(
+            total=Count('id'),
+            resolved=Count('id', filter=Q(status='resolved')),
+        )
+        return {
+            'total_incidents': stats['total'],
+            'resolved_incidents': stats['resolved'],
+            'active_incidents': stats['total'] - stats['resolved'],
+        }
+    
+    def get_avg_response_time(self, start_date, end_date):
+        """Average assignment acceptance time in minutes"""
+        result = IncidentAssignment.objects.filter(
+            assigned_at__gte=start_date,
+            assigned_at__lte=end_date,
+            accepted_at__isnull=False,
+        ).aggregate(
+            avg_delay=Avg(ExpressionWrapper(F('accepted_at') - F('assigned_at'), output_field=DurationField()))
+        )
+        avg_delay = result['avg_delay']
+        if avg_delay is None:
+            return 0
+        return round(avg_delay.total_seconds() / 60, 2)
+    
+    def get_iot_status(self):
+        """Online/offline device counts, fetched as one UNION of grouped counts"""
+        def grouped(model, kind):
+            return (
+                model.objects.order_by()
+                .annotate(kind=kind, state=F('status'))
+                .values_list('kind', 'state')
+                .annotate(n=Count('id'))
+            )
+        
+        cctv = grouped(CCTVCamera, Value('cctv', output_field=CharField()))
+        rfid = grouped(RFIDReader, Value('rfid', output_field=CharField()))
+        sensors = grouped(Sensor, F('sensor_type'))
+        responders = (
+            IncidentAssignment.objects.filter(status__in=['assigned', 'in_progress'])
+            .order_by()
+            .annotate(
+                kind=Value('responders', output_field=CharField()),
+                state=Value('active', output_field=CharField()),
+            )
+            .values_list('kind', 'state')
+            .annotate(n=Count('assigned_to', distinct=True))
+        )
+        
+        counts = {}
+        for kind, state, n in cctv.union(rfid, sensors, responders, all=True):
+            counts.setdefault(kind, {})
+            counts[kind][state] = counts[kind].get(state, 0) + n
+        
+        def summary(*kinds):
+            total = sum(n for kind in kinds for n in counts.get(kind, {}).values())
+            online = sum(counts.get(kind, {}).get('active', 0) for kind in kinds)
+            return {'total': total, 'online': online, 'offline': total - online}
+        
+        sensor_types = [sensor_type for sensor_type, _ in Sensor.SENSOR_TYPES]
+        return {
+            'cctv_cameras': summary('cctv'),
+            'rfid_readers': summary('rfid'),
+            'traffic_sensors': summary('traffic_flow'),
+            'all_sensors': summary(*sensor_types),
+            'active_responders': counts.get('responders', {}).get('active', 0),
+        }
+    
+    def get_traffic_summary(self, end_date):
+        """Last 24h traffic from RFID logs and the hourly traffic rollups"""
+        recent_date = end_date - timedelta(hours=24)
+        
+        rfid = RFIDLog.objects.filter(timestamp__gte=recent_date).aggregate(
+            total=Count('id'),
+            avg_speed=Avg('speed'),
+        )
+        avg_speed = float(rfid['avg_speed']) if rfid['avg_speed'] else None
+        
+        traffic = TrafficRollupHourly.objects.filter(
+            hour__gte=truncate_to_hour(recent_date),
+            sensor__sensor_type='traffic_flow',
+            sensor__status='active',
+        ).aggregate(
+            vehicle_count=Sum('vehicle_count'),
+            vehicle_count_samples=Sum('vehicle_count_samples'),
+            speed_sum=Sum('speed_sum'),
+            speed_count=Sum('speed_count'),
+        )
+        avg_vehicle_count = (
+            traffic['vehicle_count'] / traffic['vehicle_count_samples']
+            if traffic['vehicle_count_samples'] else None
+        )
+        avg_traffic_speed = traffic['speed_sum'] / traffic['speed_count'] if traffic['speed_count'] else None
+        
+        # Combine RFID and sensor data
+        if avg_traffic_speed is None and avg_speed:
+            avg_traffic_speed = avg_speed
+        
+        return {
+            'total_vehicles_24h': rfid['total'],
+            'avg_speed_kmh': round(avg_traffic_speed, 1) if avg_traffic_speed else None,
+            'avg_vehicle_count': round(avg_vehicle_count, 1) if avg_vehicle_count is not None else None,
+            'period_hours': 24
+        }
@@ -0,0 +1,245 @@
+"""
+Incident heatmap tile service
+Keeps IncidentHeatmapCell in step with incidents and answers z/x/y tile queries from it
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from apps.analytics.models import IncidentHeatmapCell
+from apps.incidents.models import Incident, IncidentSeverity, IncidentStatus
+
+# Web Mercator is undefined at the poles; slippy map tiles stop at this latitude
+MAX_LATITUDE = 85.05112878
+
+HEATMAP_FIELDS = ['latitude', 'longitude', 'timestamp', 'incident_type_id', 'severity_id', 'status', 'is_duplicate']
+
+
+def world_cell(latitude, longitude, bits):
+    """(column, row) of the cell containing a point on a 2^bits x 2^bits Web Mercator grid"""
+    size = 1 << bits
+    latitude = max(-MAX_LATITUDE, min(MAX_LATITUDE, float(latitude)))
+    x = (float(longitude) + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(latitude))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return (
+        min(max(int(x * size), 0), size - 1),
+        min(max(int(y * size), 0), size - 1),
+    )
+
+
+def cell_center(column, row, bits):
+    """(latitude, longitude) of the centre of a grid cell"""
+    size = 1 << bits
+    longitude = (column + 0.5) / size * 360.0 - 180.0
+    latitude = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (row + 0.5) / size))))
+    return latitude, longitude
+
+
+def incident_day(timestamp):
+    """Heatmap day (in the project time zone) an incident timestamp falls on"""
+    return timezone.localtime(timestamp).date()
+
+
+def day_bounds(start_day, end_day):
+    """Aware datetimes spanning [start_day, end_day) in the project time zone"""
+    return (
+        timezone.make_aware(datetime.combine(start_day, time.min)),
+        timezone.make_aware(datetime.combine(end_day, time.min)),
+    )
+
+
+class HeatmapService:
+    """
+    Incremental maintenance, rebuild and tile queries for the incident heatmap.
+
+    Every counted incident adds one row per zoom level 0..max_zoom. The finest level is
+    computed from the coordinates; coarser levels are the same cell shifted right, so an
+    incident always lands in the parent of its finer cells. False reports and duplicates
+    are not counted.
+    """
+    UPSERT_BATCH_SIZE = 500
+    REBUILD_CHUNK_DAYS = 7
+
+    def __init__(self, max_zoom=None, grid_bits=None):
+        self.max_zoom = getattr(settings, 'HEATMAP_MAX_ZOOM', 16) if max_zoom is None else max_zoom
+        self.grid_bits = getattr(settings, 'HEATMAP_GRID_BITS', 4) if grid_bits is None else grid_bits
+
+    @property
+    def grid_size(self):
+        """Cells per tile side"""
+        return 1 << self.grid_bits
+
+    # Maintenance
+
+    def contribution(self, values, priority_scores):
+        """
+        Heatmap key (finest cell, day, incident type) and weight for one incident, given
+        a dict of HEATMAP_FIELDS, or None if the incident is not counted.
+        """
+        if values is None or values['status'] == IncidentStatus.FALSE or values['is_duplicate']:
+            return None
+        if values['latitude'] is None or values['longitude'] is None or values['timestamp'] is None:
+            return None
+        cell = world_cell(values['latitude'], values['longitude'], self.max_zoom + self.grid_bits)
+        key = (cell, incident_day(values['timestamp']), values['incident_type_id'])
+        return key, priority_scores.get(values['severity_id'], 0)
+
+    def snapshot(self, incident):
+        """The HEATMAP_FIELDS of an Incident instance"""
+        return {field: getattr(incident, field) for field in HEATMAP_FIELDS}
+
+    def apply_change(self, before, after):
+        """
+        Move an incident's contribution from `before` to `after` (HEATMAP_FIELDS dicts;
+        None for a created or deleted incident). No-op when neither moved nor reweighted.
+        """
+        if before == after:
+            return 0
+        priority_scores = self._priority_scores()
+        old = self.contribution(before, priority_scores)
+        new = self.contribution(after, priority_scores)
+        if old == new:
+            return 0
+
+        deltas = defaultdict(lambda: [0, 0])
+        if old is not None:
+            self._add(deltas, old, -1)
+        if new is not None:
+            self._add(deltas, new, 1)
+        return self._write(deltas)
+
+    def _add(self, deltas, contribution, sign):
+        ((column, row), day, incident_type_id), weight = contribution
+        for zoom in range(self.max_zoom + 1):
+            shift = self.max_zoom - zoom
+            delta = deltas[(zoom, column >> shift, row >> shift, day, incident_type_id)]
+            delta[0] += sign
+            delta[1] += sign * weight
+
+    def _write(self, deltas):
+        rows = [(key, delta) for key, delta in deltas.items() if delta != [0, 0]]
+        for start in range(0, len(rows), self.UPSERT_BATCH_SIZE):
+            self._upsert(rows[start:start + self.UPSERT_BATCH_SIZE])
+
+        # Cells whose last incident moved away
+        emptied = Q()
+        for (zoom, column, row, day, incident_type_id), (count, _) in rows:
+            if count < 0:
+                emptied |= Q(zoom=zoom, cell_x=column, cell_y=row, day=day, incident_type_id=incident_type_id)
+        if emptied:
+            IncidentHeatmapCell.objects.filter(emptied, incident_count__lte=0).delete()
+        return len(rows)
+
+    def _upsert(self, rows):
+        """INSERT ... ON CONFLICT DO UPDATE adding each delta to the stored counts"""
+        opts = IncidentHeatmapCell._meta
+        key_columns = [opts.get_field(name).column for name in ('zoom', 'cell_x', 'cell_y', 'day', 'incident_type')]
+        sum_columns = [opts.get_field(name).column for name in ('incident_count', 'weighted_count')]
+        quote = connection.ops.quote_name
+        table = quote(opts.db_table)
+        day_field = opts.get_field('day')
+
+        params = []
+        for (zoom, column, row, day, incident_type_id), (count, weight) in rows:
+            params.extend([zoom, column, row, day_field.get_db_prep_save(day, connection), incident_type_id, count, weight])
+
+        placeholders = '(%s)' % ', '.join(['%s'] * (len(key_columns) + len(sum_columns)))
+        updates = ', '.join(f'{quote(column)} = {table}.{quote(column)} + excluded.{quote(column)}' for column in sum_columns)
+        sql = (
+            f'INSERT INTO {table} ({", ".join(quote(column) for column in key_columns + sum_columns)}) '
+            f'VALUES {", ".join([placeholders] * len(rows))} '
+            f'ON CONFLICT ({", ".join(quote(column) for column in key_columns)}) DO UPDATE SET {updates}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def _priority_scores(self):
+        return dict(IncidentSeverity.objects.values_list('pk', 'priority_score'))
+
+    def rebuild(self, start_day, end_day):
+        """
+        Recompute cells for days [start_day, end_day) from the incidents table, a few
+        days per pass. Returns the number of cells written.
+        """
+        priority_scores = self._priority_scores()
+        written = 0
+        while start_day < end_day:
+            chunk_end = min(start_day + timedelta(days=self.REBUILD_CHUNK_DAYS), end_day)
+            written += self._rebuild_range(start_day, chunk_end, priority_scores)
+            start_day = chunk_end
+        return written
+
+    def _rebuild_range(self, start_day, end_day, priority_scores):
+        start, end = day_bounds(start_day, end_day)
+        incidents = Incident.objects.filter(timestamp__gte=start, timestamp__lt=end).values(*HEATMAP_FIELDS)
+
+        deltas = defaultdict(lambda: [0, 0])
+        for values in incidents.iterator(chunk_size=5000):
+            contribution = self.contribution(values, priority_scores)
+            if contribution is not None:
+                self._add(deltas, contribution, 1)
+
+        objs = [
+            IncidentHeatmapCell(
+                zoom=zoom, cell_x=column, cell_y=row, day=day, incident_type_id=incident_type_id,
+                incident_count=count, weighted_count=weight,
+            )
+            for (zoom, column, row, day, incident_type_id), (count, weight) in deltas.items()
+        ]
+        with transaction.atomic():
+            IncidentHeatmapCell.objects.filter(day__gte=start_day, day__lt=end_day).delete()
+            IncidentHeatmapCell.objects.bulk_create(objs, batch_size=1000)
+        return len(objs)
+
+    # Queries
+
+    def tile(self, zoom, x, y, start_day, end_day, incident_type_ids=None, category=None):
+        """
+        Aggregated cells of tile zoom/x/y over days [start_day, end_day).
+
+        Beyond max_zoom the finest stored cells covering the tile are returned, so a
+        deep tile holds fewer (larger) cells than grid_size².
+        """
+        level = min(zoom, self.max_zoom)
+        shift = zoom - level
+        columns = ((x << self.grid_bits) >> shift, (((x + 1) << self.grid_bits) - 1) >> shift)
+        rows = ((y << self.grid_bits) >> shift, (((y + 1) << self.grid_bits) - 1) >> shift)
+
+        cells = IncidentHeatmapCell.objects.filter(
+            zoom=level,
+            cell_x__range=columns,
+            cell_y__range=rows,
+            day__gte=start_day,
+            day__lt=end_day,
+        )
+        if incident_type_ids:
+            cells = cells.filter(incident_type_id__in=incident_type_ids)
+        if category:
+            cells = cells.filter(incident_type__category=category)
+
+        aggregated = (
+            cells.values('cell_x', 'cell_y')
+            .annotate(count=Sum('incident_count'), weight=Sum('weighted_count'))
+            .order_by()
+        )
+
+        bits = level + self.grid_bits
+        results = []
+        for cell in aggregated:
+            if not cell['count']:
+                continue
+            latitude, longitude = cell_center(cell['cell_x'], cell['cell_y'], bits)
+            results.append({
+                'latitude': round(latitude, 6),
+                'longitude': round(longitude, 6),
+                'count': cell['count'],
+                'weight': cell['weight'],
+            })
+        results.sort(key=lambda cell: (-cell['latitude'], cell['longitude']))
+        return results
@@ -0,0 +1,172 @@
+"""
+Hourly traffic rollup service
+Keeps TrafficRollupHourly in step with traffic flow SensorReadings
+"""
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast, Coalesce, TruncHour
+from django.utils import timezone
+
+from apps.analytics.models import TrafficRollupHourly
+from apps.iot.models import Sensor, SensorReading
+
+TRAFFIC_READING_TYPES = ('vehicle_count', 'speed', 'occupancy')
+
+# JSON keys holding each reading's number, in order of preference
+READING_VALUE_KEYS = {
+    'vehicle_count': ('count', 'value'),
+    'speed': ('speed', 'value'),
+    'occupancy': ('occupancy', 'value'),
+}
+
+
+def reading_value_expression(reading_type):
+    """Database expression extracting a reading's numeric value from the `value` JSON"""
+    keys = READING_VALUE_KEYS[reading_type]
+    return Coalesce(*[Cast(KT(f'value__{key}'), FloatField()) for key in keys])
+
+
+def extract_reading_value(reading_type, value):
+    """Python counterpart of reading_value_expression for in-memory readings"""
+    if not isinstance(value, dict):
+        return None
+    for key in READING_VALUE_KEYS.get(reading_type, ()):
+        number = value.get(key)
+        if isinstance(number, (int, float)) and not isinstance(number, bool):
+            return number
+    return None
+
+
+def truncate_to_hour(timestamp):
+    return timestamp.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+class TrafficRollupService:
+    """
+    Incremental maintenance and backfill of hourly traffic rollups
+    """
+    
+    def apply_readings(self, readings):
+        """
+        Fold newly stored readings into their hourly buckets.
+        Only traffic flow sensors are counted; other readings are ignored.
+        """
+        readings = [r for r in readings if r.reading_type in TRAFFIC_READING_TYPES]
+        if not readings:
+            return 0
+        
+        traffic_sensor_ids = set(
+            Sensor.objects.filter(
+                pk__in={r.sensor_id for r in readings},
+                sensor_type='traffic_flow',
+            ).values_list('pk', flat=True)
+        )
+        
+        deltas = defaultdict(lambda: defaultdict(float))
+        for reading in readings:
+            if reading.sensor_id not in traffic_sensor_ids:
+                continue
+            number = extract_reading_value(reading.reading_type, reading.value)
+            if number is None:
+                continue
+            bucket = deltas[(reading.sensor_id, truncate_to_hour(reading.timestamp))]
+            if reading.reading_type == 'vehicle_count':
+                bucket['vehicle_count'] += number
+                bucket['vehicle_count_samples'] += 1
+            elif reading.reading_type == 'speed' and number > 0:
+                bucket['speed_sum'] += number
+                bucket['speed_count'] += 1
+            elif reading.reading_type == 'occupancy':
+                bucket['occupancy_sum'] += number
+                bucket['occupancy_count'] += 1
+        
+        for (sensor_id, hour), delta in deltas.items():
+            self._increment(sensor_id, hour, delta)
+        return len(deltas)
+    
+    def _increment(self, sensor_id, hour, delta):
+        """Atomically add `delta` to one bucket, creating it on first use"""
+        delta = {field: int(v) if not field.endswith('_sum') else v for field, v in delta.items()}
+        updates = {field: F(field) + value for field, value in delta.items()}
+        updates['updated_at'] = timezone.now()
+        
+        rollups = TrafficRollupHourly.objects.filter(sensor_id=sensor_id, hour=hour)
+        if rollups.update(**updates):
+            return
+        try:
+            with transaction.atomic():
+                TrafficRollupHourly.objects.create(sensor_id=sensor_id, hour=hour, **delta)
+        except IntegrityError:
+            # Another writer created the bucket first
+            rollups.update(**updates)
+    
+    def backfill(self, start, end, sensor_ids=None, chunk=timedelta(days=1)):
+        """
+        Rebuild rollups for [start, end) from raw readings, one chunk of time per query.
+        Returns the number of hourly buckets written.
+        """
+        # Whole hours only, so no bucket is rebuilt from a partial range
+        start = truncate_to_hour(start)
+        if truncate_to_hour(end) != end:
+            end = truncate_to_hour(end) + timedelta(hours=1)
+        written = 0
+        while start < end:
+            chunk_end = min(start + chunk, end)
+            written += self._rebuild_range(start, chunk_end, sensor_ids)
+            start = chunk_end
+        return written
+    
+    def _rebuild_range(self, start, end, sensor_ids=None):
+        readings = SensorReading.objects.filter(
+            sensor__sensor_type='traffic_flow',
+            reading_type__in=TRAFFIC_READING_TYPES,
+            timestamp__gte=start,
+            timestamp__lt=end,
+        )
+        rollups = TrafficRollupHourly.objects.filter(hour__gte=start, hour__lt=end)
+        if sensor_ids:
+            readings = readings.filter(sensor_id__in=sensor_ids)
+            rollups = rollups.filter(sensor_id__in=sensor_ids)
+        
+        buckets = (
+            readings
+            .annotate(
+                bucket=TruncHour('timestamp', tzinfo=dt_timezone.utc),
+                count_value=reading_value_expression('vehicle_count'),
+                speed_value=reading_value_expression('speed'),
+                occupancy_value=reading_value_expression('occupancy'),
+            )
+            .values('sensor_id', 'bucket')
+            .annotate(
+                vehicle_count=Sum('count_value', filter=Q(reading_type='vehicle_count')),
+                vehicle_count_samples=Count('id', filter=Q(reading_type='vehicle_count', count_value__isnull=False)),
+                speed_sum=Sum('speed_value', filter=Q(reading_type='speed', speed_value__gt=0)),
+                speed_count=Count('id', filter=Q(reading_type='speed', speed_value__gt=0)),
+                occupancy_sum=Sum('occupancy_value', filter=Q(reading_type='occupancy')),
+                occupancy_count=Count('id', filter=Q(reading_type='occupancy', occupancy_value__isnull=False)),
+            )
+            .order_by()
+        )
+        
+        objs = [
+            TrafficRollupHourly(
+                sensor_id=row['sensor_id'],
+                hour=row['bucket'],
+                vehicle_count=int(row['vehicle_count'] or 0),
+                vehicle_count_samples=row['vehicle_count_samples'],
+                speed_sum=row['speed_sum'] or 0,
+                speed_count=row['speed_count'],
+                occupancy_sum=row['occupancy_sum'] or 0,
+                occupancy_count=row['occupancy_count'],
+            )
+            for row in buckets
+        ]
+        
+        with transaction.atomic():
+            rollups.delete()
+            TrafficRollupHourly.objects.bulk_create(objs, batch_size=1000)
+        return len(objs)
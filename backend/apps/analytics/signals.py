@@ -0,0 +1,80 @@
+"""
+Analytics signal receivers
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.incidents.models import Incident
+from apps.iot.models import CCTVCamera, RFIDReader, Sensor, SensorReading
+from apps.iot.signals import sensor_readings_ingested
+from apps.response.models import IncidentAssignment
+from .services.dashboard_cache import DashboardCache
+from .services.heatmap_service import HEATMAP_FIELDS, HeatmapService
+from .services.rollup_service import TrafficRollupService
+
+
+@receiver(post_save, sender=SensorReading)
+def rollup_saved_reading(sender, instance, created, **kwargs):
+    """Fold individually created readings into the hourly traffic rollup"""
+    if created:
+        TrafficRollupService().apply_readings([instance])
+
+
+@receiver(sensor_readings_ingested)
+def rollup_ingested_readings(sender, readings, **kwargs):
+    """Fold bulk-ingested readings into the hourly traffic rollup"""
+    TrafficRollupService().apply_readings(readings)
+
+
+# update_fields names that can move or reweight an incident on the heatmap
+_HEATMAP_UPDATE_FIELDS = {field.removesuffix('_id') for field in HEATMAP_FIELDS}
+
+
+@receiver(pre_save, sender=Incident)
+def remember_heatmap_position(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored heatmap fields so post_save can move the incident's contribution"""
+    instance._heatmap_before = None
+    if instance.pk is None or kwargs.get('raw'):
+        return
+    if update_fields is not None and not _HEATMAP_UPDATE_FIELDS.intersection(update_fields):
+        instance._heatmap_before = HeatmapService().snapshot(instance)
+        return
+    instance._heatmap_before = Incident.objects.filter(pk=instance.pk).values(*HEATMAP_FIELDS).first()
+
+
+@receiver(post_save, sender=Incident)
+def update_heatmap_cells(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    service = HeatmapService()
+    service.apply_change(getattr(instance, '_heatmap_before', None), service.snapshot(instance))
+
+
+@receiver(post_delete, sender=Incident)
+def remove_from_heatmap(sender, instance, **kwargs):
+    service = HeatmapService()
+    service.apply_change(service.snapshot(instance), None)
+
+
+def _invalidate_dashboard(*sections):
+    # After commit, so a request racing the transaction cannot re-cache the old figures
+    transaction.on_commit(lambda: DashboardCache().invalidate(*sections))
+
+
+@receiver([post_save, post_delete], sender=Incident)
+def invalidate_incident_stats(sender, **kwargs):
+    _invalidate_dashboard('incidents')
+
+
+@receiver([post_save, post_delete], sender=IncidentAssignment)
+def invalidate_assignment_stats(sender, **kwargs):
+    # Assignments feed both the response time and the active responder count
+    _invalidate_dashboard('response_time', 'iot_status')
+
+
+@receiver([post_save, post_delete], sender=CCTVCamera)
+@receiver([post_save, post_delete], sender=RFIDReader)
+@receiver([post_save, post_delete], sender=Sensor)
+def invalidate_device_status(sender, **kwargs):
+    _invalidate_dashboard('iot_status')
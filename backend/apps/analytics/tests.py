@@ -0,0 +1,74 @@
+"""
+Analytics tests
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.incidents.models import Incident, IncidentSeverity, IncidentStatus, IncidentType
+from apps.iot.models import CCTVCamera, RFIDReader, Sensor
+from apps.response.models import AssignmentStatus, IncidentAssignment
+from apps.users.models import User
+from .services.dashboard_service import DashboardService
+
+
+class DashboardServiceQueryTests(TestCase):
+    """The dashboard runs five queries however much data there is"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.incident_type = IncidentType.objects.create(name='Collision', category='accident')
+        cls.severity = IncidentSeverity.objects.create(
+            level='P2', name='High', description='High severity', response_time_target_minutes=15,
+            escalation_time_minutes=30, priority_score=3,
+        )
+        cls.responder = User.objects.create_user(
+            username='responder', email='responder@example.com', password='pass12345', role='ems',
+        )
+
+    def add_data(self, count):
+        now = timezone.now()
+        first = Incident.objects.count() + 1
+        for n in range(first, first + count):
+            incident = Incident.objects.create(
+                incident_id=f'INC-{n:05d}', incident_type=self.incident_type, severity=self.severity,
+                description='Two vehicles collided at the junction', latitude=Decimal('-1.28') - n,
+                longitude=Decimal('36.82'), timestamp=now - timedelta(days=n % 20),
+                status=IncidentStatus.RESOLVED if n % 2 else IncidentStatus.PENDING,
+            )
+            assignment = IncidentAssignment.objects.create(
+                incident=incident, assigned_to=self.responder, status=AssignmentStatus.IN_PROGRESS,
+            )
+            IncidentAssignment.objects.filter(pk=assignment.pk).update(
+                accepted_at=assignment.assigned_at + timedelta(minutes=10),
+            )
+            location = {'latitude': Decimal('-1.28'), 'longitude': Decimal('36.82')}
+            CCTVCamera.objects.create(camera_id=f'CAM-{n}', **location)
+            RFIDReader.objects.create(reader_id=f'RFID-{n}', **location)
+            Sensor.objects.create(
+                sensor_id=f'SENSOR-{n}', sensor_type='traffic_flow',
+                status='active' if n % 2 else 'inactive', **location,
+            )
+
+    def build(self):
+        end_date = timezone.now() + timedelta(minutes=1)
+        return DashboardService().build(end_date - timedelta(days=30), end_date)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.add_data(2)
+        with self.assertNumQueries(5):
+            self.build()
+
+        self.add_data(20)
+        with self.assertNumQueries(5):
+            payload = self.build()
+
+        self.assertEqual(payload['total_incidents'], 22)
+        self.assertEqual(payload['resolved_incidents'], 11)
+        self.assertEqual(payload['avg_response_time_minutes'], 10)
+        self.assertEqual(payload['iot_status']['cctv_cameras']['total'], 22)
+        self.assertEqual(payload['iot_status']['rfid_readers']['total'], 22)
+        self.assertEqual(payload['iot_status']['traffic_sensors'], {'total': 22, 'online': 11, 'offline': 11})
+        self.assertEqual(payload['iot_status']['active_responders'], 1)
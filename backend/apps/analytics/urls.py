@@ -3,7 +3,7 @@ Analytics URLs
 """
 from django.urls import path
 from .views import (
-    AnalyticsDashboardView, IncidentHeatmapView,
+    AnalyticsDashboardView, IncidentHeatmapView, IncidentHeatmapTileView,
     TrafficFlowView, WeatherConditionsView, RoadConditionsView
 )
 
@@ -12,6 +12,7 @@ app_name = 'analytics'
 urlpatterns = [
     path('dashboard/', AnalyticsDashboardView.as_view(), name='dashboard'),
     path('heatmap/', IncidentHeatmapView.as_view(), name='heatmap'),
+    path('heatmap/tiles/<int:z>/<int:x>/<int:y>/', IncidentHeatmapTileView.as_view(), name='heatmap-tile'),
     path('traffic-flow/', TrafficFlowView.as_view(), name='traffic-flow'),
     path('weather/', WeatherConditionsView.as_view(), name='weather'),
     path('road-conditions/', RoadConditionsView.as_view(), name='road-conditions'),
@@ -2,8 +2,14 @@
 Audit logging middleware
 """
 import json
+import logging
+
+from django.http.request import RawPostDataException
 from django.utils import timezone
-from .models import AuditLog
+
+from .services.audit_buffer import record
+
+logger = logging.getLogger(__name__)
 
 
 class AuditLogMiddleware:
@@ -24,6 +30,10 @@ class AuditLogMiddleware:
             '/api/auth/refresh/',
             '/admin/jsi18n/',
         ]
+        
+        self.sensitive_fields = ['password', 'token', 'secret', 'key']
+        # Larger bodies are not copied into the audit entry
+        self.max_body_bytes = 64 * 1024
     
     def __call__(self, request):
         # Skip logging for excluded paths
@@ -33,6 +43,12 @@ class AuditLogMiddleware:
         # Track request start time
         start_time = timezone.now()
         
+        # Read the body before the view does: DRF consumes the stream, after which
+        # request.body raises. Only small JSON bodies are read (uploads stay streamed).
+        request_body = None
+        if request.method in ['POST', 'PUT', 'PATCH']:
+            request_body = self._json_body(request)
+        
         response = self.get_response(request)
         
         # Log important actions
@@ -50,34 +66,38 @@ class AuditLogMiddleware:
                 }
                 
                 # Include request body for POST/PUT/PATCH (be careful with sensitive data)
-                if request.method in ['POST', 'PUT', 'PATCH'] and hasattr(request, 'body'):
-                    try:
-                        body = json.loads(request.body.decode('utf-8')) if request.body else {}
-                        # Exclude sensitive fields
-                        sanitized_body = {k: v for k, v in body.items() 
-                                        if k not in ['password', 'token', 'secret', 'key']}
-                        action_details['request_body'] = sanitized_body
-                    except (json.JSONDecodeError, UnicodeDecodeError):
-                        pass
+                if isinstance(request_body, dict):
+                    # Exclude sensitive fields
+                    action_details['request_body'] = {k: v for k, v in request_body.items()
+                                                      if k not in self.sensitive_fields}
                 
-                # Create audit log entry
-                AuditLog.objects.create(
-                    user=request.user if request.user.is_authenticated else None,
-                    action_type=self._determine_action_type(request.method, request.path),
-                    entity_type=entity_type,
-                    entity_id=entity_id,
-                    action_details=action_details,
-                    ip_address=self._get_client_ip(request),
-                    user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
-                )
+                # Queue the audit log entry (written in bulk off the request path)
+                record({
+                    'user_id': request.user.pk,
+                    'action_type': self._determine_action_type(request.method, request.path),
+                    'entity_type': entity_type[:50],
+                    'entity_id': (entity_id or '')[:100],
+                    'action_details': action_details,
+                    'ip_address': self._get_client_ip(request),
+                    'user_agent': request.META.get('HTTP_USER_AGENT', '')[:500],
+                    'timestamp': start_time,
+                })
             except Exception as e:
                 # Don't fail the request if logging fails
-                import logging
-                logger = logging.getLogger(__name__)
                 logger.error(f"Audit logging failed: {str(e)}")
         
         return response
     
+    def _json_body(self, request):
+        if request.content_type != 'application/json':
+            return None
+        try:
+            if int(request.META.get('CONTENT_LENGTH') or 0) > self.max_body_bytes:
+                return None
+            return json.loads(request.body.decode('utf-8')) if request.body else {}
+        except (ValueError, UnicodeDecodeError, RawPostDataException):
+            return None
+    
     def _extract_entity_info(self, path):
         """Extract entity type and ID from URL path"""
         # Parse URL pattern: /api/{entity}/{id}/
@@ -0,0 +1,79 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def chain_existing_entries(apps, schema_editor):
+    """Give entries written before the chain existed sequences and hashes, oldest first"""
+    from apps.audit.services.audit_chain import GENESIS_HASH, HASHED_FIELDS, entry_hash
+
+    AuditLog = apps.get_model('audit', 'AuditLog')
+    AuditChainHead = apps.get_model('audit', 'AuditChainHead')
+    sequence, previous = 0, GENESIS_HASH
+    batch = []
+    for log in AuditLog.objects.order_by('timestamp', 'id').iterator(chunk_size=2000):
+        sequence += 1
+        log.sequence = sequence
+        log.previous_hash = previous
+        log.entry_hash = previous = entry_hash(previous, {field: getattr(log, field) for field in HASHED_FIELDS})
+        batch.append(log)
+        if len(batch) >= 2000:
+            AuditLog.objects.bulk_update(batch, ['sequence', 'previous_hash', 'entry_hash'])
+            batch = []
+    AuditLog.objects.bulk_update(batch, ['sequence', 'previous_hash', 'entry_hash'])
+    AuditChainHead.objects.create(pk=1, last_sequence=sequence, last_hash=previous if sequence else '')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0004_audit_timestamp_default'),
+        ('blockchain', '0002_anchor_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditChainHead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_sequence', models.BigIntegerField(default=0, verbose_name='last sequence')),
+                ('last_hash', models.CharField(blank=True, max_length=64, verbose_name='last hash')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'db_table': 'audit_chain_head',
+            },
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='entry_hash',
+            field=models.CharField(blank=True, max_length=64, verbose_name='entry hash'),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='previous_hash',
+            field=models.CharField(blank=True, max_length=64, verbose_name='previous hash'),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='sequence',
+            field=models.BigIntegerField(blank=True, null=True, unique=True, verbose_name='sequence'),
+        ),
+        migrations.CreateModel(
+            name='AuditAnchor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_sequence', models.BigIntegerField(unique=True, verbose_name='first sequence')),
+                ('last_sequence', models.BigIntegerField(unique=True, verbose_name='last sequence')),
+                ('merkle_root', models.CharField(max_length=64, verbose_name='Merkle root')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('blockchain_transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='audit_anchors', to='blockchain.blockchaintransaction')),
+            ],
+            options={
+                'db_table': 'audit_anchors',
+                'ordering': ['-last_sequence'],
+            },
+        ),
+        migrations.RunPython(chain_existing_entries, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 """Audit logging models"""
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.db.models import JSONField
 
@@ -13,10 +14,46 @@ class AuditLog(models.Model):
     action_details = JSONField(_('action details'), default=dict)
     ip_address = models.GenericIPAddressField(_('IP address'), null=True, blank=True)
     user_agent = models.TextField(_('user agent'), blank=True)
-    timestamp = models.DateTimeField(_('timestamp'), auto_now_add=True, db_index=True)
+    # Time of the request, not of the (buffered) insert
+    timestamp = models.DateTimeField(_('timestamp'), default=timezone.now, db_index=True)
     blockchain_hash = models.CharField(_('blockchain hash'), max_length=66, null=True, blank=True)
     
+    # Hash chain: entry_hash = sha256(previous_hash + canonical entry), in sequence order
+    sequence = models.BigIntegerField(_('sequence'), null=True, blank=True, unique=True)
+    previous_hash = models.CharField(_('previous hash'), max_length=64, blank=True)
+    entry_hash = models.CharField(_('entry hash'), max_length=64, blank=True)
+    
     class Meta:
         db_table = 'audit_logs'
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['entity_type', 'entity_id', 'timestamp']),
+        ]
+
+
+class AuditChainHead(models.Model):
+    """Last link of the audit hash chain (a single row, locked by writers)"""
+    last_sequence = models.BigIntegerField(_('last sequence'), default=0)
+    last_hash = models.CharField(_('last hash'), max_length=64, blank=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    
+    class Meta:
+        db_table = 'audit_chain_head'
+
+
+class AuditAnchor(models.Model):
+    """Merkle root over the entry hashes of a contiguous run of audit log sequences"""
+    first_sequence = models.BigIntegerField(_('first sequence'), unique=True)
+    last_sequence = models.BigIntegerField(_('last sequence'), unique=True)
+    merkle_root = models.CharField(_('Merkle root'), max_length=64)
+    blockchain_transaction = models.ForeignKey('blockchain.BlockchainTransaction', on_delete=models.SET_NULL,
+                                               null=True, blank=True, related_name='audit_anchors')
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    
+    class Meta:
+        db_table = 'audit_anchors'
+        ordering = ['-last_sequence']
+    
+    def __str__(self):
+        return f"Audit {self.first_sequence}-{self.last_sequence} ({self.merkle_root[:12]})"
 
@@ -11,5 +11,6 @@ class AuditLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = AuditLog
         fields = ['id', 'user_email', 'action_type', 'entity_type', 'entity_id',
-                 'action_details', 'ip_address', 'timestamp', 'blockchain_hash']
+                 'action_details', 'ip_address', 'timestamp', 'blockchain_hash',
+                 'sequence', 'previous_hash', 'entry_hash']
         read_only_fields = ['id', 'timestamp']
@@ -0,0 +1,198 @@
+"""
+Write-behind audit log sink
+Requests queue audit entries; a background thread appends them to the audit chain
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, DataError, IntegrityError, close_old_connections, connection
+from django.utils.dateparse import parse_datetime
+
+from .audit_chain import AuditChain
+
+logger = logging.getLogger(__name__)
+
+ENTRY_FIELDS = [
+    'user_id', 'action_type', 'entity_type', 'entity_id', 'action_details', 'ip_address', 'user_agent', 'timestamp',
+]
+
+
+class AuditLogBuffer:
+    """
+    In-process queue of AuditLog entries (dicts of ENTRY_FIELDS).
+
+    A daemon thread flushes the queue with one chained append per MAX_ENTRIES entries, or
+    every FLUSH_MS for whatever has arrived. When the database write fails the batch is
+    appended as JSON lines to FALLBACK_PATH (see manage.py replay_audit_fallback), and
+    so is any entry that finds the queue full or that the database rejects on its own (the
+    rest of its batch is still stored). The queue is drained at interpreter exit.
+    """
+    MAX_ENTRIES = 200
+    FLUSH_MS = 500
+    QUEUE_SIZE = 10000
+
+    def __init__(self, max_entries=None, flush_ms=None, queue_size=None, fallback_path=None):
+        self.max_entries = max_entries or getattr(settings, 'AUDIT_BUFFER_MAX_ENTRIES', self.MAX_ENTRIES)
+        self.flush_seconds = (flush_ms or getattr(settings, 'AUDIT_BUFFER_FLUSH_MS', self.FLUSH_MS)) / 1000
+        self.fallback_path = fallback_path or settings.AUDIT_FALLBACK_PATH
+        self._queue = queue.Queue(maxsize=queue_size or getattr(settings, 'AUDIT_BUFFER_QUEUE_SIZE', self.QUEUE_SIZE))
+        # One writer at a time: the flusher thread, or flush() at shutdown and in tests
+        self._write_lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+
+    def submit(self, entry):
+        """Queue an entry for the next flush; never blocks the caller"""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._write_fallback([entry], 'queue full')
+
+    def flush(self):
+        """Store everything queued so far (from the calling thread)"""
+        while True:
+            batch = self._drain(self.max_entries)
+            if not batch:
+                return
+            self._write(batch)
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=max(self.flush_seconds * 4, 2))
+        self.flush()
+
+    def _ensure_thread(self):
+        # Started lazily and per process, so workers forked after import get their own
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='audit-log-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.max_entries:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+        close_old_connections()
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        with self._write_lock:
+            try:
+                rejected = store_entries(batch)
+            except DatabaseError as e:
+                logger.warning('Audit log flush of %s entries failed, writing them to %s: %s',
+                               len(batch), self.fallback_path, e)
+                # Drop a broken connection so the next flush reconnects
+                connection.close()
+                self._write_fallback(batch, str(e))
+            except Exception:
+                logger.exception('Audit log flush failed')
+                self._write_fallback(batch, 'flush error')
+            else:
+                if rejected:
+                    logger.warning('Database rejected %s of %s audit entries, writing them to %s',
+                                   len(rejected), len(batch), self.fallback_path)
+                    self._write_fallback(rejected, 'rejected')
+
+    def _write_fallback(self, entries, reason):
+        try:
+            with self._file_lock:
+                os.makedirs(os.path.dirname(self.fallback_path) or '.', exist_ok=True)
+                with open(self.fallback_path, 'a', encoding='utf-8') as fallback:
+                    for entry in entries:
+                        fallback.write(entry_to_json(entry) + '\n')
+        except OSError:
+            logger.exception('Could not write %s audit entries to %s (%s)', len(entries), self.fallback_path, reason)
+
+
+# Errors caused by the entry itself rather than by the database being unavailable
+REJECTED_ERRORS = (DataError, IntegrityError, ValidationError)
+
+
+def store_entries(entries, chain=None):
+    """
+    Append entries to the audit chain. When the batch is refused because of bad data, the
+    entries are retried one by one so only the offending ones are left out; those are
+    returned. Other database errors propagate.
+    """
+    chain = chain or AuditChain()
+    try:
+        chain.append(entries)
+        return []
+    except REJECTED_ERRORS:
+        if len(entries) == 1:
+            return list(entries)
+    rejected = []
+    for entry in entries:
+        try:
+            chain.append([entry])
+        except REJECTED_ERRORS:
+            rejected.append(entry)
+    return rejected
+
+
+def entry_to_json(entry):
+    """Fallback file line for an entry (timestamps keep their microseconds)"""
+    timestamp = entry.get('timestamp')
+    if isinstance(timestamp, datetime):
+        entry = dict(entry, timestamp=timestamp.isoformat())
+    return json.dumps(entry, cls=DjangoJSONEncoder)
+
+
+def entry_from_json(line):
+    """AuditLog kwargs from a fallback file line"""
+    entry = json.loads(line)
+    entry['timestamp'] = parse_datetime(entry['timestamp'])
+    return {field: entry.get(field) for field in ENTRY_FIELDS}
+
+
+audit_buffer = AuditLogBuffer()
+atexit.register(audit_buffer.stop)
+
+
+def record(entry):
+    """Store an audit entry: queued when AUDIT_BUFFER_ENABLED, otherwise immediately"""
+    if getattr(settings, 'AUDIT_BUFFER_ENABLED', True):
+        audit_buffer.submit(entry)
+    else:
+        AuditChain().append([entry])
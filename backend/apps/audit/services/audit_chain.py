@@ -0,0 +1,258 @@
+"""
+Hash-chained, Merkle-anchored audit log
+Every entry's hash covers the previous entry's hash; runs of entry hashes are anchored
+on chain as one Merkle root per BlockchainTransaction
+"""
+import json
+import logging
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.audit.models import AuditAnchor, AuditChainHead, AuditLog
+from apps.blockchain.merkle import MerkleAccumulator, merkle_proof, merkle_root, sha256_hex, verify_proof
+from apps.blockchain.models import BlockchainTransaction
+from apps.blockchain.relayers import confirm_submitted, get_relayer
+
+logger = logging.getLogger(__name__)
+
+# Fields covered by entry_hash, in the order rows are streamed by the verifier
+HASHED_FIELDS = [
+    'sequence', 'user_id', 'action_type', 'entity_type', 'entity_id', 'action_details',
+    'ip_address', 'user_agent', 'timestamp',
+]
+
+GENESIS_HASH = '0' * 64
+
+
+def canonical_entry(values):
+    """Stable JSON of an entry's HASHED_FIELDS (sorted keys, UTC microsecond timestamp)"""
+    values = dict(values)
+    values['timestamp'] = values['timestamp'].astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+    return json.dumps(values, sort_keys=True, separators=(',', ':'), ensure_ascii=False, cls=DjangoJSONEncoder)
+
+
+def entry_hash(previous_hash, values):
+    return sha256_hex(previous_hash + canonical_entry(values))
+
+
+def stored_values(row):
+    """
+    HASHED_FIELDS of an unsaved row as the database will return them, so the hash
+    computed on insert is the one recomputed on read (e.g. IPv6 addresses are stored
+    compressed, blank addresses as NULL, JSON keys as strings). Values the field validators
+    refuse, such as over-long strings, raise ValidationError on every database backend.
+    """
+    values = {}
+    for name in HASHED_FIELDS:
+        field = AuditLog._meta.get_field(name)
+        value = getattr(row, field.attname)
+        if isinstance(field, models.GenericIPAddressField):
+            value = field.get_prep_value(value) or None
+        elif isinstance(field, models.JSONField):
+            value = json.loads(json.dumps(value if value is not None else {}, cls=DjangoJSONEncoder))
+        elif value is not None:
+            value = field.to_python(value)
+        if value is not None:
+            field.run_validators(value)
+        values[name] = value
+    return values
+
+
+class AuditChain:
+    """
+    Appends, anchors, verifies and proves audit log entries.
+
+    append() numbers a batch of entries after the AuditChainHead row, which it holds
+    locked until the batch is inserted, so concurrent writers extend one chain.
+    anchor() covers the entries after the last AuditAnchor with Merkle roots of at
+    most AUDIT_ANCHOR_BATCH_SIZE entry hashes, one relayer transaction per root.
+    """
+    ANCHOR_BATCH_SIZE = 4096
+
+    def __init__(self, relayer=None):
+        self._relayer = relayer
+        self.anchor_batch_size = getattr(settings, 'AUDIT_ANCHOR_BATCH_SIZE', self.ANCHOR_BATCH_SIZE)
+
+    @property
+    def relayer(self):
+        if self._relayer is None:
+            self._relayer = get_relayer()
+        return self._relayer
+
+    def append(self, entries):
+        """Insert entries (dicts of AuditLog fields) as the next links of the chain"""
+        if not entries:
+            return []
+        with transaction.atomic():
+            head = self._locked_head()
+            sequence, previous = head.last_sequence, head.last_hash or GENESIS_HASH
+            rows = []
+            for entry in entries:
+                sequence += 1
+                row = AuditLog(**entry)
+                row.sequence = sequence
+                row.timestamp = row.timestamp or timezone.now()
+                values = stored_values(row)
+                # Store exactly what was hashed
+                for field in HASHED_FIELDS:
+                    setattr(row, field, values[field])
+                row.previous_hash = previous
+                row.entry_hash = previous = entry_hash(previous, values)
+                rows.append(row)
+            AuditLog.objects.bulk_create(rows)
+            AuditChainHead.objects.filter(pk=head.pk).update(
+                last_sequence=sequence, last_hash=previous, updated_at=timezone.now(),
+            )
+        return rows
+
+    def _locked_head(self):
+        head = AuditChainHead.objects.select_for_update().filter(pk=1).first()
+        if head is None:
+            try:
+                with transaction.atomic():
+                    AuditChainHead.objects.create(pk=1)
+            except IntegrityError:
+                pass
+            head = AuditChainHead.objects.select_for_update().get(pk=1)
+        return head
+
+    def anchor(self, max_batches=None):
+        """Anchor unanchored entries; returns the AuditAnchors created"""
+        self.confirm_submitted()
+        anchored_to = AuditAnchor.objects.aggregate(last=Max('last_sequence'))['last'] or 0
+        head = AuditChainHead.objects.filter(pk=1).values_list('last_sequence', flat=True).first() or 0
+        anchors = []
+        while anchored_to < head and (max_batches is None or len(anchors) < max_batches):
+            first, last = anchored_to + 1, min(anchored_to + self.anchor_batch_size, head)
+            digests = list(
+                AuditLog.objects.filter(sequence__gte=first, sequence__lte=last)
+                .order_by('sequence').values_list('entry_hash', flat=True)
+            )
+            if len(digests) != last - first + 1:
+                logger.error('Audit sequences %s-%s have %s entries instead of %s; not anchoring past %s',
+                             first, last, len(digests), last - first + 1, anchored_to)
+                break
+            anchors.append(self._anchor(first, last, merkle_root(digests), len(digests)))
+            anchored_to = last
+        return anchors
+
+    def _anchor(self, first, last, root, count):
+        submitted = self.relayer.submit(root)
+        with transaction.atomic():
+            blockchain_transaction = BlockchainTransaction.objects.create(
+                transaction_type='audit_anchor',
+                entity_type='audit_log',
+                entity_id=f'{first}-{last}',
+                transaction_hash=submitted['transaction_hash'],
+                block_number=submitted['block_number'],
+                status=submitted['status'],
+                confirmed_at=submitted['confirmed_at'],
+                payload_hash=root,
+                item_count=count,
+                network=self.relayer.network,
+            )
+            anchor = AuditAnchor.objects.create(
+                first_sequence=first, last_sequence=last, merkle_root=root,
+                blockchain_transaction=blockchain_transaction,
+            )
+            AuditLog.objects.filter(sequence__gte=first, sequence__lte=last).update(
+                blockchain_hash=blockchain_transaction.transaction_hash,
+            )
+        return anchor
+
+    def confirm_submitted(self):
+        """Record block numbers of anchor transactions mined since they were submitted"""
+        return confirm_submitted(self.relayer, 'audit_anchor')
+
+    def verify(self, start_sequence=1, chunk_size=5000):
+        """
+        Stream the chain from start_sequence and yield problems as dicts (sequence,
+        problem); recomputes every entry hash, link and anchored Merkle root.
+        Memory stays flat whatever the number of rows.
+        """
+        previous = None
+        expected = start_sequence
+        if start_sequence > 1:
+            previous = AuditLog.objects.filter(sequence=start_sequence - 1).values_list('entry_hash', flat=True).first()
+
+        anchors = iter(AuditAnchor.objects.filter(last_sequence__gte=start_sequence).order_by('first_sequence')
+                       .values_list('first_sequence', 'last_sequence', 'merkle_root'))
+        anchor = next(anchors, None)
+        # A partially streamed first anchor cannot be checked
+        if anchor is not None and anchor[0] < start_sequence:
+            anchor = next(anchors, None)
+        accumulator = MerkleAccumulator()
+
+        rows = AuditLog.objects.filter(sequence__gte=start_sequence).order_by('sequence').values_list(
+            *HASHED_FIELDS, 'previous_hash', 'entry_hash',
+        ).iterator(chunk_size=chunk_size)
+        for row in rows:
+            values = dict(zip(HASHED_FIELDS, row))
+            stored_previous, stored_hash = row[-2], row[-1]
+            sequence = values['sequence']
+            if sequence != expected:
+                yield {'sequence': expected, 'problem': f'entries {expected}-{sequence - 1} are missing'}
+            expected = sequence + 1
+
+            if previous is None:
+                previous = stored_previous if sequence > 1 else GENESIS_HASH
+            if stored_previous != previous:
+                yield {'sequence': sequence, 'problem': 'previous_hash does not match the preceding entry'}
+            if entry_hash(stored_previous, values) != stored_hash:
+                yield {'sequence': sequence, 'problem': 'entry_hash does not match the entry'}
+            previous = stored_hash
+
+            if anchor is not None and anchor[0] <= sequence <= anchor[1]:
+                accumulator.add(stored_hash)
+                if sequence == anchor[1]:
+                    if accumulator.count != anchor[1] - anchor[0] + 1 or accumulator.root() != anchor[2]:
+                        yield {'sequence': sequence, 'problem': f'Merkle root of anchor {anchor[0]}-{anchor[1]} does not match'}
+                    accumulator = MerkleAccumulator()
+                    anchor = next(anchors, None)
+
+        head = AuditChainHead.objects.filter(pk=1).values_list('last_sequence', 'last_hash').first()
+        if head is not None and head[0] >= expected:
+            yield {'sequence': expected, 'problem': f'entries {expected}-{head[0]} are missing'}
+        elif head is not None and previous is not None and head[1] != previous:
+            yield {'sequence': head[0], 'problem': 'chain head hash does not match the last entry'}
+
+    def proof(self, log):
+        """Inclusion proof of an audit log entry in its anchor, or None while it is unanchored"""
+        if log.sequence is None:
+            return None
+        anchor = AuditAnchor.objects.select_related('blockchain_transaction').filter(
+            first_sequence__lte=log.sequence, last_sequence__gte=log.sequence,
+        ).first()
+        if anchor is None:
+            return None
+        digests = list(
+            AuditLog.objects.filter(sequence__gte=anchor.first_sequence, sequence__lte=anchor.last_sequence)
+            .order_by('sequence').values_list('entry_hash', flat=True)
+        )
+        index = log.sequence - anchor.first_sequence
+        steps = merkle_proof(digests, index)
+        recomputed = entry_hash(log.previous_hash, {field: getattr(log, field) for field in HASHED_FIELDS})
+        blockchain_transaction = anchor.blockchain_transaction
+        return {
+            'sequence': log.sequence,
+            'entry_hash': log.entry_hash,
+            'previous_hash': log.previous_hash,
+            'entry_hash_valid': recomputed == log.entry_hash,
+            'leaf_index': index,
+            'proof': steps,
+            'merkle_root': anchor.merkle_root,
+            'proof_valid': verify_proof(log.entry_hash, steps, anchor.merkle_root),
+            'anchor': {
+                'first_sequence': anchor.first_sequence,
+                'last_sequence': anchor.last_sequence,
+                'transaction_hash': blockchain_transaction.transaction_hash if blockchain_transaction else None,
+                'block_number': blockchain_transaction.block_number if blockchain_transaction else None,
+                'status': blockchain_transaction.status if blockchain_transaction else None,
+                'network': blockchain_transaction.network if blockchain_transaction else None,
+            },
+        }
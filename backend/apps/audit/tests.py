@@ -0,0 +1,159 @@
+"""
+Audit log tests
+"""
+import io
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.blockchain.relayers import LocalChainRelayer
+from .models import AuditAnchor, AuditLog
+from .services import audit_buffer
+from .services.audit_buffer import AuditLogBuffer, entry_from_json, entry_to_json, store_entries
+from .services.audit_chain import AuditChain, stored_values
+
+
+def audit_entries(count, start=1, **fields):
+    return [
+        {
+            'user_id': None, 'action_type': 'update', 'entity_type': 'incident', 'entity_id': str(n),
+            'action_details': {'n': n, 'changes': ['status']}, 'ip_address': '10.0.0.1',
+            'user_agent': 'tests', 'timestamp': timezone.now(), **fields,
+        }
+        for n in range(start, start + count)
+    ]
+
+
+@override_settings(AUDIT_BUFFER_ENABLED=False, AUDIT_ANCHOR_BATCH_SIZE=4)
+class AuditChainTests(TestCase):
+    """Tampering with stored entries or anchors shows up in verify()"""
+
+    def setUp(self):
+        self.chain = AuditChain(relayer=LocalChainRelayer())
+        self.chain.append(audit_entries(10))
+        self.anchors = self.chain.anchor()
+
+    def problems(self):
+        return list(self.chain.verify())
+
+    def test_untouched_chain_verifies(self):
+        self.assertEqual([(anchor.first_sequence, anchor.last_sequence) for anchor in self.anchors],
+                         [(1, 4), (5, 8), (9, 10)])
+        self.assertEqual(self.problems(), [])
+
+    def test_edited_entry_is_detected(self):
+        AuditLog.objects.filter(sequence=5).update(action_details={'n': 5, 'changes': []})
+        self.assertEqual(self.problems(), [{'sequence': 5, 'problem': 'entry_hash does not match the entry'}])
+
+    def test_deleted_entry_is_detected(self):
+        AuditLog.objects.filter(sequence=5).delete()
+        problems = self.problems()
+        self.assertIn({'sequence': 5, 'problem': 'entries 5-5 are missing'}, problems)
+        self.assertIn({'sequence': 6, 'problem': 'previous_hash does not match the preceding entry'}, problems)
+        self.assertIn({'sequence': 8, 'problem': 'Merkle root of anchor 5-8 does not match'}, problems)
+
+    def test_altered_anchor_root_is_detected(self):
+        AuditAnchor.objects.filter(first_sequence=1).update(merkle_root='0' * 64)
+        self.assertEqual(self.problems(), [{'sequence': 4, 'problem': 'Merkle root of anchor 1-4 does not match'}])
+
+    def test_proof_of_anchored_entry(self):
+        for log in AuditLog.objects.all():
+            proof = self.chain.proof(log)
+            self.assertTrue(proof['entry_hash_valid'], log.sequence)
+            self.assertTrue(proof['proof_valid'], log.sequence)
+            self.assertIsNotNone(proof['anchor']['transaction_hash'])
+
+    def test_proof_of_unanchored_entry_is_none(self):
+        self.chain.append(audit_entries(1, start=11))
+        self.assertIsNone(self.chain.proof(AuditLog.objects.get(sequence=11)))
+
+    def test_ip_addresses_round_trip(self):
+        addresses = ['2001:0DB8:0000:0000:0000:0000:0000:0001', '::ffff:192.0.2.1', '', None]
+        rows = self.chain.append([
+            entry for address in addresses for entry in audit_entries(1, ip_address=address)
+        ])
+
+        self.assertEqual([row.ip_address for row in rows], ['2001:db8::1', '::ffff:192.0.2.1', None, None])
+        for row in rows:
+            stored = AuditLog.objects.get(pk=row.pk)
+            self.assertEqual(stored_values(stored), stored_values(row))
+        self.assertEqual(self.problems(), [])
+
+
+@override_settings(AUDIT_BUFFER_ENABLED=False)
+class AuditBufferTests(TestCase):
+    """Entries the database cannot take end up in the fallback file, and replay stores them once"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.fallback_path = os.path.join(directory.name, 'audit-fallback.jsonl')
+        self.buffer = AuditLogBuffer(max_entries=2, fallback_path=self.fallback_path)
+        # flush() writes from this thread; no flusher thread may write during the test transaction
+        patcher = mock.patch.object(AuditLogBuffer, '_ensure_thread')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fallback_entries(self, path=None):
+        with open(path or self.fallback_path, encoding='utf-8') as fallback:
+            return [entry_from_json(line) for line in fallback]
+
+    def test_rejected_entry_alone_goes_to_the_fallback_file(self):
+        entries = audit_entries(5)
+        entries[2]['entity_type'] = 'x' * 51
+
+        self.assertEqual(store_entries(entries), [entries[2]])
+        self.assertEqual(list(AuditLog.objects.order_by('sequence').values_list('entity_id', flat=True)),
+                         ['1', '2', '4', '5'])
+
+        AuditLog.objects.all().delete()
+        self.buffer._write(audit_entries(5, start=6) + [entries[2]])
+        self.assertEqual(AuditLog.objects.count(), 5)
+        self.assertEqual([entry['entity_id'] for entry in self.fallback_entries()], ['3'])
+
+    def test_database_error_sends_the_whole_batch_to_the_fallback_file(self):
+        entries = audit_entries(3)
+        with mock.patch.object(audit_buffer, 'store_entries', side_effect=OperationalError('database is locked')), \
+                mock.patch.object(audit_buffer, 'connection') as connection:
+            self.buffer._write(entries)
+
+        connection.close.assert_called_once()
+        self.assertEqual(self.fallback_entries(), [entry_from_json(entry_to_json(entry)) for entry in entries])
+        self.assertFalse(AuditLog.objects.exists())
+
+    def test_flush_drains_the_queue(self):
+        for entry in audit_entries(5):
+            self.buffer.submit(entry)
+        self.buffer.flush()
+
+        self.assertTrue(self.buffer._queue.empty())
+        self.assertEqual(AuditLog.objects.count(), 5)
+        self.assertEqual(list(AuditChain().verify()), [])
+
+    def test_replay_does_not_duplicate_entries(self):
+        entries = audit_entries(3)
+        self.buffer._write_fallback(entries, 'tests')
+        self.replay()
+        self.assertEqual(AuditLog.objects.count(), 3)
+        self.assertFalse(os.path.exists(self.fallback_path))
+
+        # A replay interrupted after storing its entries leaves its file behind
+        interrupted = AuditLogBuffer(fallback_path=f'{self.fallback_path}.20260101000000000000.replaying')
+        interrupted._write_fallback(entries + audit_entries(1, start=4), 'tests')
+        output = self.replay()
+        self.assertIn('Successfully replayed 1 audit entries', output)
+        self.assertIn('(3 already stored)', output)
+        self.assertIn('No fallback file', self.replay())
+
+        self.assertEqual(list(AuditLog.objects.order_by('sequence').values_list('entity_id', flat=True)),
+                         ['1', '2', '3', '4'])
+
+    def replay(self):
+        out = io.StringIO()
+        call_command('replay_audit_fallback', path=self.fallback_path, stdout=out)
+        return out.getvalue()
@@ -1,17 +1,25 @@
 """
 Audit log views
 """
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from django.db.models import Q
+from apps.core.filters import TimeRangeFilter
+from apps.core.pagination import TimeKeysetPagination
 from .models import AuditLog
 from .serializers import AuditLogSerializer
+from .services.audit_chain import AuditChain
 
 
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     """Audit log queries (read-only)"""
-    queryset = AuditLog.objects.all()
+    queryset = AuditLog.objects.select_related('user')
     serializer_class = AuditLogSerializer
     permission_classes = [permissions.IsAuthenticated]  # TODO: Add admin permission check
+    pagination_class = TimeKeysetPagination
+    filter_backends = [*api_settings.DEFAULT_FILTER_BACKENDS, TimeRangeFilter]
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -26,3 +34,14 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(entity_id=entity_id)
         
         return queryset
+    
+    @action(detail=True, methods=['get'])
+    def proof(self, request, pk=None):
+        """Merkle inclusion proof of the entry in its on-chain anchor"""
+        log = self.get_object()
+        if log.sequence is None:
+            return Response({'error': 'Audit entry is not part of the hash chain'}, status=status.HTTP_409_CONFLICT)
+        proof = AuditChain().proof(log)
+        if proof is None:
+            return Response({'error': 'Audit entry has not been anchored yet'}, status=status.HTTP_409_CONFLICT)
+        return Response(proof)
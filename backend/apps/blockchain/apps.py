@@ -5,3 +5,6 @@ class BlockchainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.blockchain'
     verbose_name = 'Blockchain Integration'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
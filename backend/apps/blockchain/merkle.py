@@ -0,0 +1,114 @@
+"""
+Merkle trees over hex SHA-256 digests
+Leaves and inner nodes are hashed with distinct prefixes, and an unpaired node is
+carried up a level unchanged (never duplicated), so no two leaf lists share a root
+"""
+import hashlib
+
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+
+def sha256_hex(data):
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def leaf_hash(digest):
+    return hashlib.sha256(LEAF_PREFIX + bytes.fromhex(digest)).digest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def merkle_levels(digests):
+    """Every level of the tree as lists of raw node hashes, leaves first and root last"""
+    levels = [[leaf_hash(digest) for digest in digests]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append([
+            node_hash(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ])
+    return levels
+
+
+def merkle_root(digests):
+    """Root (hex) of a list of hex digests; None for an empty list"""
+    if not digests:
+        return None
+    return merkle_levels(digests)[-1][0].hex()
+
+
+def _proof(levels, index):
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({'position': 'left' if sibling < index else 'right', 'hash': level[sibling].hex()})
+        index //= 2
+    return proof
+
+
+def merkle_proof(digests, index):
+    """
+    Inclusion proof of digests[index]: a list of {'position': 'left'|'right', 'hash': hex}
+    siblings from the leaf up to the root.
+    """
+    if not 0 <= index < len(digests):
+        raise IndexError(f'Leaf {index} is outside a tree of {len(digests)} leaves')
+    return _proof(merkle_levels(digests), index)
+
+
+def merkle_proofs(digests):
+    """Inclusion proofs of every digest, building the tree once"""
+    if not digests:
+        return []
+    levels = merkle_levels(digests)
+    return [_proof(levels, index) for index in range(len(digests))]
+
+
+def verify_proof(digest, proof, root):
+    """Whether `proof` links the hex digest to the hex root"""
+    node = leaf_hash(digest)
+    for step in proof:
+        sibling = bytes.fromhex(step['hash'])
+        node = node_hash(sibling, node) if step['position'] == 'left' else node_hash(node, sibling)
+    return node.hex() == root
+
+
+class MerkleAccumulator:
+    """
+    Streaming root computation: add() digests one by one and keep only one pending
+    node per tree level (O(log n) memory). root() equals merkle_root of the same list.
+    """
+
+    def __init__(self):
+        self._levels = []
+        self.count = 0
+
+    def add(self, digest):
+        node = leaf_hash(digest)
+        self.count += 1
+        height = 0
+        while height < len(self._levels) and self._levels[height] is not None:
+            node = node_hash(self._levels[height], node)
+            self._levels[height] = None
+            height += 1
+        if height == len(self._levels):
+            self._levels.append(node)
+        else:
+            self._levels[height] = node
+
+    def root(self):
+        if not self.count:
+            return None
+        # Fold the pending nodes bottom-up; a lone lower node is carried, as in merkle_root
+        node = None
+        for pending in self._levels:
+            if pending is None:
+                continue
+            node = pending if node is None else node_hash(pending, node)
+        return node.hex()
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='confirmed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='confirmed at'),
+        ),
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='item_count',
+            field=models.IntegerField(default=0, verbose_name='item count'),
+        ),
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='network',
+            field=models.CharField(blank=True, max_length=50, verbose_name='network'),
+        ),
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='payload_hash',
+            field=models.CharField(blank=True, max_length=64, verbose_name='payload hash'),
+        ),
+    ]
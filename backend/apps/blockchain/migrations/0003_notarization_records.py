@@ -0,0 +1,35 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0002_anchor_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotarizationRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(max_length=50, verbose_name='entity type')),
+                ('entity_id', models.CharField(max_length=100, verbose_name='entity ID')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='content hash')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('submitting', 'Submitting'), ('anchored', 'Anchored')], default='queued', max_length=20, verbose_name='status')),
+                ('merkle_root', models.CharField(blank=True, max_length=64, verbose_name='Merkle root')),
+                ('leaf_index', models.IntegerField(blank=True, null=True, verbose_name='leaf index')),
+                ('proof', models.JSONField(blank=True, default=list, verbose_name='Merkle proof')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('anchored_at', models.DateTimeField(blank=True, null=True, verbose_name='anchored at')),
+                ('blockchain_transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notarizations', to='blockchain.blockchaintransaction')),
+            ],
+            options={
+                'db_table': 'blockchain_notarizations',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['entity_type', 'entity_id'], name='blockchain__entity__fe051c_idx'), models.Index(fields=['status', 'id'], name='blockchain__status_40708f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0003_notarization_records'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notarizationrecord',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='claimed at'),
+        ),
+    ]
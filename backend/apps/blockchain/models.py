@@ -11,5 +11,50 @@ class BlockchainTransaction(models.Model):
     transaction_hash = models.CharField(_('transaction hash'), max_length=66, unique=True)
     block_number = models.BigIntegerField(_('block number'), null=True, blank=True)
     status = models.CharField(_('status'), max_length=20, default='pending')
+    # Merkle root carried by the transaction and how many records it covers
+    payload_hash = models.CharField(_('payload hash'), max_length=64, blank=True)
+    item_count = models.IntegerField(_('item count'), default=0)
+    network = models.CharField(_('network'), max_length=50, blank=True)
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    confirmed_at = models.DateTimeField(_('confirmed at'), null=True, blank=True)
 
+
+
+class NotarizationStatus(models.TextChoices):
+    """Notarization record states"""
+    QUEUED = 'queued', _('Queued')
+    SUBMITTING = 'submitting', _('Submitting')
+    ANCHORED = 'anchored', _('Anchored')
+
+
+class NotarizationRecord(models.Model):
+    """
+    Canonical hash of a record (incident, media asset, milestone, inspection) and, once
+    its batch is submitted, its Merkle inclusion proof against the batch root
+    """
+    entity_type = models.CharField(_('entity type'), max_length=50)
+    entity_id = models.CharField(_('entity ID'), max_length=100)
+    content_hash = models.CharField(_('content hash'), max_length=64)
+    status = models.CharField(_('status'), max_length=20, choices=NotarizationStatus.choices,
+                              default=NotarizationStatus.QUEUED)
+    
+    blockchain_transaction = models.ForeignKey(BlockchainTransaction, on_delete=models.SET_NULL, null=True, blank=True,
+                                               related_name='notarizations')
+    merkle_root = models.CharField(_('Merkle root'), max_length=64, blank=True)
+    leaf_index = models.IntegerField(_('leaf index'), null=True, blank=True)
+    proof = models.JSONField(_('Merkle proof'), default=list, blank=True)
+    
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    claimed_at = models.DateTimeField(_('claimed at'), null=True, blank=True)
+    anchored_at = models.DateTimeField(_('anchored at'), null=True, blank=True)
+    
+    class Meta:
+        db_table = 'blockchain_notarizations'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['entity_type', 'entity_id']),
+            models.Index(fields=['status', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.entity_type} {self.entity_id} ({self.status})"
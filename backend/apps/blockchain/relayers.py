@@ -0,0 +1,142 @@
+"""
+Blockchain relayers
+Submit a 32-byte payload (a Merkle root) on chain; BLOCKCHAIN_RELAYER picks the implementation
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class RelayerError(Exception):
+    """A payload could not be submitted"""
+
+
+class BaseRelayer:
+    """
+    submit(payload_hex) sends one transaction carrying the payload and returns
+    {'transaction_hash', 'block_number', 'status', 'confirmed_at'}; status is
+    'confirmed' once mined, otherwise 'submitted' and confirm() is asked later.
+    """
+    network = ''
+
+    def submit(self, payload_hex):
+        raise NotImplementedError
+
+    def confirm(self, transaction_hash):
+        """Same dict as submit() for an earlier transaction, or None if it is not mined yet"""
+        raise NotImplementedError
+
+
+class LocalChainRelayer(BaseRelayer):
+    """
+    In-memory chain for development and tests: every submission is mined at once
+    into its own block. Blocks live for the life of the process.
+    """
+    network = 'local'
+    _lock = threading.Lock()
+    blocks = []
+
+    def submit(self, payload_hex):
+        with self._lock:
+            parent = LocalChainRelayer.blocks[-1]['transaction_hash'] if LocalChainRelayer.blocks else '0x' + '0' * 64
+            block = {
+                'transaction_hash': '0x' + hashlib.sha256(f'{parent}:{payload_hex}'.encode()).hexdigest(),
+                'block_number': len(LocalChainRelayer.blocks) + 1,
+                'payload': payload_hex,
+                'status': 'confirmed',
+                'confirmed_at': timezone.now(),
+            }
+            LocalChainRelayer.blocks.append(block)
+        return {key: block[key] for key in ('transaction_hash', 'block_number', 'status', 'confirmed_at')}
+
+    def confirm(self, transaction_hash):
+        for block in LocalChainRelayer.blocks:
+            if block['transaction_hash'] == transaction_hash:
+                return {key: block[key] for key in ('transaction_hash', 'block_number', 'status', 'confirmed_at')}
+        return None
+
+
+class Web3Relayer(BaseRelayer):
+    """
+    Zero-value transaction from BLOCKCHAIN_RELAYER_ADDRESS to itself with the payload
+    as calldata, on BLOCKCHAIN_RPC_URL (Base by default)
+    """
+
+    def __init__(self):
+        try:
+            from web3 import Web3
+        except ImportError as e:
+            raise RelayerError('web3 is not installed') from e
+        if not settings.BLOCKCHAIN_RELAYER_PRIVATE_KEY:
+            raise RelayerError('BLOCKCHAIN_RELAYER_PRIVATE_KEY is not set')
+        self.network = settings.BLOCKCHAIN_NETWORK
+        self.web3 = Web3(Web3.HTTPProvider(settings.BLOCKCHAIN_RPC_URL, request_kwargs={'timeout': 20}))
+        self.account = self.web3.eth.account.from_key(settings.BLOCKCHAIN_RELAYER_PRIVATE_KEY)
+
+    def submit(self, payload_hex):
+        try:
+            transaction = {
+                'from': self.account.address,
+                'to': self.account.address,
+                'value': 0,
+                'data': '0x' + payload_hex,
+                'nonce': self.web3.eth.get_transaction_count(self.account.address, 'pending'),
+                'chainId': self.web3.eth.chain_id,
+                'gasPrice': self.web3.eth.gas_price,
+            }
+            transaction['gas'] = self.web3.eth.estimate_gas(transaction)
+            signed = self.account.sign_transaction(transaction)
+            transaction_hash = self.web3.eth.send_raw_transaction(signed.rawTransaction).hex()
+        except Exception as e:
+            raise RelayerError(str(e)) from e
+        return {'transaction_hash': transaction_hash, 'block_number': None, 'status': 'submitted', 'confirmed_at': None}
+
+    def confirm(self, transaction_hash):
+        from web3.exceptions import TransactionNotFound
+
+        try:
+            receipt = self.web3.eth.get_transaction_receipt(transaction_hash)
+        except TransactionNotFound:
+            return None
+        return {
+            'transaction_hash': transaction_hash,
+            'block_number': receipt['blockNumber'],
+            'status': 'confirmed' if receipt['status'] == 1 else 'failed',
+            'confirmed_at': timezone.now(),
+        }
+
+
+RELAYERS = {
+    'local': 'apps.blockchain.relayers.LocalChainRelayer',
+    'web3': 'apps.blockchain.relayers.Web3Relayer',
+}
+
+
+def get_relayer():
+    """Relayer named (or dotted path given) by settings.BLOCKCHAIN_RELAYER"""
+    path = settings.BLOCKCHAIN_RELAYER
+    return import_string(RELAYERS.get(path, path))()
+
+
+def confirm_submitted(relayer, transaction_type):
+    """
+    Ask the relayer about transactions of transaction_type still marked 'submitted'
+    and record the mined ones; returns the BlockchainTransactions that changed
+    """
+    from .models import BlockchainTransaction
+
+    updated = []
+    for blockchain_transaction in BlockchainTransaction.objects.filter(transaction_type=transaction_type,
+                                                                       status='submitted'):
+        confirmed = relayer.confirm(blockchain_transaction.transaction_hash)
+        if confirmed is None:
+            continue
+        blockchain_transaction.block_number = confirmed['block_number']
+        blockchain_transaction.status = confirmed['status']
+        blockchain_transaction.confirmed_at = confirmed['confirmed_at']
+        blockchain_transaction.save(update_fields=['block_number', 'status', 'confirmed_at'])
+        updated.append(blockchain_transaction)
+    return updated
@@ -9,6 +9,6 @@ class BlockchainTransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = BlockchainTransaction
         fields = ['id', 'transaction_type', 'entity_type', 'entity_id',
-                 'transaction_hash', 'block_number', 'status',
-                 'created_at', 'confirmed_at']
+                 'transaction_hash', 'block_number', 'status', 'payload_hash',
+                 'item_count', 'network', 'created_at', 'confirmed_at']
         read_only_fields = ['id', 'created_at']
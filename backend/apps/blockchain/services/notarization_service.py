@@ -0,0 +1,273 @@
+"""
+Merkle-batched notarization
+Records are hashed canonically and queued; each flush submits one Merkle root per batch
+through the relayer and stores every record's inclusion proof
+"""
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import groupby
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from apps.blockchain.merkle import merkle_proofs, merkle_root, sha256_hex, verify_proof
+from apps.blockchain.models import BlockchainTransaction, NotarizationRecord, NotarizationStatus
+from apps.blockchain.relayers import confirm_submitted, get_relayer
+
+NOTARIZATION_TRANSACTION_TYPE = 'notarization'
+
+# entity_type -> model, the fields the canonical hash covers, and where the hash and
+# transaction are written back. Only what was reported is covered: workflow state that
+# changes as an incident is worked (triage, status, verification, resolution, SLA and
+# escalation, timestamps refreshed on every save) is left out, so normal handling never
+# makes a notarized record look tampered with.
+NOTARIZED_ENTITIES = {
+    'incident': {
+        'model': 'incidents.Incident',
+        'fields': (
+            'incident_id', 'incident_type_id', 'reporter_id', 'is_anonymous', 'description',
+            'latitude', 'longitude', 'road_classification', 'road_name', 'nearest_milestone',
+            'timestamp', 'weather', 'lane_count', 'vehicles_involved_count', 'has_injuries',
+            'infrastructure_damage_tags', 'created_at',
+        ),
+        'hash_field': 'incident_hash',
+        'transaction_field': 'blockchain_tx_hash',
+        'timestamp_field': 'blockchain_timestamp',
+        'block_field': 'blockchain_block_number',
+    },
+    'media_asset': {
+        'model': 'media.MediaAsset',
+        'fields': (
+            'incident_id', 'uploader_id', 'asset_type', 'file_path', 'file_hash', 'file_size', 'mime_type',
+            'original_filename', 'created_at',
+        ),
+        'hash_field': 'blockchain_hash',
+        'transaction_field': 'blockchain_tx_hash',
+    },
+    'response_milestone': {
+        'model': 'response.ResponseMilestone',
+        'fields': (
+            'incident_id', 'responder_id', 'assignment_id', 'milestone_type', 'latitude', 'longitude',
+            'notes', 'media_attachments', 'timestamp',
+        ),
+        'hash_field': 'milestone_hash',
+        'transaction_field': 'blockchain_tx_hash',
+    },
+    'infrastructure_inspection': {
+        'model': 'workorders.InfrastructureInspection',
+        'fields': (
+            'work_order_id', 'inspector_id', 'inspection_date', 'inspection_type', 'damage_assessment',
+            'repair_needed', 'priority', 'photos', 'inspection_report', 'created_at',
+        ),
+        'hash_field': 'blockchain_hash',
+    },
+}
+
+
+def entity_type_for(instance):
+    label = instance._meta.label
+    for entity_type, entity in NOTARIZED_ENTITIES.items():
+        if entity['model'] == label:
+            return entity_type
+    raise ValueError(f'{label} is not notarized')
+
+
+def _canonical_value(value):
+    if isinstance(value, datetime):
+        return value.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+    return value
+
+
+def canonical_hash(entity_type, pk, values):
+    """sha256 of the sorted, compact JSON of a record's notarized field values"""
+    document = {'entity_type': entity_type, 'id': str(pk)}
+    document.update({field: _canonical_value(value) for field, value in values.items()})
+    return sha256_hex(json.dumps(document, sort_keys=True, separators=(',', ':'), ensure_ascii=False,
+                                 cls=DjangoJSONEncoder))
+
+
+class NotarizationService:
+    """
+    enqueue() stores the canonical hash of a record's current database state and queues
+    it; flush() claims queued hashes BATCH_SIZE at a time and submits each batch's Merkle
+    root as one BlockchainTransaction. Claims older than CLAIM_TIMEOUT_SECONDS (a flush
+    that died mid-batch) are requeued. verify() checks a record against its stored proof
+    and the root recorded for its transaction, without asking the chain.
+    """
+    BATCH_SIZE = 1024
+    CLAIM_TIMEOUT_SECONDS = 600
+
+    def __init__(self, relayer=None):
+        self._relayer = relayer
+        self.batch_size = getattr(settings, 'NOTARIZATION_BATCH_SIZE', self.BATCH_SIZE)
+        self.claim_timeout = getattr(settings, 'NOTARIZATION_CLAIM_TIMEOUT_SECONDS', self.CLAIM_TIMEOUT_SECONDS)
+
+    @property
+    def relayer(self):
+        if self._relayer is None:
+            self._relayer = get_relayer()
+        return self._relayer
+
+    def current_hash(self, entity_type, pk):
+        """Canonical hash of the stored record, or None if it no longer exists"""
+        entity = NOTARIZED_ENTITIES[entity_type]
+        # Read back from the database so values have their stored types and precision
+        values = apps.get_model(entity['model']).objects.filter(pk=pk).values(*entity['fields']).first()
+        if values is None:
+            return None
+        return canonical_hash(entity_type, pk, values)
+
+    def enqueue(self, instance):
+        """Queue the record's current state; a state already notarized or queued is not queued twice"""
+        entity_type = entity_type_for(instance)
+        entity = NOTARIZED_ENTITIES[entity_type]
+        content_hash = self.current_hash(entity_type, instance.pk)
+        if content_hash is None:
+            return None
+        record, _ = NotarizationRecord.objects.get_or_create(
+            entity_type=entity_type, entity_id=str(instance.pk), content_hash=content_hash,
+        )
+        if getattr(instance, entity['hash_field']) != '0x' + content_hash:
+            # update() rather than save(): the record's own signals have already run
+            type(instance).objects.filter(pk=instance.pk).update(**{entity['hash_field']: '0x' + content_hash})
+            setattr(instance, entity['hash_field'], '0x' + content_hash)
+        return record
+
+    def flush(self, max_batches=None):
+        """Submit queued hashes; returns the BlockchainTransactions created"""
+        self.confirm_submitted()
+        self.release_stale_claims()
+        submitted = []
+        while max_batches is None or len(submitted) < max_batches:
+            records = self._claim()
+            if not records:
+                break
+            submitted.append(self._submit(records))
+        return submitted
+
+    def release_stale_claims(self):
+        """Requeue records claimed by a flush that died before its batch was recorded"""
+        cutoff = timezone.now() - timedelta(seconds=self.claim_timeout)
+        return NotarizationRecord.objects.filter(
+            status=NotarizationStatus.SUBMITTING, claimed_at__lt=cutoff,
+        ).update(status=NotarizationStatus.QUEUED, claimed_at=None)
+
+    def _claim(self):
+        # Concurrent flushers skip each other's rows where the database supports it
+        with transaction.atomic():
+            ids = list(
+                NotarizationRecord.objects.select_for_update(skip_locked=True)
+                .filter(status=NotarizationStatus.QUEUED).order_by('id')
+                .values_list('id', flat=True)[:self.batch_size]
+            )
+            NotarizationRecord.objects.filter(id__in=ids).update(
+                status=NotarizationStatus.SUBMITTING, claimed_at=timezone.now(),
+            )
+        return list(NotarizationRecord.objects.filter(id__in=ids).order_by('id'))
+
+    def _submit(self, records):
+        digests = [record.content_hash for record in records]
+        root = merkle_root(digests)
+        try:
+            submitted = self.relayer.submit(root)
+        except Exception:
+            NotarizationRecord.objects.filter(id__in=[record.pk for record in records]).update(
+                status=NotarizationStatus.QUEUED, claimed_at=None,
+            )
+            raise
+
+        now = timezone.now()
+        with transaction.atomic():
+            blockchain_transaction = BlockchainTransaction.objects.create(
+                transaction_type=NOTARIZATION_TRANSACTION_TYPE,
+                entity_type='notarization_batch',
+                entity_id=f'{records[0].pk}-{records[-1].pk}',
+                transaction_hash=submitted['transaction_hash'],
+                block_number=submitted['block_number'],
+                status=submitted['status'],
+                confirmed_at=submitted['confirmed_at'],
+                payload_hash=root,
+                item_count=len(records),
+                network=self.relayer.network,
+            )
+            for index, (record, proof) in enumerate(zip(records, merkle_proofs(digests))):
+                record.status = NotarizationStatus.ANCHORED
+                record.blockchain_transaction = blockchain_transaction
+                record.merkle_root = root
+                record.leaf_index = index
+                record.proof = proof
+                record.anchored_at = now
+            NotarizationRecord.objects.bulk_update(
+                records,
+                ['status', 'blockchain_transaction', 'merkle_root', 'leaf_index', 'proof', 'anchored_at'],
+                batch_size=500,
+            )
+            self._stamp_entities(records, blockchain_transaction)
+        return blockchain_transaction
+
+    def _stamp_entities(self, records, blockchain_transaction):
+        """Write the transaction onto records whose stored hash is still the one notarized"""
+        by_type = groupby(sorted(records, key=lambda record: record.entity_type), key=lambda record: record.entity_type)
+        for entity_type, group in by_type:
+            entity = NOTARIZED_ENTITIES[entity_type]
+            if 'transaction_field' not in entity:
+                continue
+            group = list(group)
+            fields = {entity['transaction_field']: blockchain_transaction.transaction_hash}
+            if 'timestamp_field' in entity:
+                fields[entity['timestamp_field']] = blockchain_transaction.confirmed_at
+            if 'block_field' in entity:
+                fields[entity['block_field']] = blockchain_transaction.block_number
+            apps.get_model(entity['model']).objects.filter(
+                pk__in=[record.entity_id for record in group],
+                **{f"{entity['hash_field']}__in": ['0x' + record.content_hash for record in group]},
+            ).update(**fields)
+
+    def confirm_submitted(self):
+        """Record block numbers of notarization transactions mined since they were submitted"""
+        for blockchain_transaction in confirm_submitted(self.relayer, NOTARIZATION_TRANSACTION_TYPE):
+            records = list(blockchain_transaction.notarizations.all())
+            self._stamp_entities(records, blockchain_transaction)
+
+    def verify(self, entity_type, pk):
+        """
+        Latest notarization of a record, whether the record still matches it, and whether
+        its proof reproduces the Merkle root its transaction carried; None if never notarized
+        """
+        record = (NotarizationRecord.objects.select_related('blockchain_transaction')
+                  .filter(entity_type=entity_type, entity_id=str(pk)).order_by('-id').first())
+        if record is None:
+            return None
+        current = self.current_hash(entity_type, pk)
+        blockchain_transaction = record.blockchain_transaction
+        result = {
+            'entity_type': entity_type,
+            'entity_id': record.entity_id,
+            'status': record.status,
+            'content_hash': record.content_hash,
+            'current_hash': current,
+            'matches_current': current == record.content_hash,
+            'notarized_at': record.created_at,
+            'anchored_at': record.anchored_at,
+            'merkle_root': record.merkle_root or None,
+            'leaf_index': record.leaf_index,
+            'proof': record.proof,
+            'proof_valid': None,
+            'transaction': None,
+        }
+        if blockchain_transaction is not None:
+            result['proof_valid'] = (
+                record.merkle_root == blockchain_transaction.payload_hash
+                and verify_proof(record.content_hash, record.proof, record.merkle_root)
+            )
+            result['transaction'] = {
+                'transaction_hash': blockchain_transaction.transaction_hash,
+                'block_number': blockchain_transaction.block_number,
+                'status': blockchain_transaction.status,
+                'network': blockchain_transaction.network,
+                'item_count': blockchain_transaction.item_count,
+            }
+        return result
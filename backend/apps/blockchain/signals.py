@@ -0,0 +1,23 @@
+"""
+Blockchain signals
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+
+def _enqueue_on_commit(instance):
+    from .services.notarization_service import NotarizationService
+
+    transaction.on_commit(lambda: NotarizationService().enqueue(instance))
+
+
+@receiver(post_save, sender='incidents.Incident')
+@receiver(post_save, sender='media.MediaAsset')
+@receiver(post_save, sender='response.ResponseMilestone')
+@receiver(post_save, sender='workorders.InfrastructureInspection')
+def notarize_new_record(sender, instance, created, **kwargs):
+    """Queue new incidents and evidence for the next notarization batch"""
+    if created and not kwargs.get('raw') and settings.NOTARIZE_ON_CREATE:
+        _enqueue_on_commit(instance)
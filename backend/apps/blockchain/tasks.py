@@ -0,0 +1,22 @@
+"""
+Blockchain background tasks
+"""
+import logging
+
+from celery import shared_task
+
+from .relayers import RelayerError
+from .services.notarization_service import NotarizationService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_notarizations():
+    """Submit queued notarization hashes; a relayer failure leaves them queued for the next run"""
+    try:
+        submitted = NotarizationService().flush()
+    except RelayerError as e:
+        logger.warning('Notarization batch failed: %s', e)
+        return 0
+    return len(submitted)
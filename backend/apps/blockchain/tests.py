@@ -0,0 +1,136 @@
+"""
+Blockchain tests
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.incidents.models import Incident, IncidentSeverity, IncidentStatus, IncidentType
+from .merkle import merkle_proof, merkle_proofs, merkle_root, sha256_hex, verify_proof
+from .models import BlockchainTransaction, NotarizationRecord, NotarizationStatus
+from .relayers import LocalChainRelayer, RelayerError
+from .services.notarization_service import NotarizationService
+
+
+class FailingRelayer(LocalChainRelayer):
+    """Local chain stub whose submissions never get through"""
+
+    def submit(self, payload_hex):
+        raise RelayerError('node unreachable')
+
+
+class MerkleTests(TestCase):
+    def test_every_proof_verifies(self):
+        for size in range(1, 10):
+            digests = [sha256_hex(str(n)) for n in range(size)]
+            root = merkle_root(digests)
+            proofs = merkle_proofs(digests)
+            for index, digest in enumerate(digests):
+                self.assertEqual(proofs[index], merkle_proof(digests, index))
+                self.assertTrue(verify_proof(digest, proofs[index], root))
+
+    def test_proof_rejects_other_digest(self):
+        digests = [sha256_hex(str(n)) for n in range(5)]
+        root = merkle_root(digests)
+        self.assertFalse(verify_proof(sha256_hex('5'), merkle_proof(digests, 2), root))
+
+    def test_unpaired_leaf_is_not_duplicated(self):
+        digests = [sha256_hex(str(n)) for n in range(3)]
+        self.assertNotEqual(merkle_root(digests), merkle_root(digests + digests[-1:]))
+
+
+@override_settings(NOTARIZE_ON_CREATE=True, INCIDENT_DUPLICATE_DETECTION=False)
+class NotarizationServiceTests(TestCase):
+    """Notarization end to end against the in-memory local chain"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.incident_type = IncidentType.objects.create(name='Collision', category='accident')
+        cls.severity = IncidentSeverity.objects.create(
+            level='P2', name='High', description='High severity', response_time_target_minutes=15,
+            escalation_time_minutes=30, priority_score=3,
+        )
+
+    def setUp(self):
+        self.service = NotarizationService(relayer=LocalChainRelayer())
+
+    def create_incident(self, n=0):
+        # Run the on-commit enqueue the post_save signal registers
+        with self.captureOnCommitCallbacks(execute=True):
+            return Incident.objects.create(
+                incident_id=f'INC-{n:05d}', incident_type=self.incident_type, severity=self.severity,
+                description='Two vehicles collided at the junction', latitude=Decimal('-1.28'),
+                longitude=Decimal('36.82'), timestamp=timezone.now(),
+            )
+
+    def test_new_incident_is_queued_and_anchored(self):
+        incident = self.create_incident()
+        record = NotarizationRecord.objects.get(entity_type='incident', entity_id=str(incident.pk))
+        self.assertEqual(record.status, NotarizationStatus.QUEUED)
+
+        transactions = self.service.flush()
+        self.assertEqual(len(transactions), 1)
+        record.refresh_from_db()
+        self.assertEqual(record.status, NotarizationStatus.ANCHORED)
+        self.assertEqual(record.merkle_root, transactions[0].payload_hash)
+
+        incident.refresh_from_db()
+        self.assertEqual(incident.incident_hash, '0x' + record.content_hash)
+        self.assertEqual(incident.blockchain_tx_hash, transactions[0].transaction_hash)
+
+        result = self.service.verify('incident', incident.pk)
+        self.assertTrue(result['matches_current'])
+        self.assertTrue(result['proof_valid'])
+
+    def test_records_are_batched_into_one_transaction_per_root(self):
+        for n in range(5):
+            self.create_incident(n)
+        self.service.batch_size = 2
+
+        transactions = self.service.flush()
+        self.assertEqual([transaction.item_count for transaction in transactions], [2, 2, 1])
+        for record in NotarizationRecord.objects.all():
+            self.assertTrue(verify_proof(record.content_hash, record.proof, record.merkle_root))
+
+    def test_workflow_changes_do_not_break_the_notarized_hash(self):
+        incident = self.create_incident()
+        self.service.flush()
+
+        incident.status = IncidentStatus.RESOLVED
+        incident.escalation_level = 2
+        incident.save()
+        self.assertTrue(self.service.verify('incident', incident.pk)['matches_current'])
+
+        Incident.objects.filter(pk=incident.pk).update(description='Edited after it was notarized')
+        result = self.service.verify('incident', incident.pk)
+        self.assertFalse(result['matches_current'])
+        self.assertTrue(result['proof_valid'])
+
+    def test_failed_submission_requeues_the_batch(self):
+        self.create_incident()
+        with self.assertRaises(RelayerError):
+            NotarizationService(relayer=FailingRelayer()).flush()
+
+        record = NotarizationRecord.objects.get()
+        self.assertEqual(record.status, NotarizationStatus.QUEUED)
+        self.assertIsNone(record.claimed_at)
+        self.assertFalse(BlockchainTransaction.objects.exists())
+
+    def test_stale_claims_are_requeued(self):
+        self.create_incident(0)
+        self.create_incident(1)
+        stale, fresh = NotarizationRecord.objects.order_by('id')
+        now = timezone.now()
+        NotarizationRecord.objects.filter(pk=stale.pk).update(
+            status=NotarizationStatus.SUBMITTING, claimed_at=now - timedelta(seconds=self.service.claim_timeout + 1),
+        )
+        NotarizationRecord.objects.filter(pk=fresh.pk).update(status=NotarizationStatus.SUBMITTING, claimed_at=now)
+
+        self.service.flush()
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.status, NotarizationStatus.ANCHORED)
+        # Still within the timeout: another flush may be submitting it
+        self.assertEqual(fresh.status, NotarizationStatus.SUBMITTING)
@@ -15,4 +15,7 @@ urlpatterns = [
     path('incidents/<str:incident_id>/notarize/', 
          BlockchainTransactionViewSet.as_view({'post': 'notarize_incident'}),
          name='notarize-incident'),
+    path('incidents/<str:incident_id>/notarization/',
+         BlockchainTransactionViewSet.as_view({'get': 'incident_notarization'}),
+         name='incident-notarization'),
 ]
@@ -8,12 +8,14 @@ from django.shortcuts import get_object_or_404
 
 from .models import BlockchainTransaction
 from .serializers import BlockchainTransactionSerializer
+from .services.notarization_service import NOTARIZED_ENTITIES, NotarizationService
 from apps.incidents.models import Incident
+from apps.users.permissions import IsOperationsStaff
 
 
 class BlockchainTransactionViewSet(viewsets.ReadOnlyModelViewSet):
     """Blockchain transaction queries"""
-    queryset = BlockchainTransaction.objects.all()
+    queryset = BlockchainTransaction.objects.order_by('-created_at')
     serializer_class = BlockchainTransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -25,16 +27,52 @@ class BlockchainTransactionViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(entity_type=entity_type, entity_id=entity_id)
         return queryset
     
-    @action(detail=False, methods=['post'])
-    def notarize_incident(self, request):
-        """Trigger blockchain notarization for an incident"""
-        incident_id = request.data.get('incident_id')
+    @action(detail=False, methods=['post'], permission_classes=[IsOperationsStaff])
+    def notarize_incident(self, request, incident_id=None):
+        """Queue an incident, its media and its milestones for the next notarization batch"""
+        incident_id = incident_id or request.data.get('incident_id')
         incident = get_object_or_404(Incident, incident_id=incident_id)
         
-        # TODO: Implement actual blockchain notarization logic
-        # This would interact with Base network via web3.py
+        service = NotarizationService()
+        records = [service.enqueue(incident)]
+        records += [service.enqueue(asset) for asset in incident.media_assets.all()]
+        records += [service.enqueue(milestone) for milestone in incident.milestones.all()]
         
         return Response({
-            'message': 'Incident notarization initiated',
-            'incident_id': incident_id
-        }, status=status.HTTP_200_OK)
+            'message': 'Incident notarization queued',
+            'incident_id': incident.incident_id,
+            'incident_hash': incident.incident_hash,
+            'records': [
+                {'entity_type': record.entity_type, 'entity_id': record.entity_id,
+                 'content_hash': record.content_hash, 'status': record.status}
+                for record in records if record is not None
+            ],
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'])
+    def incident_notarization(self, request, incident_id=None):
+        """Verify an incident and its evidence against their stored Merkle proofs"""
+        incident = get_object_or_404(Incident, incident_id=incident_id or request.query_params.get('incident_id'))
+        service = NotarizationService()
+        return Response({
+            'incident': service.verify('incident', incident.pk),
+            'media_assets': [service.verify('media_asset', pk)
+                             for pk in incident.media_assets.values_list('pk', flat=True)],
+            'milestones': [service.verify('response_milestone', pk)
+                           for pk in incident.milestones.values_list('pk', flat=True)],
+        })
+    
+    @action(detail=False, methods=['get'])
+    def verify(self, request):
+        """Verify one notarized record: ?entity_type=media_asset&entity_id=42"""
+        entity_type = request.query_params.get('entity_type')
+        entity_id = request.query_params.get('entity_id')
+        if entity_type not in NOTARIZED_ENTITIES or not entity_id:
+            return Response(
+                {'error': f"entity_type ({', '.join(NOTARIZED_ENTITIES)}) and entity_id are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        result = NotarizationService().verify(entity_type, entity_id)
+        if result is None:
+            return Response({'error': 'Record has not been notarized'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(result)
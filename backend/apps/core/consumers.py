@@ -0,0 +1,146 @@
+"""
+WebSocket consumers
+"""
+from urllib.parse import parse_qs
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from apps.core.events import ALL_REGIONS, REGION_RE, region_group, regions_in_bbox
+from apps.notifications.transports import user_group
+from apps.users.permissions import OPERATIONS_ROLES, user_has_role
+
+
+class EventStreamConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Live incident, assignment and responder location events for dispatcher screens.
+
+    Connect to ws/events/?token=<access token>[&regions=kzf3,kzf6|&bbox=min_lat,min_lng,max_lat,max_lng]
+    and (re)subscribe at any time with
+        {"action": "subscribe", "regions": ["kzf3"]}          geohash-4 region cells, or "*" for all
+        {"action": "subscribe", "bbox": [min_lat, min_lng, max_lat, max_lng]}
+        {"action": "unsubscribe", "regions": [...]}
+    Events arrive as {"type": "event", "event": "incident.created", "region": "kzf3", "data": {...}}.
+    """
+    max_regions = 256
+
+    async def connect(self):
+        if not user_has_role(self.scope.get('user'), OPERATIONS_ROLES):
+            await self.close(code=4403)
+            return
+        self.regions = set()
+        await self.accept()
+
+        params = parse_qs(self.scope.get('query_string', b'').decode())
+        message = {}
+        if 'regions' in params:
+            message['regions'] = ','.join(params['regions']).split(',')
+        elif 'bbox' in params:
+            message['bbox'] = params['bbox'][0].split(',')
+        if message:
+            await self.receive_json({'action': 'subscribe', **message})
+
+    async def disconnect(self, code):
+        for region in getattr(self, 'regions', ()):
+            await self.channel_layer.group_discard(region_group(region), self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get('action') if isinstance(content, dict) else None
+        if action == 'ping':
+            await self.send_json({'type': 'pong'})
+            return
+        if action not in ('subscribe', 'unsubscribe'):
+            await self._error('Unknown action. Use subscribe, unsubscribe or ping.')
+            return
+
+        regions, error = self._requested_regions(content)
+        if error:
+            await self._error(error)
+            return
+        if action == 'subscribe':
+            await self._subscribe(regions)
+        else:
+            await self._unsubscribe(regions)
+        await self.send_json({'type': 'subscribed', 'regions': sorted(self.regions)})
+
+    async def _subscribe(self, regions):
+        if ALL_REGIONS in regions:
+            # All-region subscribers get every event once, not again through a region group
+            await self._unsubscribe(self.regions - {ALL_REGIONS})
+            regions = {ALL_REGIONS}
+        elif ALL_REGIONS in self.regions:
+            return
+        for region in regions - self.regions:
+            await self.channel_layer.group_add(region_group(region), self.channel_name)
+        self.regions |= regions
+
+    async def _unsubscribe(self, regions):
+        for region in regions & self.regions:
+            await self.channel_layer.group_discard(region_group(region), self.channel_name)
+        self.regions -= regions
+
+    def _requested_regions(self, content):
+        if 'bbox' in content:
+            try:
+                min_lat, min_lng, max_lat, max_lng = (float(value) for value in content['bbox'])
+            except (TypeError, ValueError):
+                return None, 'bbox must be [min_lat, min_lng, max_lat, max_lng]'
+            if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lng <= max_lng <= 180):
+                return None, 'bbox must be [min_lat, min_lng, max_lat, max_lng]'
+            regions = regions_in_bbox(min_lat, min_lng, max_lat, max_lng)
+        else:
+            regions = content.get('regions')
+            if not isinstance(regions, list) or not all(isinstance(region, str) for region in regions):
+                return None, 'regions must be a list of region cells'
+            regions = {region.strip().lower() for region in regions if region.strip()}
+            invalid = sorted(region for region in regions if region != ALL_REGIONS and not REGION_RE.match(region))
+            if invalid:
+                return None, f'Invalid regions: {", ".join(invalid[:10])}'
+
+        if len(regions | self.regions) > self.max_regions:
+            return None, f'At most {self.max_regions} regions per connection; subscribe to "*" instead'
+        return regions, None
+
+    async def _error(self, error):
+        await self.send_json({'type': 'error', 'error': error})
+
+    async def event_message(self, message):
+        await self.send_json({
+            'type': 'event',
+            'event': message['event'],
+            'region': message['region'],
+            'data': message['data'],
+        })
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Push delivery of the connected user's notifications.
+
+    Connect to ws/notifications/?token=<access token>; notifications arrive as
+    {"type": "notification", "id": 12, "title": "...", "message": "..."}.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if not user or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.group = user_group(user.pk)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group'):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if isinstance(content, dict) and content.get('action') == 'ping':
+            await self.send_json({'type': 'pong'})
+
+    async def notification_message(self, message):
+        await self.send_json({
+            'type': 'notification',
+            'id': message['id'],
+            'title': message['title'],
+            'message': message['message'],
+        })
@@ -0,0 +1,84 @@
+"""
+Real-time event publishing over the Channels layer
+Events are fanned out to the subscribers of the region (geohash cell) they happen in
+"""
+import logging
+import re
+from datetime import date, datetime
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import transaction
+
+from apps.core.geo import bbox_cells, geohash_encode
+
+logger = logging.getLogger(__name__)
+
+# Group every subscriber to all regions joins
+ALL_REGIONS = '*'
+ALL_REGIONS_GROUP = 'events.all'
+
+# Region cells of ~39km x 20km (geohash precision 4)
+REGION_PRECISION = getattr(settings, 'REALTIME_REGION_PRECISION', 4)
+REGION_RE = re.compile(r'^[0-9b-hjkmnp-z]{%d}$' % REGION_PRECISION)
+
+
+def region_for(latitude, longitude):
+    """Region (geohash cell) of a coordinate, or None when either is missing"""
+    if latitude is None or longitude is None:
+        return None
+    return geohash_encode(latitude, longitude, REGION_PRECISION)
+
+
+def regions_in_bbox(min_lat, min_lng, max_lat, max_lng):
+    """Regions intersecting a latitude/longitude box"""
+    return bbox_cells(min_lat, max_lat, min_lng, max_lng, precision=REGION_PRECISION)
+
+
+def region_group(region):
+    return ALL_REGIONS_GROUP if region == ALL_REGIONS else f'events.region.{region}'
+
+
+def _plain(value):
+    """Channel layer messages must be msgpack-serialisable"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def publish_event(event, data, latitude=None, longitude=None):
+    """
+    Send an event to its region's subscribers and to all-region subscribers once the
+    current transaction commits. Delivery is best effort: a channel layer failure is
+    logged and never fails the write that produced the event.
+    """
+    message = {
+        'type': 'event.message',
+        'event': event,
+        'region': region_for(latitude, longitude),
+        'data': _plain(data),
+    }
+    transaction.on_commit(lambda: _send(message))
+
+
+def _send(message):
+    from channels.layers import get_channel_layer
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    groups = [ALL_REGIONS_GROUP]
+    if message['region']:
+        groups.append(region_group(message['region']))
+    try:
+        for group in groups:
+            async_to_sync(channel_layer.group_send)(group, message)
+    except Exception:
+        logger.warning('Could not publish %s event', message['event'], exc_info=True)
@@ -0,0 +1,31 @@
+"""
+Shared API filter backends
+"""
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class TimeRangeFilter(BaseFilterBackend):
+    """
+    ?since= / ?until= (ISO 8601) bounds on the view's `time_range_field` (default `timestamp`).
+    Range predicates lead the (timestamp, ...) composite indexes on the time-series tables.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        field = getattr(view, 'time_range_field', 'timestamp')
+        for param, lookup in (('since', 'gte'), ('until', 'lt')):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                moment = parse_datetime(value)
+            except ValueError:
+                moment = None
+            if moment is None:
+                raise ValidationError({param: 'Enter a valid ISO 8601 date/time.'})
+            if timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+            queryset = queryset.filter(**{f'{field}__{lookup}': moment})
+        return queryset
@@ -0,0 +1,143 @@
+"""
+Geospatial helpers: geohash cells, bounding boxes and haversine distances
+Used for proximity lookups until PostGIS is enabled
+"""
+import math
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+
+# Cells stored on spatially indexed rows (~1.2km x 0.6km at the equator)
+GEOHASH_PRECISION = 6
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate as a geohash string"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    latitude = float(latitude)
+    longitude = float(longitude)
+
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def geohash_or_blank(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Geohash for nullable coordinates (blank when either is missing)"""
+    if latitude is None or longitude is None:
+        return ''
+    return geohash_encode(latitude, longitude, precision)
+
+
+def cell_size(precision=GEOHASH_PRECISION):
+    """(lat_degrees, lng_degrees) spanned by one geohash cell"""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = math.floor(precision * 5 / 2)
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def bounding_box(latitude, longitude, radius_m):
+    """(min_lat, max_lat, min_lng, max_lng) enclosing a circle of radius_m"""
+    latitude = float(latitude)
+    longitude = float(longitude)
+    lat_delta = math.degrees(radius_m / EARTH_RADIUS_M)
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    lng_delta = min(180.0, lat_delta / cos_lat)
+    return (
+        max(-90.0, latitude - lat_delta),
+        min(90.0, latitude + lat_delta),
+        longitude - lng_delta,
+        longitude + lng_delta,
+    )
+
+
+def covering_cells(latitude, longitude, radius_m, precision=GEOHASH_PRECISION):
+    """Set of geohash cells intersecting the bounding box of a circle"""
+    return bbox_cells(*bounding_box(latitude, longitude, radius_m), precision=precision)
+
+
+def bbox_cells(min_lat, max_lat, min_lng, max_lng, precision=GEOHASH_PRECISION):
+    """Set of geohash cells intersecting a latitude/longitude box"""
+    lat_step, lng_step = cell_size(precision)
+
+    cells = set()
+    lat = min_lat
+    while True:
+        lng = min_lng
+        while True:
+            wrapped_lng = ((lng + 180.0) % 360.0) - 180.0
+            cells.add(geohash_encode(min(lat, 90.0), wrapped_lng, precision))
+            if lng >= max_lng:
+                break
+            lng = min(lng + lng_step, max_lng)
+        if lat >= max_lat:
+            break
+        lat = min(lat + lat_step, max_lat)
+    return cells
+
+
+def haversine_m(latitude, longitude, latitudes, longitudes):
+    """Vectorised great-circle distance in metres from one point to many"""
+    lat1 = math.radians(float(latitude))
+    lng1 = math.radians(float(longitude))
+    lat2 = np.radians(np.asarray(latitudes, dtype=float))
+    lng2 = np.radians(np.asarray(longitudes, dtype=float))
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearby_queryset(queryset, latitude, longitude, radius_m,
+                    lat_field='latitude', lng_field='longitude', cell_field='geohash'):
+    """
+    SQL prefilter for rows near a point: indexed geohash cells plus a bounding box.
+    Results still need a haversine refine (see within_radius).
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_m)
+    return queryset.filter(**{
+        f'{cell_field}__in': covering_cells(latitude, longitude, radius_m),
+        f'{lat_field}__gte': min_lat,
+        f'{lat_field}__lte': max_lat,
+        f'{lng_field}__gte': min_lng,
+        f'{lng_field}__lte': max_lng,
+    })
+
+
+def within_radius(rows, latitude, longitude, radius_m, lat_index=0, lng_index=1):
+    """
+    Refine prefiltered rows (sequences holding lat/lng) to those within radius_m.
+    Returns a list of (row, distance_m) pairs.
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+    distances = haversine_m(
+        latitude, longitude,
+        [row[lat_index] for row in rows],
+        [row[lng_index] for row in rows],
+    )
+    return [(row, float(d)) for row, d in zip(rows, distances) if d <= radius_m]
@@ -0,0 +1,28 @@
+"""
+Management command to anchor the audit hash chain on chain
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.audit.services.audit_chain import AuditChain
+from apps.blockchain.relayers import RelayerError
+
+
+class Command(BaseCommand):
+    help = 'Submit one Merkle root per AUDIT_ANCHOR_BATCH_SIZE unanchored audit entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Stop after this many anchor transactions',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            anchors = AuditChain().anchor(max_batches=options['max_batches'])
+        except RelayerError as e:
+            raise CommandError(f'Anchoring failed: {e}')
+        for anchor in anchors:
+            self.stdout.write(f'Anchored {anchor.first_sequence}-{anchor.last_sequence} root {anchor.merkle_root}')
+        self.stdout.write(self.style.SUCCESS(f'Successfully created {len(anchors)} audit anchors'))
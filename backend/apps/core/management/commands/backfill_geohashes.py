@@ -0,0 +1,81 @@
+"""
+Management command to populate geohash cells on RFID logs, incidents and IoT devices
+(RFID logs without coordinates are placed at their reader first)
+"""
+from django.core.management.base import BaseCommand
+
+from apps.core.geo import geohash_encode, geohash_or_blank
+from apps.incidents.models import Incident
+from apps.iot.models import RFIDReader, RFIDLog, CCTVCamera, Sensor
+
+
+class Command(BaseCommand):
+    help = 'Backfill geohash cells used for proximity lookups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows updated per bulk_update (default: 5000)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        for model in [RFIDReader, CCTVCamera, Sensor]:
+            devices = list(model.objects.filter(geohash='').only('pk', 'latitude', 'longitude'))
+            for device in devices:
+                device.geohash = geohash_encode(device.latitude, device.longitude)
+            model.objects.bulk_update(devices, ['geohash'], batch_size=batch_size)
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {len(devices)} updated')
+
+        self.stdout.write('Placing RFID logs without coordinates at their readers...')
+        located = self._locate_rfid_logs(batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Successfully placed {located} RFID logs'))
+
+        for model in [RFIDLog, Incident]:
+            self.stdout.write(f'Backfilling {model._meta.verbose_name_plural}...')
+            updated = self._backfill(model, batch_size)
+            self.stdout.write(self.style.SUCCESS(f'Successfully backfilled {updated} {model._meta.verbose_name_plural}'))
+
+    def _backfill(self, model, batch_size):
+        updated = 0
+        last_pk = 0
+        while True:
+            # Keyset batches so progress survives restarts and never rescans finished rows
+            rows = list(
+                model.objects.filter(
+                    pk__gt=last_pk,
+                    geohash='',
+                    latitude__isnull=False,
+                    longitude__isnull=False,
+                ).order_by('pk').only('pk', 'latitude', 'longitude')[:batch_size]
+            )
+            if not rows:
+                break
+            for row in rows:
+                row.geohash = geohash_or_blank(row.latitude, row.longitude)
+            model.objects.bulk_update(rows, ['geohash'], batch_size=batch_size)
+            updated += len(rows)
+            last_pk = rows[-1].pk
+        return updated
+
+    def _locate_rfid_logs(self, batch_size):
+        updated = 0
+        last_pk = 0
+        while True:
+            rows = list(
+                RFIDLog.objects.filter(pk__gt=last_pk, latitude__isnull=True)
+                .order_by('pk').values_list('pk', 'reader__latitude', 'reader__longitude', 'reader__geohash')[:batch_size]
+            )
+            if not rows:
+                break
+            logs = [
+                RFIDLog(pk=pk, latitude=latitude, longitude=longitude, geohash=geohash)
+                for pk, latitude, longitude, geohash in rows
+            ]
+            RFIDLog.objects.bulk_update(logs, ['latitude', 'longitude', 'geohash'], batch_size=batch_size)
+            updated += len(logs)
+            last_pk = rows[-1][0]
+        return updated
@@ -0,0 +1,45 @@
+"""
+Management command to rebuild hourly traffic rollups from raw sensor readings
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from datetime import timedelta
+
+from apps.analytics.services.rollup_service import TrafficRollupService
+from apps.iot.models import Sensor
+
+
+class Command(BaseCommand):
+    help = 'Backfill TrafficRollupHourly from traffic flow SensorReadings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Number of days to rebuild, ending now (default: 30)',
+        )
+        parser.add_argument(
+            '--sensor-id',
+            action='append',
+            dest='sensor_ids',
+            help='Only rebuild this sensor (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        end = timezone.now()
+        start = end - timedelta(days=options['days'])
+
+        sensor_pks = None
+        if options['sensor_ids']:
+            sensor_pks = list(
+                Sensor.objects.filter(sensor_id__in=options['sensor_ids']).values_list('pk', flat=True)
+            )
+            if not sensor_pks:
+                self.stdout.write(self.style.WARNING('No matching sensors found, nothing to do.'))
+                return
+
+        self.stdout.write(f'Rebuilding traffic rollups from {start.isoformat()} to {end.isoformat()}...')
+        written = TrafficRollupService().backfill(start, end, sensor_ids=sensor_pks)
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully wrote {written} hourly rollup rows'))
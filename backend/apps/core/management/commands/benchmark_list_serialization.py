@@ -0,0 +1,126 @@
+"""
+Management command to benchmark the fast list serialization path against DRF serializers
+"""
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.core.renderers import FastJSONRenderer
+from apps.core.serializers import ValuesSerializer
+from apps.iot.models import RFIDReader, RFIDLog, Sensor, SensorReading
+from apps.iot.serializers import RFIDLogSerializer, SensorReadingSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare ModelSerializer + JSONRenderer with ValuesSerializer + FastJSONRenderer on IoT list pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000,
+            help='Rows per page (default: 1000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=10,
+            help='Timed runs per path; the best run is reported (default: 10)',
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+
+        # Benchmark rows are created in a transaction that is always rolled back
+        try:
+            with transaction.atomic():
+                self._seed(rows)
+                for label, model, serializer_class in [
+                    ('RFID logs', RFIDLog, RFIDLogSerializer),
+                    ('Sensor readings', SensorReading, SensorReadingSerializer),
+                ]:
+                    self._benchmark(label, model, serializer_class, rows, repeat)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, rows):
+        now = timezone.now()
+        reader = RFIDReader.objects.create(
+            reader_id='BENCHMARK-READER', latitude=Decimal('-1.286389'), longitude=Decimal('36.817223'),
+        )
+        sensor = Sensor.objects.create(
+            sensor_id='BENCHMARK-SENSOR', sensor_type='traffic_flow',
+            latitude=Decimal('-1.286389'), longitude=Decimal('36.817223'),
+        )
+        RFIDLog.objects.bulk_create([
+            RFIDLog(
+                reader=reader,
+                vehicle_tag=f'{i:064x}',
+                timestamp=now - timedelta(seconds=i),
+                latitude=Decimal('-1.286389'),
+                longitude=Decimal('36.817223'),
+                direction='northbound',
+                lane=i % 4 + 1,
+                speed=Decimal('62.50'),
+                vehicle_type='car',
+            )
+            for i in range(rows)
+        ], batch_size=1000)
+        SensorReading.objects.bulk_create([
+            SensorReading(
+                sensor=sensor,
+                timestamp=now - timedelta(seconds=i),
+                reading_type='speed',
+                value={'value': 40 + i % 30 + 0.5, 'lane': i % 4 + 1},
+                unit='km/h',
+                quality_score=Decimal('98.20'),
+            )
+            for i in range(rows)
+        ], batch_size=1000)
+
+    def _benchmark(self, label, model, serializer_class, rows, repeat):
+        queryset = model.objects.select_related(*self._related(model)).order_by('-timestamp', '-id')
+        values_serializer = ValuesSerializer(serializer_class)
+
+        def drf():
+            data = serializer_class(list(queryset[:rows]), many=True).data
+            return JSONRenderer().render(data)
+
+        def fast():
+            data = values_serializer.to_representation(values_serializer.values(queryset)[:rows])
+            context = {'orjson_compatible': values_serializer.is_orjson_compatible(data)}
+            return FastJSONRenderer().render(data, renderer_context=context)
+
+        if drf() != fast():
+            raise CommandError(f'{label}: fast path output differs from the serializer output')
+
+        drf_ms = self._best_of(drf, repeat)
+        fast_ms = self._best_of(fast, repeat)
+        self.stdout.write(
+            f'{label} ({rows} rows): serializer {drf_ms:.1f} ms, fast {fast_ms:.1f} ms, '
+            f'{drf_ms / fast_ms:.1f}x faster'
+        )
+
+    @staticmethod
+    def _related(model):
+        return ['reader'] if model is RFIDLog else ['sensor']
+
+    @staticmethod
+    def _best_of(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings)
@@ -0,0 +1,42 @@
+"""
+Management command to link duplicate reports among historic incidents
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.analytics.services.heatmap_service import HeatmapService
+from apps.incidents.services.duplicate_service import DuplicateDetectionService
+
+
+class Command(BaseCommand):
+    help = 'Detect and link duplicate incident reports in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Only incidents reported in the last N days (default: all incidents)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Incidents updated per bulk_update (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        start = None
+        if options['days']:
+            start = timezone.now() - timedelta(days=options['days'])
+
+        self.stdout.write('Scanning incidents for duplicate reports...')
+        linked, days = DuplicateDetectionService().dedupe(start=start, batch_size=options['batch_size'])
+
+        # Bulk updates bypass the heatmap signals; recount the days that changed
+        if days:
+            HeatmapService().rebuild(min(days), max(days) + timedelta(days=1))
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully linked {linked} duplicate incidents'))
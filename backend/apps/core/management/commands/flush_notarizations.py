@@ -0,0 +1,29 @@
+"""
+Management command to submit queued notarization batches
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.blockchain.relayers import RelayerError
+from apps.blockchain.services.notarization_service import NotarizationService
+
+
+class Command(BaseCommand):
+    help = 'Submit one Merkle root per NOTARIZATION_BATCH_SIZE queued record hashes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Stop after this many transactions',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            submitted = NotarizationService().flush(max_batches=options['max_batches'])
+        except RelayerError as e:
+            raise CommandError(f'Notarization failed: {e}')
+        for blockchain_transaction in submitted:
+            self.stdout.write(f'{blockchain_transaction.transaction_hash}: {blockchain_transaction.item_count} records, '
+                              f'root {blockchain_transaction.payload_hash}')
+        self.stdout.write(self.style.SUCCESS(f'Successfully submitted {len(submitted)} notarization batches'))
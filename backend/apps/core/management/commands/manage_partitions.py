@@ -0,0 +1,57 @@
+"""
+Management command to maintain time partitions of the IoT time-series tables
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.core.partitioning import maintain_partitions
+
+
+class Command(BaseCommand):
+    help = 'Pre-create future partitions and detach or drop expired ones (see IOT_PARTITIONS)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table',
+            action='append',
+            dest='tables',
+            help='Only maintain this table (repeatable; default: all of IOT_PARTITIONS)',
+        )
+        parser.add_argument(
+            '--premake',
+            type=int,
+            default=None,
+            help='Future partitions to keep ready (default: per-table setting)',
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            default=None,
+            help='Drop expired partitions instead of following IOT_PARTITION_EXPIRY_ACTION',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Time partitioning requires PostgreSQL')
+
+        tables = options['tables']
+        unknown = set(tables or []) - set(getattr(settings, 'IOT_PARTITIONS', {}))
+        if unknown:
+            raise CommandError(f"Not configured in IOT_PARTITIONS: {', '.join(sorted(unknown))}")
+
+        with transaction.atomic():
+            report = maintain_partitions(
+                connection, tables=tables, premake=options['premake'], drop=options['drop'],
+            )
+
+        for table in tables or settings.IOT_PARTITIONS:
+            if table not in report:
+                self.stdout.write(self.style.WARNING(f'{table}: not partitioned (run migrations first)'))
+                continue
+            created, expired = report[table]['created'], report[table]['expired']
+            self.stdout.write(f'{table}: {len(created)} partitions ensured, {len(expired)} expired')
+            for name in expired:
+                self.stdout.write(f'  expired {name}')
+
+        self.stdout.write(self.style.SUCCESS('Partition maintenance complete'))
@@ -0,0 +1,43 @@
+"""
+Management command to rebuild incident heatmap cell aggregates from the incidents table
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+
+from apps.analytics.services.heatmap_service import HeatmapService, incident_day
+from apps.incidents.models import Incident
+
+
+class Command(BaseCommand):
+    help = 'Backfill IncidentHeatmapCell (all zoom levels) from Incidents'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Number of days to rebuild, ending today (default: 30)',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Rebuild from the oldest incident onwards',
+        )
+
+    def handle(self, *args, **options):
+        end_day = timezone.localdate() + timedelta(days=1)
+        start_day = end_day - timedelta(days=options['days'])
+        if options['all']:
+            oldest = Incident.objects.aggregate(oldest=Min('timestamp'))['oldest']
+            if oldest is None:
+                self.stdout.write(self.style.WARNING('No incidents found, nothing to do.'))
+                return
+            start_day = incident_day(oldest)
+
+        self.stdout.write(f'Rebuilding incident heatmap cells from {start_day} to {end_day}...')
+        written = HeatmapService().rebuild(start_day, end_day)
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully wrote {written} heatmap cells'))
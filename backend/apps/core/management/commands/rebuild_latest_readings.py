@@ -0,0 +1,32 @@
+"""
+Management command to rebuild the latest-reading-per-sensor store
+"""
+from django.core.management.base import BaseCommand
+
+from apps.iot.models import Sensor
+from apps.iot.services.latest_reading_service import LatestReadingService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild SensorLatestReading from stored sensor readings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sensor-id',
+            action='append',
+            dest='sensor_ids',
+            help='Only rebuild this sensor (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        sensor_pks = None
+        if options['sensor_ids']:
+            sensor_pks = list(
+                Sensor.objects.filter(sensor_id__in=options['sensor_ids']).values_list('pk', flat=True)
+            )
+            if not sensor_pks:
+                self.stdout.write(self.style.WARNING('No matching sensors found, nothing to do.'))
+                return
+
+        stored = LatestReadingService().rebuild(sensor_ids=sensor_pks)
+        self.stdout.write(self.style.SUCCESS(f'Successfully stored latest readings for {stored} sensors'))
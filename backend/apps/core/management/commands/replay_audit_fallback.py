@@ -0,0 +1,102 @@
+"""
+Management command to load audit entries the write-behind buffer could not store
+"""
+import glob
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.audit.models import AuditLog
+from apps.audit.services.audit_buffer import entry_from_json, entry_to_json, store_entries
+from apps.audit.services.audit_chain import AuditChain
+
+# Fields that identify an entry already stored by an earlier, interrupted replay
+IDENTITY_FIELDS = ['timestamp', 'user_id', 'action_type', 'entity_type', 'entity_id', 'user_agent']
+
+
+class Command(BaseCommand):
+    help = 'Append audit entries from the AUDIT_FALLBACK_PATH file to the audit chain'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=None,
+            help='Fallback file to replay (defaults to AUDIT_FALLBACK_PATH)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Entries per INSERT',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.AUDIT_FALLBACK_PATH
+
+        # Files left by an interrupted replay come first; entries they already stored are skipped
+        pending = sorted(glob.glob(f'{glob.escape(path)}.*.replaying'))
+        if os.path.exists(path):
+            # Move the file aside first so entries written meanwhile start a new file
+            replaying = f'{path}.{timezone.now():%Y%m%d%H%M%S%f}.replaying'
+            os.replace(path, replaying)
+            pending.append(replaying)
+        if not pending:
+            self.stdout.write(f'No fallback file at {path}')
+            return
+
+        chain = AuditChain()
+        rejected_path = f'{path}.rejected'
+        totals = {'stored': 0, 'skipped': 0, 'rejected': 0}
+        for replaying in pending:
+            batch = []
+            with open(replaying, encoding='utf-8') as fallback:
+                for line in fallback:
+                    if line.strip():
+                        batch.append(entry_from_json(line))
+                    if len(batch) >= options['batch_size']:
+                        self._store(chain, batch, rejected_path, totals)
+                        batch = []
+            self._store(chain, batch, rejected_path, totals)
+            os.remove(replaying)
+
+        if totals['rejected']:
+            self.stderr.write(f"{totals['rejected']} entries were rejected by the database; see {rejected_path}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully replayed {totals['stored']} audit entries from {path} "
+            f"({totals['skipped']} already stored)"
+        ))
+
+    def _store(self, chain, batch, rejected_path, totals):
+        stored = self._stored_identities(batch)
+        new = [entry for entry in batch if self._identity(entry) not in stored]
+        totals['skipped'] += len(batch) - len(new)
+        if not new:
+            return
+        rejected = store_entries(new, chain)
+        totals['stored'] += len(new) - len(rejected)
+        totals['rejected'] += len(rejected)
+        if rejected:
+            with open(rejected_path, 'a', encoding='utf-8') as rejected_file:
+                for entry in rejected:
+                    rejected_file.write(entry_to_json(entry) + '\n')
+
+    @staticmethod
+    def _identity(entry):
+        # Older fallback files carry millisecond timestamps
+        timestamp = entry['timestamp']
+        identity = [timestamp.replace(microsecond=timestamp.microsecond // 1000 * 1000)]
+        identity += [str(entry.get(field)) if field == 'entity_id' else entry.get(field)
+                     for field in IDENTITY_FIELDS[1:]]
+        return tuple(identity)
+
+    def _stored_identities(self, batch):
+        if not batch:
+            return set()
+        timestamps = [entry['timestamp'] for entry in batch]
+        rows = AuditLog.objects.filter(
+            timestamp__gte=min(timestamps), timestamp__lt=max(timestamps) + timedelta(milliseconds=1),
+        ).values_list(*IDENTITY_FIELDS)
+        return {self._identity(dict(zip(IDENTITY_FIELDS, row))) for row in rows}
@@ -0,0 +1,66 @@
+"""
+Management command to re-score open incidents with the current validation weights
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.incidents.models import Incident, IncidentStatus
+from apps.iot.services.validation_service import IncidentValidationService
+
+
+class Command(BaseCommand):
+    help = 'Re-validate open incidents in bulk (e.g. after changing source weights)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since-days',
+            type=int,
+            default=None,
+            help='Only incidents reported in the last N days (default: all open incidents)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Incidents scored per bulk validation pass (default: 2000)',
+        )
+        parser.add_argument(
+            '--include-closed',
+            action='store_true',
+            help='Also re-validate resolved, closed and false incidents',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        queryset = Incident.objects.only('pk', 'timestamp', 'latitude', 'longitude', 'verification_status')
+        if not options['include_closed']:
+            queryset = queryset.exclude(status__in=[
+                IncidentStatus.RESOLVED, IncidentStatus.CLOSED, IncidentStatus.FALSE,
+            ])
+        if options['since_days']:
+            queryset = queryset.filter(timestamp__gte=timezone.now() - timedelta(days=options['since_days']))
+
+        service = IncidentValidationService()
+        status_counts = {}
+        validated = 0
+        last_pk = 0
+        while True:
+            # Keyset batches so a long run never rescans finished incidents
+            incidents = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+            if not incidents:
+                break
+            results = service.validate_incidents_bulk(incidents)
+            for result in results.values():
+                status = result['validation_status']
+                status_counts[status] = status_counts.get(status, 0) + 1
+            validated += len(incidents)
+            last_pk = incidents[-1].pk
+            self.stdout.write(f'Validated {validated} incidents...')
+
+        summary = ', '.join(f'{status}: {count}' for status, count in sorted(status_counts.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully re-validated {validated} incidents' + (f' ({summary})' if summary else '')
+        ))
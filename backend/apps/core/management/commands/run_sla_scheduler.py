@@ -0,0 +1,30 @@
+"""
+Management command to run the incident SLA scheduler
+"""
+from django.core.management.base import BaseCommand
+
+from apps.incidents.services.sla_service import SLAScheduler
+
+
+class Command(BaseCommand):
+    help = 'Escalate open incidents and notify staff when their SLA deadlines pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Fire the deadlines that are already due and exit',
+        )
+
+    def handle(self, *args, **options):
+        scheduler = SLAScheduler()
+        if options['once']:
+            tracked = scheduler.load()
+            fired = scheduler.run_due()
+            self.stdout.write(self.style.SUCCESS(f'Tracked {tracked} open incidents, made {fired} escalations'))
+            return
+        self.stdout.write(f'SLA scheduler running (resync every {scheduler.resync_seconds}s)')
+        try:
+            scheduler.serve()
+        except KeyboardInterrupt:
+            self.stdout.write('SLA scheduler stopped')
@@ -321,25 +321,28 @@ class Command(BaseCommand):
         validation_sources = ['rfid', 'cctv', 'sensor', 'ai']
         
         for incident in incidents_with_location:
-            # Create validations from different sources
+            # Create validations from different sources; incidents created with validation
+            # enabled already have a record per source from the automatic validation job
             for source in random.sample(validation_sources, random.randint(1, 3)):
-                IncidentValidation.objects.create(
+                IncidentValidation.objects.update_or_create(
                     incident=incident,
                     validation_source=source,
-                    confidence_score=Decimal(random.uniform(65.0, 95.0)).quantize(Decimal('0.01')),
-                    validation_status=random.choice(['pending', 'confirmed', 'confirmed', 'contradicted']),
-                    source_data={
-                        'source': source,
-                        'timestamp': incident.timestamp.isoformat(),
-                        'location': {
-                            'lat': float(incident.latitude),
-                            'lng': float(incident.longitude),
+                    defaults={
+                        'confidence_score': Decimal(random.uniform(65.0, 95.0)).quantize(Decimal('0.01')),
+                        'validation_status': random.choice(['pending', 'confirmed', 'confirmed', 'contradicted']),
+                        'source_data': {
+                            'source': source,
+                            'timestamp': incident.timestamp.isoformat(),
+                            'location': {
+                                'lat': float(incident.latitude),
+                                'lng': float(incident.longitude),
+                            },
+                        },
+                        'correlation_details': {
+                            'match_score': random.uniform(70.0, 95.0),
+                            'time_diff_seconds': random.randint(0, 300),
+                            'distance_meters': random.randint(0, 500),
                         },
-                    },
-                    correlation_details={
-                        'match_score': random.uniform(70.0, 95.0),
-                        'time_diff_seconds': random.randint(0, 300),
-                        'distance_meters': random.randint(0, 500),
                     },
                 )
         
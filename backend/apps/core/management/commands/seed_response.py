@@ -6,9 +6,10 @@ from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
 from apps.response.models import (
-    IncidentAssignment, ResponseMilestone, ResponderLocation,
+    IncidentAssignment, ResponseMilestone,
     MilestoneType, AssignmentStatus
 )
+from apps.response.services.location_service import ResponderLocationService
 from apps.incidents.models import Incident, IncidentStatus
 from apps.users.models import User, UserRole
 import random
@@ -109,18 +110,20 @@ class Command(BaseCommand):
                         created_milestones += 1
                         
                         # Create responder location tracking
-                        for loc_count in range(random.randint(2, 5)):
-                            ResponderLocation.objects.create(
-                                responder=responder,
-                                latitude=incident.latitude + Decimal(str(random.uniform(-0.05, 0.05))),
-                                longitude=incident.longitude + Decimal(str(random.uniform(-0.05, 0.05))),
-                                timestamp=milestone_time - timedelta(minutes=loc_count * 5),
-                                accuracy=Decimal(random.uniform(5.0, 50.0)).quantize(Decimal('0.01')),
-                                speed=Decimal(random.uniform(0.0, 80.0)).quantize(Decimal('0.01')) if milestone_type != 'on_scene' else Decimal(0),
-                                heading=Decimal(random.uniform(0.0, 360.0)).quantize(Decimal('0.01')),
-                                is_active=milestone_type != 'cleared',
-                            )
-                            created_locations += 1
+                        pings = [
+                            {
+                                'latitude': (incident.latitude + Decimal(str(random.uniform(-0.05, 0.05)))).quantize(Decimal('0.000001')),
+                                'longitude': (incident.longitude + Decimal(str(random.uniform(-0.05, 0.05)))).quantize(Decimal('0.000001')),
+                                'timestamp': milestone_time - timedelta(minutes=loc_count * 5),
+                                'accuracy': Decimal(random.uniform(5.0, 50.0)).quantize(Decimal('0.01')),
+                                'speed': Decimal(random.uniform(0.0, 80.0)).quantize(Decimal('0.01')) if milestone_type != 'on_scene' else Decimal(0),
+                                'heading': Decimal(random.uniform(0.0, 360.0)).quantize(Decimal('0.01')),
+                            }
+                            for loc_count in range(random.randint(2, 5))
+                        ]
+                        created_locations += ResponderLocationService().record(
+                            responder.pk, pings, is_active=milestone_type != 'cleared',
+                        )['tracked']
                 
                 # Update incident status if assignments are active
                 if assignment.status == AssignmentStatus.IN_PROGRESS:
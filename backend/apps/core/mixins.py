@@ -0,0 +1,54 @@
+"""
+Shared viewset mixins
+"""
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .renderers import FastJSONRenderer
+from .serializers import ValuesSerializer
+
+
+class FastListMixin:
+    """
+    Opt-in lightweight list serialization for read-only, high-volume viewsets.
+
+    Enabled per request with ?fast=1 (or for every request with FAST_LIST_SERIALIZATION).
+    Rows are read with `.values()`, mapped through ValuesSerializer and rendered with
+    FastJSONRenderer; the response body is the same as the regular list response.
+    """
+    fast_list_query_param = 'fast'
+
+    def use_fast_list(self):
+        requested = self.request.query_params.get(self.fast_list_query_param)
+        if requested is not None:
+            return requested.lower() in ('1', 'true', 'yes')
+        return getattr(settings, 'FAST_LIST_SERIALIZATION', False)
+
+    def get_values_serializer(self):
+        cls = type(self)
+        if '_values_serializer' not in cls.__dict__:
+            cls._values_serializer = ValuesSerializer(self.get_serializer_class())
+        return cls._values_serializer
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_list():
+            return super().list(request, *args, **kwargs)
+
+        if type(request.accepted_renderer) is JSONRenderer:
+            request.accepted_renderer = FastJSONRenderer()
+
+        values_serializer = self.get_values_serializer()
+        rows = values_serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        data = values_serializer.to_representation(rows if page is None else page)
+        self.orjson_compatible = values_serializer.is_orjson_compatible(data)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+    
+    def get_renderer_context(self):
+        context = super().get_renderer_context()
+        if getattr(self, 'orjson_compatible', None) is not None:
+            context['orjson_compatible'] = self.orjson_compatible
+        return context
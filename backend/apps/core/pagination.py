@@ -0,0 +1,125 @@
+"""
+Keyset pagination for append-only time-series endpoints
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class TimeKeysetPagination(BasePagination):
+    """
+    Newest-first pagination on (timestamp, id) with opaque cursors.
+
+    Each page is fetched with `WHERE (timestamp, id) < (last_timestamp, last_id)`
+    ordered by the same pair, so there is no COUNT(*) and no OFFSET scan: page 5000
+    costs the same as page one. The ordering is fixed; ?ordering= is ignored.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    time_field = 'timestamp'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        self.reverse = cursor is not None and cursor['direction'] == 'previous'
+
+        ordering = (self.time_field, 'pk') if self.reverse else (f'-{self.time_field}', '-pk')
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self._after(cursor['timestamp'], cursor['pk']))
+
+        # One extra row tells us whether there is another page in this direction
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        self.page = rows
+        if self.reverse:
+            self.has_next = bool(rows)
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None and bool(rows)
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE or 20
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._link(self.page[-1], 'next')
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self._link(self.page[0], 'previous')
+
+    def _after(self, timestamp, pk):
+        """Rows strictly past the cursor position in the current direction"""
+        op = 'gt' if self.reverse else 'lt'
+        return (
+            Q(**{f'{self.time_field}__{op}': timestamp})
+            | Q(**{self.time_field: timestamp, f'pk__{op}': pk})
+        )
+
+    def _link(self, row, direction):
+        # Rows are model instances, or dicts when paginating a .values() queryset
+        if isinstance(row, dict):
+            timestamp, pk = row[self.time_field], row['id']
+        else:
+            timestamp, pk = getattr(row, self.time_field), row.pk
+        token = json.dumps([timestamp.isoformat(), pk, direction])
+        cursor = base64.urlsafe_b64encode(token.encode('utf-8')).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            timestamp, pk, direction = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            timestamp = datetime.fromisoformat(timestamp)
+            if direction not in ('next', 'previous') or not isinstance(pk, int):
+                raise ValueError(direction)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return {'timestamp': timestamp, 'pk': pk, 'direction': direction}
+
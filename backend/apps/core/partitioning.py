@@ -0,0 +1,290 @@
+"""
+Native PostgreSQL range partitioning for append-only time-series tables
+Partitions are named <table>_pYYYYMMDD after the (UTC) start of the period they hold;
+<table>_default holds rows no range covers yet
+"""
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+
+INTERVALS = {
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+}
+
+_BOUND_RE = re.compile(r"FROM \((?P<lower>MINVALUE|'[^']+')\) TO \((?P<upper>MAXVALUE|'[^']+')\)")
+
+
+def partition_config(table):
+    """Settings for a partitioned table: interval, premake (periods ahead) and retention_days"""
+    config = {'interval': 'day', 'premake': 7, 'retention_days': None}
+    config.update(getattr(settings, 'IOT_PARTITIONS', {}).get(table, {}))
+    if config['interval'] not in INTERVALS:
+        raise ValueError(f"Unsupported partition interval for {table}: {config['interval']}")
+    return config
+
+
+def period_start(moment, interval):
+    """UTC start of the day/week (weeks start on Monday) containing moment"""
+    moment = moment.astimezone(dt_timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == 'week':
+        moment -= timedelta(days=moment.weekday())
+    return moment
+
+
+def partition_name(table, start):
+    return f'{table}_p{start:%Y%m%d}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def ensure_default_partition(cursor, table):
+    """
+    Catch-all partition for rows outside every range (device clocks running ahead, days
+    without maintenance), so one such row never fails a whole insert batch.
+    create_partitions moves these rows out once their range exists.
+    """
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {_quote(default_partition_name(table))} PARTITION OF {_quote(table)} DEFAULT'
+    )
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        """
+        SELECT 1 FROM pg_partitioned_table p
+        JOIN pg_class c ON c.oid = p.partrelid
+        WHERE c.relname = %s AND pg_table_is_visible(c.oid)
+        """,
+        [table],
+    )
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor, table):
+    """
+    Attached partitions as (name, lower, upper) ordered by lower bound.
+    Bounds are aware datetimes; None stands for MINVALUE/MAXVALUE.
+    """
+    cursor.execute(
+        """
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)
+        """,
+        [table],
+    )
+    partitions = []
+    for name, bound in cursor.fetchall():
+        match = _BOUND_RE.search(bound)
+        if not match:
+            # DEFAULT partition
+            continue
+        partitions.append((name, _parse_bound(match['lower']), _parse_bound(match['upper'])))
+    partitions.sort(key=lambda partition: partition[1] or datetime.min.replace(tzinfo=dt_timezone.utc))
+    return partitions
+
+
+def _parse_bound(value):
+    if value in ('MINVALUE', 'MAXVALUE'):
+        return None
+    return datetime.fromisoformat(value.strip("'")).astimezone(dt_timezone.utc)
+
+
+def create_partitions(cursor, table, now, periods, column='timestamp'):
+    """
+    Ensure partitions exist from the period containing now through `periods` periods ahead.
+    Rows already sitting in the DEFAULT partition for a new range are moved into it.
+    Returns the names of partitions created.
+    """
+    interval = partition_config(table)['interval']
+    default = default_partition_name(table)
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [default])
+    has_default = cursor.fetchone()[0]
+    covered_until = max(
+        (upper for _, _, upper in list_partitions(cursor, table) if upper is not None),
+        default=None,
+    )
+    start = period_start(now, interval)
+    if covered_until is not None and covered_until > start:
+        start = covered_until
+    last = period_start(now, interval) + INTERVALS[interval] * (periods + 1)
+
+    created = []
+    while start < last:
+        end = period_start(start + INTERVALS[interval], interval)
+        name = partition_name(table, start)
+        if has_default and _default_has_rows(cursor, default, column, start, end):
+            _split_from_default(cursor, table, default, name, column, start, end)
+        else:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {_quote(name)} PARTITION OF {_quote(table)} '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [start, end],
+            )
+        created.append(name)
+        start = end
+    return created
+
+
+def _default_has_rows(cursor, default, column, start, end):
+    cursor.execute(
+        f'SELECT 1 FROM {_quote(default)} WHERE {_quote(column)} >= %s AND {_quote(column)} < %s LIMIT 1',
+        [start, end],
+    )
+    return cursor.fetchone() is not None
+
+
+def _split_from_default(cursor, table, default, name, column, start, end):
+    # A range overlapping rows in DEFAULT cannot be created in place: fill a standalone
+    # table with those rows, then attach it (PostgreSQL builds its indexes and keys)
+    cursor.execute(
+        f'CREATE TABLE {_quote(name)} (LIKE {_quote(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+    )
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM {_quote(default)} '
+        f'WHERE {_quote(column)} >= %s AND {_quote(column)} < %s RETURNING *) '
+        f'INSERT INTO {_quote(name)} SELECT * FROM moved',
+        [start, end],
+    )
+    cursor.execute(
+        f'ALTER TABLE {_quote(table)} ATTACH PARTITION {_quote(name)} FOR VALUES FROM (%s) TO (%s)',
+        [start, end],
+    )
+
+
+def expire_partitions(cursor, table, cutoff, drop=False):
+    """
+    Detach (and optionally drop) partitions holding only rows older than cutoff.
+    Returns the names of partitions expired.
+    """
+    expired = []
+    for name, _, upper in list_partitions(cursor, table):
+        if upper is None or upper > cutoff:
+            continue
+        cursor.execute(f'ALTER TABLE {_quote(table)} DETACH PARTITION {_quote(name)}')
+        if drop:
+            cursor.execute(f'DROP TABLE {_quote(name)}')
+        expired.append(name)
+    return expired
+
+
+def maintain_partitions(connection, tables=None, now=None, premake=None, drop=None):
+    """
+    Pre-create upcoming partitions and expire those past retention for configured tables.
+    Returns {table: {'created': [...], 'expired': [...]}}; unpartitioned tables are skipped.
+    """
+    if connection.vendor != 'postgresql':
+        return {}
+    now = now or datetime.now(dt_timezone.utc)
+    if drop is None:
+        drop = getattr(settings, 'IOT_PARTITION_EXPIRY_ACTION', 'detach') == 'drop'
+
+    report = {}
+    with connection.cursor() as cursor:
+        for table in tables or getattr(settings, 'IOT_PARTITIONS', {}):
+            if not is_partitioned(cursor, table):
+                continue
+            config = partition_config(table)
+            ensure_default_partition(cursor, table)
+            created = create_partitions(cursor, table, now, config['premake'] if premake is None else premake)
+            expired = []
+            if config['retention_days']:
+                expired = expire_partitions(cursor, table, now - timedelta(days=config['retention_days']), drop)
+            report[table] = {'created': created, 'expired': expired}
+    return report
+
+
+def convert_to_partitioned(cursor, table, column, interval, now):
+    """
+    Turn an existing table into a range-partitioned table on `column`.
+
+    The existing table is renamed to <table>_legacy and attached as the partition for
+    everything up to the end of the current period, so no rows are copied; a DEFAULT
+    partition takes rows beyond the pre-created ranges. The parent
+    keeps the original index and constraint names so later Django migrations still
+    apply; its primary key becomes (id, column) as PostgreSQL requires, and ids keep
+    coming from a shared sequence.
+    """
+    legacy = f'{table}_legacy'
+    cursor.execute(
+        """
+        SELECT ic.relname, con.conname, pg_get_indexdef(ix.indexrelid), ix.indisprimary
+        FROM pg_index ix
+        JOIN pg_class ic ON ic.oid = ix.indexrelid
+        LEFT JOIN pg_constraint con ON con.conindid = ix.indexrelid AND con.conrelid = ix.indrelid
+        WHERE ix.indrelid = %s::regclass
+        """,
+        [table],
+    )
+    indexes = cursor.fetchall()
+
+    # Free the table, index and constraint names for the parent
+    cursor.execute(f'ALTER TABLE {_quote(table)} RENAME TO {_quote(legacy)}')
+    for index_name, constraint_name, _, _ in indexes:
+        if constraint_name:
+            cursor.execute(
+                f'ALTER TABLE {_quote(legacy)} RENAME CONSTRAINT {_quote(constraint_name)} '
+                f'TO {_quote(_legacy_name(constraint_name))}'
+            )
+        else:
+            cursor.execute(f'ALTER INDEX {_quote(index_name)} RENAME TO {_quote(_legacy_name(index_name))}')
+
+    cursor.execute(
+        f'CREATE TABLE {_quote(table)} (LIKE {_quote(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f'PARTITION BY RANGE ({_quote(column)})'
+    )
+
+    # Identity columns cannot span partitions on older PostgreSQL; share a sequence instead
+    sequence = f'{table}_id_seq'
+    cursor.execute(f'ALTER TABLE {_quote(legacy)} ALTER COLUMN id DROP IDENTITY IF EXISTS')
+    cursor.execute(f'ALTER TABLE {_quote(legacy)} ALTER COLUMN id DROP DEFAULT')
+    cursor.execute(f'DROP SEQUENCE IF EXISTS {_quote(sequence)}')
+    cursor.execute(f'CREATE SEQUENCE {_quote(sequence)} OWNED BY {_quote(table)}.id')
+    cursor.execute(f'SELECT setval(%s, COALESCE(MAX(id), 0) + 1, false) FROM {_quote(legacy)}', [sequence])
+    cursor.execute(f"ALTER TABLE {_quote(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+
+    # Same definitions (the name now resolves to the parent); ATTACH reuses the legacy indexes
+    for index_name, constraint_name, definition, primary in indexes:
+        if primary:
+            cursor.execute(
+                f'ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(constraint_name)} '
+                f'PRIMARY KEY (id, {_quote(column)})'
+            )
+        elif not constraint_name:
+            cursor.execute(definition)
+
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f'
+        """,
+        [legacy],
+    )
+    for constraint_name, definition in cursor.fetchall():
+        cursor.execute(f'ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(constraint_name)} {definition}')
+
+    # The legacy table holds everything up to the end of the period with the newest row
+    cursor.execute(f'SELECT MAX({_quote(column)}) FROM {_quote(legacy)}')
+    newest = max(filter(None, [cursor.fetchone()[0], now]))
+    boundary = period_start(newest, interval) + INTERVALS[interval]
+    cursor.execute(
+        f'ALTER TABLE {_quote(table)} ATTACH PARTITION {_quote(legacy)} FOR VALUES FROM (MINVALUE) TO (%s)',
+        [boundary],
+    )
+    ensure_default_partition(cursor, table)
+    return boundary
+
+
+def _legacy_name(name):
+    return f'{name[:55]}_legacy'
+
+
+def _quote(name):
+    return '"%s"' % name.replace('"', '""')
+
@@ -0,0 +1,57 @@
+"""
+Shared API renderers
+"""
+import math
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; falls back to the standard encoder
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    Output is byte-identical to JSONRenderer with the default compact settings.
+    Payloads orjson would format differently (floats in exponent notation,
+    non-finite floats, big integers, non-string keys) and indented output fall back
+    to the standard encoder.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Views that already checked their payload pass orjson_compatible in the renderer context
+        compatible = renderer_context.get('orjson_compatible')
+        if compatible is None:
+            compatible = orjson_compatible(data)
+        if not self.compact or self.ensure_ascii or not compatible:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same escaping JSONRenderer applies for JavaScript compatibility
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def orjson_compatible(value):
+    """True when orjson encodes value exactly as json.dumps would"""
+    value_type = type(value)
+    if value_type is str or value_type is bool or value is None:
+        return True
+    if value_type is int:
+        return -(1 << 63) <= value < (1 << 64)
+    if value_type is float:
+        # repr() switches to exponent notation outside [1e-4, 1e16); orjson spells those differently
+        return math.isfinite(value) and (value == 0 or 1e-4 <= abs(value) < 1e16)
+    if value_type is dict:
+        return all(type(key) is str and orjson_compatible(item) for key, item in value.items())
+    if value_type is list:
+        return all(orjson_compatible(item) for item in value)
+    # Decimal, datetime, lazy strings, ...: let the DRF encoder handle them
+    return False
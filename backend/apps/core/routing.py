@@ -0,0 +1,11 @@
+"""
+WebSocket URL routing
+"""
+from django.urls import path
+
+from .consumers import EventStreamConsumer, NotificationConsumer
+
+websocket_urlpatterns = [
+    path('ws/events/', EventStreamConsumer.as_asgi()),
+    path('ws/notifications/', NotificationConsumer.as_asgi()),
+]
@@ -0,0 +1,112 @@
+"""
+Lightweight read-only serialization for high-volume list endpoints
+"""
+from datetime import datetime
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework import ISO_8601
+from rest_framework import fields as drf_fields
+from rest_framework.serializers import ModelSerializer
+from rest_framework.settings import api_settings
+
+from .renderers import orjson_compatible
+
+# to_representation implementations that return DB values of the given type unchanged
+_PASSTHROUGH = {
+    drf_fields.CharField.to_representation: str,
+    drf_fields.IntegerField.to_representation: int,
+    drf_fields.BooleanField.to_representation: bool,
+}
+
+
+class ValuesSerializer:
+    """
+    Serialize `.values()` rows with the field set of a ModelSerializer.
+
+    The serializer's fields are built once and applied column by column, so the output
+    matches `serializer_class(many=True).data` without constructing a serializer (or a
+    model instance) per row. Common column types take a shortcut that produces the same
+    representation; anything else goes through the field's own to_representation.
+    Only flat `source` paths are supported (`reader.reader_id` reads `reader__reader_id`).
+    """
+
+    def __init__(self, serializer_class):
+        if not issubclass(serializer_class, ModelSerializer):
+            raise TypeError(f'{serializer_class.__name__} is not a ModelSerializer')
+        self.serializer_class = serializer_class
+        self.fields = []
+        for field in serializer_class()._readable_fields:
+            if field.source == '*':
+                raise ValueError(f'{serializer_class.__name__}.{field.field_name} cannot be read from .values()')
+            self.fields.append((field.field_name, '__'.join(field.source_attrs), field))
+        self.lookups = [lookup for _, lookup, _ in self.fields]
+
+    def values(self, queryset):
+        """Queryset of dicts keyed by lookup; paginate this before calling to_representation"""
+        return queryset.values(*self.lookups)
+
+    def to_representation(self, rows):
+        columns = [(name, lookup, self._converter(field)) for name, lookup, field in self.fields]
+        data = []
+        append = data.append
+        for row in rows:
+            item = {}
+            for name, lookup, convert in columns:
+                value = row[lookup]
+                item[name] = value if value is None or convert is None else convert(value)
+            append(item)
+        return data
+
+    def is_orjson_compatible(self, data):
+        """Check only the columns whose representation is not a plain string/int/bool"""
+        names = [name for name, _, field in self.fields if not self._has_plain_output(field)]
+        return all(orjson_compatible(item[name]) for item in data for name in names)
+
+    @staticmethod
+    def _has_plain_output(field):
+        represent = type(field).to_representation
+        return represent in _PASSTHROUGH or isinstance(field, (drf_fields.DateTimeField, drf_fields.DecimalField))
+
+    @staticmethod
+    def _converter(field):
+        """None when the DB value can be emitted as-is, otherwise a value -> representation callable"""
+        represent = type(field).to_representation
+        to_representation = field.to_representation
+
+        expected_type = _PASSTHROUGH.get(represent)
+        if expected_type is not None:
+            return lambda value: value if type(value) is expected_type else to_representation(value)
+
+        if represent is drf_fields.JSONField.to_representation and not field.binary:
+            return None
+
+        if represent is drf_fields.DateTimeField.to_representation:
+            if getattr(field, 'format', api_settings.DATETIME_FORMAT) not in (ISO_8601, 'iso-8601'):
+                return to_representation
+            # Resolve the output timezone once per page rather than once per row
+            field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+            if field_timezone is None:
+                return to_representation
+
+            def convert_datetime(value):
+                if type(value) is not datetime or timezone.is_naive(value):
+                    return to_representation(value)
+                value = value.astimezone(field_timezone).isoformat()
+                return value[:-6] + 'Z' if value.endswith('+00:00') else value
+            return convert_datetime
+
+        if (represent is drf_fields.DecimalField.to_representation
+                and getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+                and not field.localize and not getattr(field, 'normalize_output', False)
+                and field.decimal_places is not None):
+            exponent = -field.decimal_places
+
+            def convert_decimal(value):
+                # Database decimals already carry the column scale; quantizing would be a no-op
+                if type(value) is Decimal and value.as_tuple().exponent == exponent:
+                    return format(value, 'f')
+                return to_representation(value)
+            return convert_decimal
+
+        return to_representation
@@ -0,0 +1,58 @@
+"""
+Test helpers for catching N+1 query regressions on list endpoints
+"""
+from contextlib import contextmanager
+from unittest import mock
+
+from django.conf import settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.pagination import PageNumberPagination
+
+
+@contextmanager
+def page_size(size):
+    """Force the page size of both PageNumberPagination and the keyset paginators"""
+    rest_framework = {**getattr(settings, 'REST_FRAMEWORK', {}), 'PAGE_SIZE': size}
+    with override_settings(REST_FRAMEWORK=rest_framework), \
+            mock.patch.object(PageNumberPagination, 'page_size', size):
+        yield
+
+
+def list_query_counts(client, url, page_sizes=(1, 10, 50), using='default'):
+    """
+    GET a list endpoint at each page size.
+    Returns {page_size: (rows_returned, queries_executed)}.
+    """
+    counts = {}
+    for size in page_sizes:
+        with page_size(size), CaptureQueriesContext(connections[using]) as queries:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise AssertionError(f'GET {url} returned {response.status_code}: {response.content[:200]!r}')
+        data = response.json()
+        rows = data['results'] if isinstance(data, dict) and 'results' in data else data
+        counts[size] = (len(rows), len(queries))
+    return counts
+
+
+def assert_list_queries_constant(client, url, page_sizes=(1, 10, 50), max_queries=None, using='default'):
+    """
+    Assert a list endpoint runs the same number of queries regardless of page size.
+
+    The fixture data must fill the largest page; otherwise a per-row query would
+    go unnoticed. Optionally cap the count with max_queries.
+    """
+    counts = list_query_counts(client, url, page_sizes, using)
+    largest = max(page_sizes)
+    if counts[largest][0] < largest:
+        raise AssertionError(
+            f'GET {url} returned {counts[largest][0]} rows; create at least {largest} to check for N+1 queries'
+        )
+
+    query_counts = {size: queries for size, (_, queries) in counts.items()}
+    if len(set(query_counts.values())) != 1:
+        raise AssertionError(f'GET {url} query count grows with page size: {query_counts}')
+    if max_queries is not None and query_counts[largest] > max_queries:
+        raise AssertionError(f'GET {url} ran {query_counts[largest]} queries (expected at most {max_queries})')
+    return query_counts[largest]
@@ -0,0 +1,324 @@
+"""
+Core tests
+"""
+import csv
+import io
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.incidents.models import Incident, IncidentSeverity, IncidentStatus, IncidentType
+from apps.iot.models import RFIDLog, RFIDReader
+from apps.iot.views import RFIDLogViewSet
+from apps.notifications.transports import user_group
+from apps.response.models import AssignmentStatus, IncidentAssignment
+from apps.response.services.location_service import ResponderLocationService
+from apps.users.models import User
+from .events import region_for, region_group, regions_in_bbox
+from .exports import pa, pq
+from .routing import websocket_urlpatterns
+
+RFID_EXPORT_COLUMNS = [name for name, _ in RFIDLogViewSet.export_fields]
+
+
+class ExportTests(TestCase):
+    """Analyst exports stream the export_fields columns in every format"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.analyst = User.objects.create_user(
+            username='analyst', email='analyst@example.com', password=None, role='analyst',
+        )
+        cls.dispatcher = User.objects.create_user(
+            username='dispatcher', email='dispatcher@example.com', password=None, role='dispatcher',
+        )
+        reader = RFIDReader.objects.create(
+            reader_id='RFID-1', latitude=Decimal('-1.286389'), longitude=Decimal('36.817223'),
+        )
+        now = timezone.now()
+        RFIDLog.objects.bulk_create([
+            RFIDLog(reader=reader, vehicle_tag=f'tag-{n}', timestamp=now - timedelta(minutes=n),
+                    speed=Decimal('48.50') if n % 2 else None, lane=n % 3 or None,
+                    latitude=None if n % 2 else Decimal('-1.300000'), longitude=None if n % 2 else Decimal('36.9'))
+            for n in range(5)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.analyst)
+        # Several batches per export
+        patcher = mock.patch.object(RFIDLogViewSet, 'export_chunk_size', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def export(self, url, export_format):
+        response = self.client.get(url, {'export_format': export_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_export_requires_analyst_role(self):
+        self.client.force_authenticate(self.dispatcher)
+        self.assertEqual(self.client.get('/api/iot/rfid/logs/export/').status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/iot/rfid/logs/export/').status_code, 401)
+
+    def test_unknown_format_is_rejected(self):
+        self.assertEqual(self.client.get('/api/iot/rfid/logs/export/', {'export_format': 'xlsx'}).status_code, 400)
+
+    def test_csv_export(self):
+        rows = list(csv.reader(io.StringIO(self.export('/api/iot/rfid/logs/export/', 'csv').decode())))
+
+        self.assertEqual(rows[0], RFID_EXPORT_COLUMNS)
+        self.assertEqual(len(rows), 6)
+        exported = {row[2]: dict(zip(rows[0], row)) for row in rows[1:]}
+        self.assertEqual(exported['tag-1']['reader_id'], 'RFID-1')
+        self.assertEqual((exported['tag-1']['speed'], exported['tag-1']['latitude']), ('48.50', ''))
+        self.assertEqual((exported['tag-0']['speed'], exported['tag-0']['latitude']), ('', '-1.300000'))
+
+    @skipIf(pa is None, 'pyarrow is not installed')
+    def test_parquet_export(self):
+        table = pq.read_table(io.BytesIO(self.export('/api/iot/rfid/logs/export/', 'parquet')))
+        self.assertEqual(table.column_names, RFID_EXPORT_COLUMNS)
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(sorted(table.column('speed').to_pylist(), key=str),
+                         [Decimal('48.50'), Decimal('48.50'), None, None, None])
+
+    @skipIf(pa is None, 'pyarrow is not installed')
+    def test_arrow_export(self):
+        table = pa.ipc.open_stream(self.export('/api/iot/rfid/logs/export/', 'arrow')).read_all()
+        self.assertEqual(table.column_names, RFID_EXPORT_COLUMNS)
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(set(table.column('reader_id').to_pylist()), {'RFID-1'})
+
+    @override_settings(INCIDENT_DUPLICATE_DETECTION=False)
+    def test_incident_export_leaves_out_the_reporter(self):
+        reporter = User.objects.create_user(
+            username='reporter-jane', email='jane.reporter@example.com', password=None, role='road_user_registered',
+        )
+        Incident.objects.create(
+            incident_id='INC-00001', reporter=reporter,
+            incident_type=IncidentType.objects.create(name='Collision', category='accident'),
+            severity=IncidentSeverity.objects.create(
+                level='P2', name='High', description='High severity', response_time_target_minutes=15,
+                escalation_time_minutes=30, priority_score=3,
+            ),
+            description='Two vehicles collided at the junction', latitude=Decimal('-1.28'),
+            longitude=Decimal('36.82'), timestamp=timezone.now(),
+        )
+
+        body = self.export('/api/incidents/export/', 'csv').decode()
+        header, row = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(row[0], 'INC-00001')
+        self.assertFalse([column for column in header if 'reporter' in column or 'anonymous' in column])
+        for identity in (reporter.username, reporter.email):
+            self.assertNotIn(identity, row)
+
+
+# The JWT/session middleware is left out: tests put the user in the scope themselves
+websocket_application = URLRouter(websocket_urlpatterns)
+
+NAIROBI = {'latitude': Decimal('-1.28'), 'longitude': Decimal('36.82')}
+MOMBASA = {'latitude': Decimal('-4.05'), 'longitude': Decimal('39.67')}
+
+
+async def connect(path, user):
+    communicator = WebsocketCommunicator(websocket_application, path)
+    communicator.scope['user'] = user
+    connected, code = await communicator.connect()
+    return communicator, connected, code
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    INCIDENT_DUPLICATE_DETECTION=False,
+)
+class EventStreamConsumerTests(TestCase):
+    """Live events reach the sockets subscribed to their region and no others"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dispatcher = User.objects.create_user(
+            username='dispatcher', email='dispatcher@example.com', password=None, role='dispatcher',
+        )
+        cls.road_user = User.objects.create_user(
+            username='road-user', email='road-user@example.com', password=None, role='road_user_registered',
+        )
+        cls.responder = User.objects.create_user(
+            username='ems', email='ems@example.com', password=None, role='ems',
+        )
+        cls.incident_type = IncidentType.objects.create(name='Collision', category='accident')
+        cls.severity = IncidentSeverity.objects.create(
+            level='P2', name='High', description='High severity', response_time_target_minutes=15,
+            escalation_time_minutes=30, priority_score=3,
+        )
+        cls.region = region_for(**NAIROBI)
+        cls.other_region = region_for(**MOMBASA)
+
+    def setUp(self):
+        self.channel_layer = get_channel_layer()
+        # Queues are bound to the event loop of the test that created them
+        async_to_sync(self.channel_layer.flush)()
+
+    def subscriber_count(self, region):
+        return len(self.channel_layer.groups.get(region_group(region), ()))
+
+    async def subscribe(self, communicator, **message):
+        await communicator.send_json_to({'action': 'subscribe', **message})
+        return await communicator.receive_json_from()
+
+    async def open_sockets(self):
+        """Sockets subscribed to the incident's region, another region and every region"""
+        sockets = []
+        for region in (self.region, self.other_region, '*'):
+            communicator, connected, _ = await connect(f'/ws/events/?regions={region}', self.dispatcher)
+            self.assertTrue(connected)
+            await communicator.receive_json_from()
+            sockets.append(communicator)
+        return sockets
+
+    async def assert_delivered(self, sockets, event):
+        here, elsewhere, everywhere = sockets
+        for communicator in (here, everywhere):
+            message = await communicator.receive_json_from()
+            self.assertEqual((message['type'], message['event'], message['region']), ('event', event, self.region))
+            self.assertTrue(await communicator.receive_nothing())
+        self.assertTrue(await elsewhere.receive_nothing())
+        return message['data']
+
+    async def close(self, sockets):
+        for communicator in sockets:
+            await communicator.disconnect()
+
+    def create_incident(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Incident.objects.create(
+                incident_id='INC-00001', incident_type=self.incident_type, severity=self.severity,
+                description='Two vehicles collided at the junction', timestamp=timezone.now(), **NAIROBI,
+            )
+
+    def save(self, instance, **fields):
+        for name, value in fields.items():
+            setattr(instance, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save()
+
+    def create_assignment(self, incident):
+        with self.captureOnCommitCallbacks(execute=True):
+            return IncidentAssignment.objects.create(incident=incident, assigned_to=self.responder)
+
+    def record_location(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ResponderLocationService().record(self.responder.pk, [{**NAIROBI, 'accuracy': 5}])
+
+    async def test_connect_requires_an_operations_role(self):
+        for user in (AnonymousUser(), self.road_user):
+            communicator, connected, code = await connect('/ws/events/', user)
+            self.assertFalse(connected)
+            self.assertEqual(code, 4403)
+
+    async def test_subscribe_bbox_and_unsubscribe(self):
+        communicator, connected, _ = await connect('/ws/events/', self.dispatcher)
+        self.assertTrue(connected)
+
+        message = await self.subscribe(communicator, regions=[self.region.upper()])
+        self.assertEqual(message, {'type': 'subscribed', 'regions': [self.region]})
+        self.assertEqual(self.subscriber_count(self.region), 1)
+
+        bbox_regions = regions_in_bbox(-1.4, 36.7, -1.2, 36.9)
+        message = await self.subscribe(communicator, bbox=[-1.4, 36.7, -1.2, 36.9])
+        self.assertEqual(message['regions'], sorted(bbox_regions | {self.region}))
+        for region in bbox_regions:
+            self.assertEqual(self.subscriber_count(region), 1)
+
+        await communicator.send_json_to({'action': 'unsubscribe', 'regions': sorted(bbox_regions)})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'subscribed', 'regions': []})
+        for region in bbox_regions:
+            self.assertEqual(self.subscriber_count(region), 0)
+
+        message = await self.subscribe(communicator, regions=['not a region'])
+        self.assertEqual(message['type'], 'error')
+        await communicator.disconnect()
+
+    async def test_all_regions_replaces_region_subscriptions(self):
+        communicator, _, _ = await connect(f'/ws/events/?regions={self.region},{self.other_region}', self.dispatcher)
+        self.assertEqual((await communicator.receive_json_from())['regions'], sorted([self.region, self.other_region]))
+
+        self.assertEqual(await self.subscribe(communicator, regions=['*']), {'type': 'subscribed', 'regions': ['*']})
+        self.assertEqual(self.subscriber_count(self.region), 0)
+        self.assertEqual(self.subscriber_count('*'), 1)
+        await communicator.disconnect()
+        self.assertEqual(self.subscriber_count('*'), 0)
+
+    async def test_incident_events(self):
+        sockets = await self.open_sockets()
+        incident = await sync_to_async(self.create_incident)()
+        data = await self.assert_delivered(sockets, 'incident.created')
+        self.assertEqual((data['incident_id'], data['latitude']), ('INC-00001', float(NAIROBI['latitude'])))
+
+        await sync_to_async(self.save)(incident, status=IncidentStatus.RESOLVED)
+        data = await self.assert_delivered(sockets, 'incident.status_changed')
+        self.assertEqual((data['status'], data['previous_status']), (IncidentStatus.RESOLVED, IncidentStatus.PENDING))
+        await self.close(sockets)
+
+    async def test_assignment_events(self):
+        incident = await sync_to_async(self.create_incident)()
+        sockets = await self.open_sockets()
+        assignment = await sync_to_async(self.create_assignment)(incident)
+        data = await self.assert_delivered(sockets, 'assignment.created')
+        self.assertEqual((data['assignment_id'], data['assigned_to_id']), (assignment.pk, self.responder.pk))
+
+        await sync_to_async(self.save)(assignment, status=AssignmentStatus.ACCEPTED)
+        data = await self.assert_delivered(sockets, 'assignment.status_changed')
+        self.assertEqual(data['status'], AssignmentStatus.ACCEPTED)
+        await self.close(sockets)
+
+    async def test_responder_location_event(self):
+        sockets = await self.open_sockets()
+        await sync_to_async(self.record_location)()
+        data = await self.assert_delivered(sockets, 'responder.location')
+        self.assertEqual((data['responder_id'], data['accuracy']), (self.responder.pk, 5))
+        await self.close(sockets)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class NotificationConsumerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='ems', email='ems@example.com', password=None, role='ems',
+        )
+
+    def setUp(self):
+        self.channel_layer = get_channel_layer()
+        async_to_sync(self.channel_layer.flush)()
+
+    async def test_anonymous_connection_is_rejected(self):
+        _, connected, code = await connect('/ws/notifications/', AnonymousUser())
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
+
+    async def test_notifications_reach_only_their_user(self):
+        communicator, connected, _ = await connect('/ws/notifications/', self.user)
+        self.assertTrue(connected)
+
+        await self.channel_layer.group_send(user_group(self.user.pk + 1), {
+            'type': 'notification.message', 'id': 1, 'title': 'Other', 'message': 'Not for this user',
+        })
+        self.assertTrue(await communicator.receive_nothing())
+        await self.channel_layer.group_send(user_group(self.user.pk), {
+            'type': 'notification.message', 'id': 2, 'title': 'Assigned', 'message': 'INC-00001',
+        })
+        self.assertEqual(await communicator.receive_json_from(), {
+            'type': 'notification', 'id': 2, 'title': 'Assigned', 'message': 'INC-00001',
+        })
+        await communicator.disconnect()
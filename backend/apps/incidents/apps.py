@@ -6,3 +6,6 @@ class IncidentsConfig(AppConfig):
     name = 'apps.incidents'
     verbose_name = 'Incidents'
 
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='incident',
+            name='geohash',
+            field=models.CharField(blank=True, max_length=12, verbose_name='geohash cell'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['geohash', 'timestamp'], name='incidents_geohash_f7e207_idx'),
+        ),
+    ]
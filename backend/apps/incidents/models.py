@@ -6,6 +6,8 @@ from django.utils.translation import gettext_lazy as _
 from django.db.models import JSONField
 from django.core.validators import MinLengthValidator
 
+from apps.core.geo import geohash_encode
+
 
 class IncidentType(models.Model):
     """Incident type taxonomy"""
@@ -95,6 +97,7 @@ class Incident(models.Model):
     # For now, using DecimalField for lat/lng
     latitude = models.DecimalField(_('latitude'), max_digits=9, decimal_places=6)
     longitude = models.DecimalField(_('longitude'), max_digits=9, decimal_places=6)
+    geohash = models.CharField(_('geohash cell'), max_length=12, blank=True)
     road_classification = models.CharField(_('road classification'), max_length=50, blank=True)
     road_name = models.CharField(_('road name'), max_length=200, blank=True)
     nearest_milestone = models.CharField(_('nearest milestone'), max_length=100, blank=True)
@@ -152,12 +155,15 @@ class Incident(models.Model):
             models.Index(fields=['status', 'severity']),
             models.Index(fields=['verification_status', 'ai_confidence_score']),
             models.Index(fields=['created_at']),
+            # Duplicate detection blocks candidates by cell and time window
+            models.Index(fields=['geohash', 'timestamp']),
         ]
     
     def __str__(self):
         return f"{self.incident_id} - {self.incident_type.name} ({self.status})"
     
     def save(self, *args, **kwargs):
+        self.geohash = geohash_encode(self.latitude, self.longitude)
         if not self.incident_id:
             # Generate unique incident ID
             from django.utils import timezone
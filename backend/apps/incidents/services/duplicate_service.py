@@ -0,0 +1,231 @@
+"""
+Duplicate incident detection
+Blocks candidates by geohash cell and time window, then scores distance, time,
+incident type and description similarity
+"""
+import re
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+
+from apps.core.geo import covering_cells, geohash_encode, haversine_m
+from apps.incidents.models import Incident, IncidentStatus
+
+CANDIDATE_FIELDS = [
+    'pk', 'latitude', 'longitude', 'timestamp', 'geohash', 'incident_type_id',
+    'incident_type__category', 'description', 'is_duplicate', 'parent_incident_id',
+]
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def trigrams(text):
+    """Character trigrams of a description with case, punctuation and spacing normalised"""
+    normalized = ' '.join(_WORD_RE.findall((text or '').lower()))
+    padded = f'  {normalized} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def text_similarity(a, b):
+    """Jaccard similarity of two trigram sets (0-1)"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class DuplicateDetectionService:
+    """
+    Finds the incident a new report duplicates.
+
+    Candidates are reports in the geohash cells around the incident within ±window,
+    fetched with one query on the (geohash, timestamp) index. Each is scored 0-1 as a
+    weighted sum of proximity, time proximity, incident type match and description
+    trigram similarity; the best candidate at or above the threshold is the match.
+    Duplicates always link to the root report, never to another duplicate.
+    """
+    RADIUS_M = 500
+    WINDOW_MINUTES = 60
+    THRESHOLD = 0.7
+
+    # Score weights (sum to 1)
+    WEIGHTS = {
+        'distance': 0.35,
+        'time': 0.25,
+        'type': 0.2,
+        'text': 0.2,
+    }
+
+    def __init__(self):
+        self.radius_m = getattr(settings, 'INCIDENT_DUPLICATE_RADIUS_M', self.RADIUS_M)
+        self.window = timedelta(minutes=getattr(settings, 'INCIDENT_DUPLICATE_WINDOW_MINUTES', self.WINDOW_MINUTES))
+        self.threshold = getattr(settings, 'INCIDENT_DUPLICATE_THRESHOLD', self.THRESHOLD)
+
+    def find_duplicate(self, incident):
+        """
+        Best match for an Incident (saved or not) as a dict with parent_id (the root
+        report), matched_id and score, or None when nothing reaches the threshold.
+        """
+        match = self.best_match(incident)
+        if match is None or match['score'] < self.threshold:
+            return None
+        return match
+
+    def best_match(self, incident):
+        """Highest-scoring candidate whatever its score, or None without candidates"""
+        if incident.latitude is None or incident.longitude is None or incident.timestamp is None:
+            return None
+        candidates = Incident.objects.filter(
+            geohash__in=covering_cells(incident.latitude, incident.longitude, self.radius_m),
+            timestamp__gte=incident.timestamp - self.window,
+            timestamp__lte=incident.timestamp + self.window,
+        ).exclude(status=IncidentStatus.FALSE)
+        if incident.pk is not None:
+            candidates = candidates.exclude(Q(pk=incident.pk) | Q(parent_incident_id=incident.pk))
+
+        subject = {
+            'pk': incident.pk,
+            'latitude': incident.latitude,
+            'longitude': incident.longitude,
+            'timestamp': incident.timestamp,
+            'incident_type_id': incident.incident_type_id,
+            'incident_type__category': incident.incident_type.category if incident.incident_type_id else None,
+            'description': incident.description,
+        }
+        return self._best(subject, list(candidates.values(*CANDIDATE_FIELDS)))
+
+    def link(self, incident):
+        """Set parent_incident/is_duplicate on an unsaved or unlinked incident; returns the match"""
+        match = self.find_duplicate(incident)
+        if match is not None:
+            incident.parent_incident_id = match['parent_id']
+            incident.is_duplicate = True
+        return match
+
+    def _best(self, subject, candidates):
+        if not candidates:
+            return None
+        distances = haversine_m(
+            subject['latitude'], subject['longitude'],
+            [candidate['latitude'] for candidate in candidates],
+            [candidate['longitude'] for candidate in candidates],
+        )
+        subject_trigrams = subject.get('trigrams') or trigrams(subject['description'])
+
+        best = None
+        for candidate, distance in zip(candidates, distances):
+            if distance > self.radius_m:
+                continue
+            score = self.score(subject, candidate, float(distance), subject_trigrams)
+            if best is None or score > best['score']:
+                root_id = candidate['parent_incident_id'] if candidate['is_duplicate'] else None
+                best = {
+                    'parent_id': root_id or candidate['pk'],
+                    'matched_id': candidate['pk'],
+                    'score': score,
+                    'distance_m': round(float(distance), 1),
+                }
+        return best
+
+    def score(self, subject, candidate, distance_m, subject_trigrams=None):
+        """Weighted 0-1 similarity of two incidents given as CANDIDATE_FIELDS dicts"""
+        seconds_apart = abs((subject['timestamp'] - candidate['timestamp']).total_seconds())
+        if subject['incident_type_id'] == candidate['incident_type_id']:
+            type_score = 1.0
+        elif subject['incident_type__category'] and subject['incident_type__category'] == candidate['incident_type__category']:
+            type_score = 0.5
+        else:
+            type_score = 0.0
+
+        components = {
+            'distance': max(0.0, 1 - distance_m / self.radius_m),
+            'time': max(0.0, 1 - seconds_apart / self.window.total_seconds()),
+            'type': type_score,
+            'text': text_similarity(
+                subject_trigrams if subject_trigrams is not None else trigrams(subject['description']),
+                candidate.get('trigrams') or trigrams(candidate['description']),
+            ),
+        }
+        return round(sum(self.WEIGHTS[name] * value for name, value in components.items()), 4)
+
+    def dedupe(self, start=None, end=None, batch_size=1000):
+        """
+        Link historic duplicates among incidents reported in [start, end).
+
+        Incidents stream in timestamp order through an in-memory index of the last
+        `window` of reports per geohash cell, so each incident is compared only with
+        its block and every pair is scored once (the later report becomes the
+        duplicate). Reports already linked to an incident that turns out to be a
+        duplicate itself are moved to the new root.
+        Returns (incidents linked, set of their timestamps' dates).
+        """
+        incidents = Incident.objects.exclude(status=IncidentStatus.FALSE)
+        if start is not None:
+            incidents = incidents.filter(timestamp__gte=start - self.window)
+        if end is not None:
+            incidents = incidents.filter(timestamp__lt=end)
+        rows = incidents.order_by('timestamp', 'pk').values(*CANDIDATE_FIELDS).iterator(chunk_size=5000)
+
+        recent = deque()
+        by_cell = {}
+        pending = []
+        # Root a newly linked incident was pointing its existing duplicates at
+        new_roots = {}
+        linked = 0
+        days = set()
+        now = timezone.now()
+        for row in rows:
+            # Drop reports that have left the window
+            while recent and recent[0]['timestamp'] < row['timestamp'] - self.window:
+                expired = recent.popleft()
+                by_cell[expired['geohash']].popleft()
+
+            row['geohash'] = row['geohash'] or geohash_encode(row['latitude'], row['longitude'])
+            row['trigrams'] = trigrams(row['description'])
+            if not row['is_duplicate'] and (start is None or row['timestamp'] >= start):
+                cells = covering_cells(row['latitude'], row['longitude'], self.radius_m)
+                candidates = [candidate for cell in cells for candidate in by_cell.get(cell, ())]
+                match = self._best(row, candidates)
+                if match is not None and match['score'] >= self.threshold:
+                    parent_id = new_roots.get(match['parent_id'], match['parent_id'])
+                    row['is_duplicate'] = True
+                    row['parent_incident_id'] = parent_id
+                    new_roots[row['pk']] = parent_id
+                    pending.append(Incident(
+                        pk=row['pk'], parent_incident_id=parent_id, is_duplicate=True, updated_at=now,
+                    ))
+                    days.add(timezone.localtime(row['timestamp']).date())
+
+            recent.append(row)
+            by_cell.setdefault(row['geohash'], deque()).append(row)
+            if len(pending) >= batch_size:
+                linked += self._save_links(pending, batch_size)
+                pending = []
+
+        linked += self._save_links(pending, batch_size)
+        self._repoint_children(new_roots, now, batch_size)
+        return linked, days
+
+    def _repoint_children(self, new_roots, now, batch_size):
+        """Move duplicates of newly linked incidents to their new roots, one UPDATE per batch"""
+        old_roots = list(new_roots)
+        for offset in range(0, len(old_roots), batch_size):
+            chunk = old_roots[offset:offset + batch_size]
+            with_children = set(
+                Incident.objects.filter(parent_incident_id__in=chunk)
+                .order_by().values_list('parent_incident_id', flat=True).distinct()
+            )
+            if not with_children:
+                continue
+            Incident.objects.filter(parent_incident_id__in=with_children).update(
+                parent_incident_id=Case(
+                    *[When(parent_incident_id=old_root, then=Value(new_roots[old_root])) for old_root in with_children]
+                ),
+                updated_at=now,
+            )
+
+    def _save_links(self, incidents, batch_size):
+        Incident.objects.bulk_update(incidents, ['parent_incident', 'is_duplicate', 'updated_at'], batch_size=batch_size)
+        return len(incidents)
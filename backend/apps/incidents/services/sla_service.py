@@ -0,0 +1,292 @@
+"""
+Incident SLA timers and escalation
+An in-memory min-heap of the next SLA deadline of every open incident
+"""
+import asyncio
+import heapq
+import logging
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.core.events import publish_event
+from apps.incidents.models import Incident, IncidentStatus
+from apps.notifications.services.fanout_service import NotificationFanoutService
+from apps.response.models import AssignmentStatus, IncidentAssignment
+from apps.users.models import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+# Statuses in which the response SLA clock runs
+SLA_OPEN_STATUSES = (IncidentStatus.PENDING, IncidentStatus.VERIFIED, IncidentStatus.ASSIGNED)
+
+# Channel the scheduler process listens on for incidents whose deadline may have moved
+SLA_SCHEDULER_CHANNEL = getattr(settings, 'SLA_SCHEDULER_CHANNEL', 'sla-scheduler')
+
+# Assignments whose responder is told about escalations
+ACTIVE_ASSIGNMENT_STATUSES = (AssignmentStatus.PENDING, AssignmentStatus.ACCEPTED, AssignmentStatus.IN_PROGRESS)
+
+# Who is told at each escalation level, besides the incident's active responders
+ESCALATION_ROLES = {
+    1: (UserRole.DISPATCHER,),
+    2: (UserRole.DISPATCHER, UserRole.TMC_OPERATOR),
+    3: (UserRole.DISPATCHER, UserRole.TMC_OPERATOR, UserRole.SYSTEM_ADMIN),
+}
+
+# Out-of-app channels escalation notifications are also sent on
+SLA_NOTIFICATION_CHANNELS = ('push',)
+
+SCHEDULE_FIELDS = ['pk', 'status', 'is_duplicate', 'sla_target_time', 'escalation_level', 'severity__escalation_time_minutes']
+
+
+def sla_target(incident, start):
+    """SLA deadline for an incident whose clock starts at `start`"""
+    minutes = incident.severity.response_time_target_minutes or incident.incident_type.default_sla_minutes
+    return start + timedelta(minutes=minutes)
+
+
+def next_deadline(row, max_level=None):
+    """
+    When an incident (a SCHEDULE_FIELDS dict) next escalates: level 1 (breach) at its
+    SLA target, then one level every escalation_time_minutes of its severity.
+    None once it is closed out of the SLA or at the top level.
+    """
+    max_level = max_level or max(ESCALATION_ROLES)
+    if (row['status'] not in SLA_OPEN_STATUSES or row['is_duplicate']
+            or row['sla_target_time'] is None or row['escalation_level'] >= max_level):
+        return None
+    step = timedelta(minutes=row['severity__escalation_time_minutes'] or 0)
+    return row['sla_target_time'] + step * row['escalation_level']
+
+
+def notify_scheduler(incident_ids):
+    """Ask the running scheduler to re-read these incidents once the transaction commits"""
+    ids = list(incident_ids)
+    if ids:
+        transaction.on_commit(lambda: _send(ids))
+
+
+def _send(incident_ids):
+    from channels.layers import get_channel_layer
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.send)(SLA_SCHEDULER_CHANNEL, {'type': 'sla.reschedule', 'incidents': incident_ids})
+    except Exception:
+        # The periodic resync picks the change up if no scheduler is draining the channel
+        logger.debug('Could not notify the SLA scheduler', exc_info=True)
+
+
+class SLAScheduler:
+    """
+    Fires SLA breaches and escalations at their deadline without polling incidents.
+
+    The heap holds (deadline, incident pk) for every open incident and is rebuilt from
+    the database by load(). Changes arrive as reschedule(pks) (sent by the Incident
+    signals through SLA_SCHEDULER_CHANNEL); a superseded heap entry is skipped when it
+    surfaces, because _due only keeps each incident's current deadline. run_due() fires
+    whatever is due, re-checking every incident against the database so a stale heap
+    can never escalate a closed incident, and an escalation is a conditional UPDATE, so
+    a second scheduler instance cannot fire it twice.
+
+    `clock` returns the current time; pass a fake one to drive the scheduler in tests.
+    """
+    RESYNC_SECONDS = 900
+
+    def __init__(self, clock=None, max_level=None):
+        self.clock = clock or timezone.now
+        self.max_level = max_level or getattr(settings, 'SLA_MAX_ESCALATION_LEVEL', max(ESCALATION_ROLES))
+        self.resync_seconds = getattr(settings, 'SLA_SCHEDULER_RESYNC_SECONDS', self.RESYNC_SECONDS)
+        self._heap = []
+        self._due = {}
+        self.loaded_at = None
+
+    def __len__(self):
+        return len(self._due)
+
+    def load(self, batch_size=5000):
+        """Start SLA clocks that were never set, then rebuild the heap from all open incidents"""
+        self.backfill()
+        self._heap = []
+        self._due = {}
+        rows = Incident.objects.filter(
+            status__in=SLA_OPEN_STATUSES, is_duplicate=False,
+            sla_target_time__isnull=False, escalation_level__lt=self.max_level,
+        ).values(*SCHEDULE_FIELDS).iterator(chunk_size=batch_size)
+        for row in rows:
+            due = next_deadline(row, self.max_level)
+            if due is not None:
+                self._due[row['pk']] = due
+                self._heap.append((due, row['pk']))
+        heapq.heapify(self._heap)
+        self.loaded_at = self.clock()
+        return len(self._due)
+
+    def backfill(self):
+        """Set sla_start_time/sla_target_time on open incidents created without them"""
+        missing = Incident.objects.filter(status__in=SLA_OPEN_STATUSES, sla_target_time__isnull=True)
+        # One UPDATE per SLA length rather than per incident
+        combinations = missing.values_list(
+            'severity__response_time_target_minutes', 'incident_type__default_sla_minutes',
+            'severity_id', 'incident_type_id',
+        ).order_by().distinct()
+        for response_minutes, default_minutes, severity_id, incident_type_id in combinations:
+            start = Coalesce('sla_start_time', 'created_at')
+            missing.filter(severity_id=severity_id, incident_type_id=incident_type_id).update(
+                sla_start_time=start,
+                sla_target_time=start + timedelta(minutes=response_minutes or default_minutes),
+            )
+
+    def reschedule(self, incident_ids):
+        """Re-read incidents whose status or SLA fields changed and move their deadlines"""
+        incident_ids = set(incident_ids)
+        rows = Incident.objects.filter(pk__in=incident_ids).values(*SCHEDULE_FIELDS)
+        found = set()
+        for row in rows:
+            found.add(row['pk'])
+            self._schedule(row['pk'], next_deadline(row, self.max_level))
+        for pk in incident_ids - found:
+            self._schedule(pk, None)
+
+    def _schedule(self, pk, due):
+        if due is None:
+            self._due.pop(pk, None)
+        elif self._due.get(pk) != due:
+            self._due[pk] = due
+            heapq.heappush(self._heap, (due, pk))
+
+    def next_due(self):
+        """Earliest pending deadline, or None"""
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def run_due(self, batch_size=500):
+        """Fire every deadline up to now; returns the number of escalations made"""
+        now = self.clock()
+        fired = 0
+        while True:
+            batch = []
+            while len(batch) < batch_size and self.next_due() is not None and self.next_due() <= now:
+                due, pk = heapq.heappop(self._heap)
+                del self._due[pk]
+                batch.append(pk)
+            if not batch:
+                return fired
+            fired += self._escalate(batch, now)
+
+    def _escalate(self, incident_ids, now):
+        rows = Incident.objects.filter(pk__in=incident_ids).values(
+            *SCHEDULE_FIELDS, 'incident_id', 'latitude', 'longitude', 'sla_breach_time',
+        )
+        escalated = []
+        with transaction.atomic():
+            for row in rows:
+                due = next_deadline(row, self.max_level)
+                if due is None:
+                    continue
+                if due > now:
+                    # Moved since it was scheduled (e.g. SLA extended)
+                    self._schedule(row['pk'], due)
+                    continue
+                level = row['escalation_level'] + 1
+                updated = Incident.objects.filter(
+                    pk=row['pk'], escalation_level=row['escalation_level'], status__in=SLA_OPEN_STATUSES,
+                ).update(
+                    escalation_level=level,
+                    sla_breach_time=Coalesce('sla_breach_time', due),
+                    updated_at=now,
+                )
+                if not updated:
+                    continue
+                row.update(escalation_level=level, sla_breach_time=row['sla_breach_time'] or due)
+                escalated.append(row)
+                publish_event('incident.sla_breached' if level == 1 else 'incident.escalated', {
+                    'incident_id': row['incident_id'],
+                    'status': row['status'],
+                    'escalation_level': level,
+                    'sla_target_time': row['sla_target_time'],
+                    'sla_breach_time': row['sla_breach_time'],
+                }, row['latitude'], row['longitude'])
+            self._notify(escalated)
+
+        for row in escalated:
+            self._schedule(row['pk'], next_deadline(row, self.max_level))
+        return len(escalated)
+
+    def _notify(self, rows):
+        """Notify each escalated incident's staff and active responders"""
+        if not rows:
+            return
+        responders = {}
+        for incident_pk, user_pk in IncidentAssignment.objects.filter(
+            incident_id__in=[row['pk'] for row in rows],
+            status__in=ACTIVE_ASSIGNMENT_STATUSES,
+            assigned_to__is_active=True,
+        ).values_list('incident_id', 'assigned_to_id'):
+            responders.setdefault(incident_pk, set()).add(user_pk)
+
+        staff = {}
+        fanout = NotificationFanoutService()
+        for row in rows:
+            level = row['escalation_level']
+            roles = ESCALATION_ROLES.get(level) or ESCALATION_ROLES[max(ESCALATION_ROLES)]
+            if roles not in staff:
+                staff[roles] = set(User.objects.filter(is_active=True, role__in=roles).values_list('pk', flat=True))
+            if level == 1:
+                title = f"SLA breached: {row['incident_id']}"
+                message = (f"Incident {row['incident_id']} passed its SLA target of "
+                           f"{timezone.localtime(row['sla_target_time']):%Y-%m-%d %H:%M} without a response.")
+            else:
+                title = f"Escalation level {level}: {row['incident_id']}"
+                message = (f"Incident {row['incident_id']} is still awaiting a response "
+                           f"{level - 1} escalation period(s) after breaching its SLA.")
+            fanout.fan_out(
+                'sla_escalation', title, message,
+                user_ids=staff[roles] | responders.get(row['pk'], set()),
+                channels=SLA_NOTIFICATION_CHANNELS,
+                subscribers=False,
+            )
+
+    def serve(self, stop=None):
+        """Run until `stop` (an asyncio.Event) is set: load, then sleep until the next deadline or message"""
+        async_to_sync(self._serve)(stop)
+
+    async def _serve(self, stop=None):
+        from channels.layers import get_channel_layer
+
+        channel_layer = get_channel_layer()
+        loaded = await sync_to_async(self.load)()
+        logger.info('SLA scheduler tracking %s open incidents', loaded)
+        while stop is None or not stop.is_set():
+            if (self.clock() - self.loaded_at).total_seconds() >= self.resync_seconds:
+                # Safety net for reschedule messages lost while no scheduler was listening
+                await sync_to_async(self.load)()
+
+            await sync_to_async(self.run_due)()
+            timeout = self._seconds_until_next()
+            incident_ids = set()
+            try:
+                if channel_layer is None:
+                    await asyncio.sleep(timeout)
+                else:
+                    message = await asyncio.wait_for(channel_layer.receive(SLA_SCHEDULER_CHANNEL), timeout)
+                    incident_ids.update(message.get('incidents', ()))
+            except asyncio.TimeoutError:
+                pass
+            if incident_ids:
+                await sync_to_async(self.reschedule)(incident_ids)
+
+    def _seconds_until_next(self):
+        now = self.clock()
+        wake = self.loaded_at + timedelta(seconds=self.resync_seconds)
+        due = self.next_due()
+        if due is not None and due < wake:
+            wake = due
+        return max((wake - now).total_seconds(), 0.0)
@@ -0,0 +1,87 @@
+"""
+Incident signals
+"""
+from django.conf import settings
+from django.db.models.signals import post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.core.events import publish_event
+
+
+@receiver(pre_save, sender='incidents.Incident')
+def link_duplicate_report(sender, instance, **kwargs):
+    """
+    Link a new report to the incident it duplicates before it is inserted, so it is
+    stored (and counted by every post_save receiver) as a duplicate from the start
+    """
+    if instance.pk is not None or instance.parent_incident_id or kwargs.get('raw'):
+        return
+    if not getattr(settings, 'INCIDENT_DUPLICATE_DETECTION', True):
+        return
+    from .services.duplicate_service import DuplicateDetectionService
+    instance._duplicate_match = DuplicateDetectionService().link(instance)
+
+
+@receiver(pre_save, sender='verification.AIVerificationResult')
+def score_duplicate_likelihood(sender, instance, **kwargs):
+    """Fill in AIVerificationResult.duplicate_detection_score (0-100) when the model left it empty"""
+    if instance.duplicate_detection_score is not None or kwargs.get('raw'):
+        return
+    from .services.duplicate_service import DuplicateDetectionService
+    match = DuplicateDetectionService().best_match(instance.incident)
+    instance.duplicate_detection_score = round(match['score'] * 100, 2) if match else 0
+
+
+@receiver(pre_save, sender='incidents.Incident')
+def start_sla_clock(sender, instance, **kwargs):
+    """Start the response SLA of a new report from when it was received"""
+    if instance.pk is not None or instance.sla_target_time is not None or kwargs.get('raw'):
+        return
+    from django.utils import timezone
+    from .services.sla_service import sla_target
+    instance.sla_start_time = instance.sla_start_time or timezone.now()
+    instance.sla_target_time = sla_target(instance, instance.sla_start_time)
+
+
+@receiver(post_init, sender='incidents.Incident')
+def remember_loaded_status(sender, instance, **kwargs):
+    # __dict__ so a deferred status field is not loaded just for this
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+# Registered before publish_incident_event, which moves _loaded_status on
+@receiver(post_save, sender='incidents.Incident')
+def reschedule_sla(sender, instance, created, **kwargs):
+    """Tell the SLA scheduler about new incidents and status changes that start or stop the clock"""
+    if kwargs.get('raw'):
+        return
+    if created or getattr(instance, '_loaded_status', None) != instance.status:
+        from .services.sla_service import notify_scheduler
+        notify_scheduler([instance.pk])
+
+
+@receiver(post_save, sender='incidents.Incident')
+def publish_incident_event(sender, instance, created, **kwargs):
+    """Push new incidents and status changes to live dispatcher screens"""
+    if kwargs.get('raw'):
+        return
+    previous_status = getattr(instance, '_loaded_status', None)
+    instance._loaded_status = instance.status
+    if created:
+        event = 'incident.created'
+    elif previous_status is not None and previous_status != instance.status:
+        event = 'incident.status_changed'
+    else:
+        return
+    publish_event(event, {
+        'incident_id': instance.incident_id,
+        'status': instance.status,
+        'previous_status': None if created else previous_status,
+        'incident_type_id': instance.incident_type_id,
+        'severity_id': instance.severity_id,
+        'latitude': instance.latitude,
+        'longitude': instance.longitude,
+        'timestamp': instance.timestamp,
+        'is_duplicate': instance.is_duplicate,
+        'parent_incident_id': instance.parent_incident_id,
+    }, instance.latitude, instance.longitude)
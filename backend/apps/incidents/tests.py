@@ -0,0 +1,143 @@
+"""
+Incident tests
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.testing import assert_list_queries_constant
+from apps.response.models import IncidentAssignment
+from apps.users.models import User
+from .models import Incident, IncidentSeverity, IncidentStatus, IncidentType
+from .services.sla_service import SLAScheduler
+
+
+def create_incident(n, incident_type, severity, **fields):
+    """An incident n km apart from incident n-1, so none is linked as a duplicate"""
+    fields.setdefault('timestamp', timezone.now() - timedelta(minutes=n))
+    return Incident.objects.create(
+        incident_id=f'INC-{n:05d}', incident_type=incident_type, severity=severity,
+        description='Two vehicles collided at the junction', latitude=Decimal('-1.28') - Decimal(n) / 100,
+        longitude=Decimal('36.82'), **fields,
+    )
+
+
+class IncidentListQueryTests(TestCase):
+    """List endpoints load related rows in the list query, not one query per row"""
+
+    @classmethod
+    def setUpTestData(cls):
+        incident_type = IncidentType.objects.create(name='Collision', category='accident')
+        severity = IncidentSeverity.objects.create(
+            level='P2', name='High', description='High severity', response_time_target_minutes=15,
+            escalation_time_minutes=30, priority_score=3,
+        )
+        cls.user = User.objects.create_user(
+            username='dispatcher', email='dispatcher@example.com', password=None, role='dispatcher',
+        )
+        for n in range(50):
+            reporter = User.objects.create_user(
+                username=f'reporter{n}', email=f'reporter{n}@example.com', password=None,
+                role='road_user_registered',
+            )
+            responder = User.objects.create_user(
+                username=f'responder{n}', email=f'responder{n}@example.com', password=None, role='ems',
+            )
+            incident = create_incident(n, incident_type, severity, reporter=reporter)
+            IncidentAssignment.objects.create(incident=incident, assigned_to=responder, assigned_by=cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_incident_list(self):
+        assert_list_queries_constant(self.client, '/api/incidents/')
+
+    def test_assignment_list(self):
+        assert_list_queries_constant(self.client, '/api/response/assignments/')
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, **kwargs):
+        self.now += timedelta(**kwargs)
+
+
+class SLASchedulerTests(TestCase):
+    """Deadlines fire from the heap as a fake clock passes them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.incident_type = IncidentType.objects.create(name='Collision', category='accident')
+        cls.severity = IncidentSeverity.objects.create(
+            level='P2', name='High', description='High severity', response_time_target_minutes=15,
+            escalation_time_minutes=30, priority_score=3,
+        )
+
+    def setUp(self):
+        self.clock = FakeClock(timezone.now())
+        self.scheduler = SLAScheduler(clock=self.clock, max_level=3)
+
+    def create_incident(self, n=0):
+        return create_incident(n, self.incident_type, self.severity, sla_start_time=self.clock.now)
+
+    def test_escalates_at_target_then_every_escalation_period(self):
+        incident = self.create_incident()
+        self.assertEqual(self.scheduler.load(), 1)
+        self.assertEqual(self.scheduler.next_due(), incident.sla_target_time)
+
+        self.clock.advance(minutes=14)
+        self.assertEqual(self.scheduler.run_due(), 0)
+
+        self.clock.advance(minutes=1)
+        self.assertEqual(self.scheduler.run_due(), 1)
+        incident.refresh_from_db()
+        self.assertEqual(incident.escalation_level, 1)
+        self.assertEqual(incident.sla_breach_time, incident.sla_target_time)
+        self.assertEqual(self.scheduler.next_due(), incident.sla_target_time + timedelta(minutes=30))
+
+        # A late run catches up every level whose deadline passed, up to max_level
+        self.clock.advance(hours=2)
+        self.assertEqual(self.scheduler.run_due(), 2)
+        incident.refresh_from_db()
+        self.assertEqual(incident.escalation_level, 3)
+        self.assertIsNone(self.scheduler.next_due())
+        self.assertEqual(self.scheduler.run_due(), 0)
+
+    def test_rescheduled_incident_out_of_sla_is_dropped(self):
+        incident = self.create_incident()
+        self.scheduler.load()
+        incident.status = IncidentStatus.RESOLVED
+        incident.save()
+        self.scheduler.reschedule([incident.pk])
+
+        self.assertIsNone(self.scheduler.next_due())
+        self.assertEqual(len(self.scheduler), 0)
+
+    def test_stale_heap_entry_does_not_escalate_closed_incident(self):
+        incident = self.create_incident()
+        self.scheduler.load()
+        # Closed without the scheduler hearing about it
+        Incident.objects.filter(pk=incident.pk).update(status=IncidentStatus.CLOSED)
+
+        self.clock.advance(minutes=15)
+        self.assertEqual(self.scheduler.run_due(), 0)
+        incident.refresh_from_db()
+        self.assertEqual(incident.escalation_level, 0)
+
+    def test_extended_deadline_is_moved_not_fired(self):
+        incident = self.create_incident()
+        self.scheduler.load()
+        Incident.objects.filter(pk=incident.pk).update(sla_target_time=incident.sla_target_time + timedelta(hours=1))
+
+        self.clock.advance(minutes=15)
+        self.assertEqual(self.scheduler.run_due(), 0)
+        self.assertEqual(self.scheduler.next_due(), incident.sla_target_time + timedelta(hours=1))
@@ -4,17 +4,34 @@ Incident views
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
 from django.shortcuts import get_object_or_404
-from .models import Incident, IncidentComment
+from apps.core.exports import ExportMixin
+from apps.response.models import IncidentAssignment
+from apps.response.services.responder_search import ENGAGED_STATUSES, RESPONDER_ROLES, NearestResponderService
+from apps.users.models import User
+from apps.users.permissions import IsOperationsStaff
+from .models import Incident, IncidentComment, IncidentStatus
 from .serializers import IncidentSerializer, IncidentCommentSerializer
 
 
-class IncidentViewSet(viewsets.ModelViewSet):
+class IncidentViewSet(ExportMixin, viewsets.ModelViewSet):
     """Incident CRUD and operations"""
-    queryset = Incident.objects.all()
+    queryset = Incident.objects.select_related('incident_type', 'severity', 'reporter')
     serializer_class = IncidentSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'incident_id'
+    # Analyst exports leave out reporter identity
+    export_fields = [
+        ('incident_id', 'incident_id'), ('incident_type', 'incident_type__name'),
+        ('category', 'incident_type__category'), ('severity', 'severity__level'),
+        ('status', 'status'), ('description', 'description'),
+        ('latitude', 'latitude'), ('longitude', 'longitude'), ('road_name', 'road_name'),
+        ('timestamp', 'timestamp'), ('weather', 'weather'),
+        ('verification_status', 'verification_status'), ('ai_confidence_score', 'ai_confidence_score'),
+        ('is_duplicate', 'is_duplicate'), ('escalation_level', 'escalation_level'),
+        ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    ]
     
     def get_permissions(self):
         """Allow anonymous users to create incidents"""
@@ -46,12 +63,96 @@ class IncidentViewSet(viewsets.ModelViewSet):
         incident.save()
         return Response({'message': 'Incident verified'})
     
-    @action(detail=True, methods=['patch'])
+    @action(detail=True, methods=['patch'], permission_classes=[IsOperationsStaff])
     def assign(self, request, incident_id=None):
-        """Assign incident to responder"""
+        """
+        Assign incident to responder: the given responder_id, or the nearest available
+        responder (optionally limited to `roles`)
+        """
         incident = self.get_object()
-        # TODO: Implement assignment logic
-        return Response({'message': 'Incident assigned'})
+        responder_id = request.data.get('responder_id')
+        assignment_type = request.data.get('assignment_type', 'primary')
+        if assignment_type not in dict(IncidentAssignment._meta.get_field('assignment_type').choices):
+            return Response({'error': 'Invalid assignment_type'}, status=status.HTTP_400_BAD_REQUEST)
+
+        distance_m = None
+        if responder_id not in (None, ''):
+            try:
+                responder_id = int(responder_id)
+            except (TypeError, ValueError):
+                return Response({'error': 'responder_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+            responder = User.objects.filter(pk=responder_id, is_active=True, role__in=RESPONDER_ROLES).first()
+            if responder is None:
+                return Response({'error': 'Responder not found'}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            roles, error = self._roles(request.data.get('roles'))
+            if error:
+                return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+            nearest = NearestResponderService().find(incident.latitude, incident.longitude, k=1, roles=roles)
+            if not nearest:
+                return Response({'error': 'No available responder nearby'}, status=status.HTTP_409_CONFLICT)
+            responder = User.objects.get(pk=nearest[0]['responder_id'])
+            distance_m = nearest[0]['distance_m']
+
+        with transaction.atomic():
+            # Serialise assignments of the same responder
+            User.objects.select_for_update().filter(pk=responder.pk).first()
+            if IncidentAssignment.objects.filter(assigned_to=responder, status__in=ENGAGED_STATUSES).exists():
+                return Response({'error': 'Responder is already engaged'}, status=status.HTTP_409_CONFLICT)
+            assignment = IncidentAssignment.objects.create(
+                incident=incident,
+                assigned_to=responder,
+                assigned_by=request.user,
+                assignment_type=assignment_type,
+                notes=request.data.get('notes', ''),
+            )
+            if incident.status in (IncidentStatus.PENDING, IncidentStatus.VERIFIED):
+                incident.status = IncidentStatus.ASSIGNED
+                incident.save()
+
+        return Response({
+            'message': 'Incident assigned',
+            'assignment_id': assignment.pk,
+            'responder_id': responder.pk,
+            'responder_email': responder.email,
+            'responder_role': responder.role,
+            'distance_m': distance_m,
+            'status': incident.status,
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['get'], permission_classes=[IsOperationsStaff])
+    def nearest_responders(self, request, incident_id=None):
+        """Nearest available responders to the incident (?k=5&role=ems&max_distance_km=20)"""
+        incident = self.get_object()
+        roles, error = self._roles(request.query_params.getlist('role'))
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            k = min(max(int(request.query_params.get('k', 5)), 1), 50)
+            max_distance_km = request.query_params.get('max_distance_km')
+            max_distance_m = float(max_distance_km) * 1000 if max_distance_km else None
+        except ValueError:
+            return Response({'error': 'k and max_distance_km must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        if max_distance_m is not None and max_distance_m <= 0:
+            return Response({'error': 'max_distance_km must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+
+        responders = NearestResponderService().find(
+            incident.latitude, incident.longitude, k=k, roles=roles, max_distance_m=max_distance_m,
+        )
+        return Response({'incident_id': incident.incident_id, 'count': len(responders), 'results': responders})
+    
+    @staticmethod
+    def _roles(requested):
+        """Responder roles from a list (or comma-separated string); None means all"""
+        if not requested:
+            return None, None
+        if isinstance(requested, str):
+            requested = [requested]
+        roles = {role.strip() for value in requested for role in str(value).split(',') if role.strip()}
+        invalid = sorted(roles - set(RESPONDER_ROLES))
+        if invalid:
+            return None, f'Invalid responder roles: {", ".join(invalid)}'
+        return roles, None
     
     @action(detail=True, methods=['patch'])
     def close(self, request, incident_id=None):
@@ -66,7 +167,7 @@ class IncidentViewSet(viewsets.ModelViewSet):
 
 class IncidentCommentViewSet(viewsets.ModelViewSet):
     """Comments on incidents"""
-    queryset = IncidentComment.objects.all()
+    queryset = IncidentComment.objects.select_related('user')
     serializer_class = IncidentCommentSerializer
     permission_classes = [permissions.IsAuthenticated]
     
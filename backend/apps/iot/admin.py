@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import RFIDReader, RFIDLog, CCTVCamera, CCTVFeed, Sensor, SensorReading, IncidentValidation
+from .models import (
+    RFIDReader, RFIDLog, CCTVCamera, CCTVFeed, Sensor, SensorReading, SensorLatestReading,
+    IncidentValidation, ValidationJob
+)
 
 
 @admin.register(RFIDReader)
@@ -45,9 +48,24 @@ class SensorReadingAdmin(admin.ModelAdmin):
     date_hierarchy = 'timestamp'
 
 
+@admin.register(SensorLatestReading)
+class SensorLatestReadingAdmin(admin.ModelAdmin):
+    list_display = ['sensor', 'timestamp', 'reading_type', 'anomaly_detected', 'updated_at']
+    list_filter = ['reading_type', 'anomaly_detected']
+    search_fields = ['sensor__sensor_id']
+    list_select_related = ['sensor']
+
+
 @admin.register(IncidentValidation)
 class IncidentValidationAdmin(admin.ModelAdmin):
     list_display = ['incident', 'validation_source', 'confidence_score', 'validation_status', 'validated_at']
     list_filter = ['validation_source', 'validation_status', 'validated_at']
     search_fields = ['incident__incident_id']
 
+
+
+@admin.register(ValidationJob)
+class ValidationJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'incident', 'status', 'created_at', 'completed_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['incident__incident_id']
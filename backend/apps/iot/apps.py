@@ -5,3 +5,6 @@ class IotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.iot'
     verbose_name = 'IoT Integration'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.1 on 2026-10-18 00:43
+
+from django.db import migrations, models
+
+from apps.core.geo import geohash_encode
+
+
+def populate_device_geohashes(apps, schema_editor):
+    # Device tables are small; RFID logs are backfilled with `manage.py backfill_geohashes`
+    for model_name in ['RFIDReader', 'CCTVCamera', 'Sensor']:
+        model = apps.get_model('iot', model_name)
+        devices = list(model.objects.only('pk', 'latitude', 'longitude'))
+        for device in devices:
+            device.geohash = geohash_encode(device.latitude, device.longitude)
+        model.objects.bulk_update(devices, ['geohash'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('iot', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cctvcamera',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, max_length=12, verbose_name='geohash cell'),
+        ),
+        migrations.AddField(
+            model_name='rfidlog',
+            name='geohash',
+            field=models.CharField(blank=True, max_length=12, verbose_name='geohash cell'),
+        ),
+        migrations.AddField(
+            model_name='rfidreader',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, max_length=12, verbose_name='geohash cell'),
+        ),
+        migrations.AddField(
+            model_name='sensor',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, max_length=12, verbose_name='geohash cell'),
+        ),
+        migrations.AddIndex(
+            model_name='rfidlog',
+            index=models.Index(fields=['geohash', 'timestamp'], name='rfid_logs_geohash_e26e37_idx'),
+        ),
+        migrations.RunPython(populate_device_geohashes, migrations.RunPython.noop),
+    ]
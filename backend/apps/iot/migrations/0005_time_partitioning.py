@@ -0,0 +1,38 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:10
+
+from django.db import migrations
+from django.utils import timezone
+
+from apps.core.partitioning import (
+    convert_to_partitioned, create_partitions, is_partitioned, partition_config,
+)
+
+PARTITIONED_TABLES = [
+    ('rfid_logs', 'timestamp'),
+    ('sensor_readings', 'timestamp'),
+]
+
+
+def partition_tables(apps, schema_editor):
+    # Native range partitioning is PostgreSQL-only; SQLite development databases stay as they are
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    now = timezone.now()
+    with schema_editor.connection.cursor() as cursor:
+        for table, column in PARTITIONED_TABLES:
+            if is_partitioned(cursor, table):
+                continue
+            config = partition_config(table)
+            convert_to_partitioned(cursor, table, column, config['interval'], now)
+            create_partitions(cursor, table, now, config['premake'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('iot', '0004_validation_jobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-18 00:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('iot', '0005_time_partitioning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorLatestReading',
+            fields=[
+                ('sensor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='latest_reading', serialize=False, to='iot.sensor')),
+                ('timestamp', models.DateTimeField(verbose_name='timestamp')),
+                ('reading_type', models.CharField(max_length=50, verbose_name='reading type')),
+                ('value', models.JSONField(default=dict, verbose_name='value')),
+                ('unit', models.CharField(blank=True, max_length=20, verbose_name='unit')),
+                ('quality_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='quality score')),
+                ('anomaly_detected', models.BooleanField(default=False, verbose_name='anomaly detected')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'verbose_name': 'latest sensor reading',
+                'verbose_name_plural': 'latest sensor readings',
+                'db_table': 'sensor_latest_readings',
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from apps.core.partitioning import ensure_default_partition, is_partitioned
+
+PARTITIONED_TABLES = ['rfid_logs', 'sensor_readings']
+
+
+def add_default_partitions(apps, schema_editor):
+    # Tables partitioned before DEFAULT partitions existed; SQLite databases are not partitioned
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            if is_partitioned(cursor, table):
+                ensure_default_partition(cursor, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('iot', '0006_sensor_latest_readings'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_default_partitions, migrations.RunPython.noop),
+    ]
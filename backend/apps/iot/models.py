@@ -1,10 +1,14 @@
 """
 IoT integration models for KeNHA systems (RFID, CCTV, Sensors)
 """
+import uuid
+
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.db.models import JSONField
 
+from apps.core.geo import geohash_encode, geohash_or_blank
+
 
 class RFIDReader(models.Model):
     """RFID reader configuration and metadata"""
@@ -13,6 +17,7 @@ class RFIDReader(models.Model):
     # Location (PostGIS PointField ready)
     latitude = models.DecimalField(_('latitude'), max_digits=9, decimal_places=6)
     longitude = models.DecimalField(_('longitude'), max_digits=9, decimal_places=6)
+    geohash = models.CharField(_('geohash cell'), max_length=12, blank=True, db_index=True)
     
     # Metadata
     installation_date = models.DateTimeField(_('installation date'), null=True, blank=True)
@@ -41,6 +46,10 @@ class RFIDReader(models.Model):
     
     def __str__(self):
         return f"RFID Reader {self.reader_id}"
+    
+    def save(self, *args, **kwargs):
+        self.geohash = geohash_encode(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
 
 
 class RFIDLog(models.Model):
@@ -57,6 +66,7 @@ class RFIDLog(models.Model):
     # Spatial data
     latitude = models.DecimalField(_('latitude'), max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(_('longitude'), max_digits=9, decimal_places=6, null=True, blank=True)
+    geohash = models.CharField(_('geohash cell'), max_length=12, blank=True)
     
     # Metadata
     direction = models.CharField(_('direction'), max_length=20, blank=True)
@@ -71,6 +81,7 @@ class RFIDLog(models.Model):
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     
     class Meta:
+        # Range-partitioned by timestamp on PostgreSQL (see IOT_PARTITIONS / manage_partitions)
         db_table = 'rfid_logs'
         verbose_name = _('RFID log')
         verbose_name_plural = _('RFID logs')
@@ -78,10 +89,20 @@ class RFIDLog(models.Model):
         indexes = [
             models.Index(fields=['timestamp', 'reader']),
             models.Index(fields=['vehicle_tag', 'timestamp']),
+            models.Index(fields=['geohash', 'timestamp']),
         ]
     
     def __str__(self):
         return f"RFID Log {self.reader.reader_id} @ {self.timestamp}"
+    
+    def save(self, *args, **kwargs):
+        if (self.latitude is None or self.longitude is None) and self.reader_id is not None:
+            # Gateway reads usually carry only the reader: place them at the reader
+            self.latitude, self.longitude = RFIDReader.objects.filter(pk=self.reader_id).values_list(
+                'latitude', 'longitude',
+            ).first() or (None, None)
+        self.geohash = geohash_or_blank(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
 
 
 class CCTVCamera(models.Model):
@@ -91,6 +112,7 @@ class CCTVCamera(models.Model):
     # Location (PostGIS PointField ready)
     latitude = models.DecimalField(_('latitude'), max_digits=9, decimal_places=6)
     longitude = models.DecimalField(_('longitude'), max_digits=9, decimal_places=6)
+    geohash = models.CharField(_('geohash cell'), max_length=12, blank=True, db_index=True)
     
     # Coverage
     coverage_radius_meters = models.IntegerField(_('coverage radius (meters)'), default=500)
@@ -131,6 +153,10 @@ class CCTVCamera(models.Model):
     
     def __str__(self):
         return f"CCTV Camera {self.camera_id}"
+    
+    def save(self, *args, **kwargs):
+        self.geohash = geohash_encode(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
 
 
 class CCTVFeed(models.Model):
@@ -191,6 +217,7 @@ class Sensor(models.Model):
     # Location (PostGIS PointField ready)
     latitude = models.DecimalField(_('latitude'), max_digits=9, decimal_places=6)
     longitude = models.DecimalField(_('longitude'), max_digits=9, decimal_places=6)
+    geohash = models.CharField(_('geohash cell'), max_length=12, blank=True, db_index=True)
     
     # Type
     sensor_type = models.CharField(_('sensor type'), max_length=50, choices=SENSOR_TYPES)
@@ -225,6 +252,10 @@ class Sensor(models.Model):
     
     def __str__(self):
         return f"{self.get_sensor_type_display()} Sensor {self.sensor_id}"
+    
+    def save(self, *args, **kwargs):
+        self.geohash = geohash_encode(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
 
 
 class SensorReading(models.Model):
@@ -249,6 +280,7 @@ class SensorReading(models.Model):
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     
     class Meta:
+        # Range-partitioned by timestamp on PostgreSQL (see IOT_PARTITIONS / manage_partitions)
         db_table = 'sensor_readings'
         verbose_name = _('sensor reading')
         verbose_name_plural = _('sensor readings')
@@ -262,6 +294,32 @@ class SensorReading(models.Model):
         return f"{self.sensor.sensor_id} Reading @ {self.timestamp}"
 
 
+class SensorLatestReading(models.Model):
+    """
+    Most recent reading of each sensor, upserted on ingest.
+    Lets "current conditions" views read one row per sensor instead of scanning readings.
+    """
+    sensor = models.OneToOneField(Sensor, on_delete=models.CASCADE, primary_key=True,
+                                  related_name='latest_reading')
+    
+    timestamp = models.DateTimeField(_('timestamp'))
+    reading_type = models.CharField(_('reading type'), max_length=50)
+    value = JSONField(_('value'), default=dict)
+    unit = models.CharField(_('unit'), max_length=20, blank=True)
+    quality_score = models.DecimalField(_('quality score'), max_digits=5, decimal_places=2, null=True, blank=True)
+    anomaly_detected = models.BooleanField(_('anomaly detected'), default=False)
+    
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    
+    class Meta:
+        db_table = 'sensor_latest_readings'
+        verbose_name = _('latest sensor reading')
+        verbose_name_plural = _('latest sensor readings')
+    
+    def __str__(self):
+        return f"{self.sensor.sensor_id} latest @ {self.timestamp}"
+
+
 class IncidentValidation(models.Model):
     """Multi-source validation results for incidents"""
     VALIDATION_SOURCES = [
@@ -306,3 +364,37 @@ class IncidentValidation(models.Model):
     
     def __str__(self):
         return f"{self.incident.incident_id} - {self.get_validation_source_display()} ({self.confidence_score}%)"
+
+
+class ValidationJob(models.Model):
+    """Background multi-source validation run for an incident"""
+    JOB_STATUSES = [
+        ('queued', _('Queued')),
+        ('running', _('Running')),
+        ('completed', _('Completed')),
+        ('failed', _('Failed')),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    incident = models.ForeignKey('incidents.Incident', on_delete=models.CASCADE, related_name='validation_jobs')
+    status = models.CharField(_('status'), max_length=20, choices=JOB_STATUSES, default='queued')
+    
+    # Outcome
+    result = JSONField(_('result'), default=dict, blank=True)
+    error = models.TextField(_('error'), blank=True)
+    
+    # Metadata
+    requested_by = models.ForeignKey('users.User', on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='validation_jobs')
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    started_at = models.DateTimeField(_('started at'), null=True, blank=True)
+    completed_at = models.DateTimeField(_('completed at'), null=True, blank=True)
+    
+    class Meta:
+        db_table = 'incident_validation_jobs'
+        verbose_name = _('validation job')
+        verbose_name_plural = _('validation jobs')
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Validation job {self.id} for {self.incident.incident_id} ({self.status})"
@@ -0,0 +1,41 @@
+"""
+IoT ingest parsers
+"""
+import json
+
+from rest_framework.parsers import BaseParser
+
+
+def iter_ndjson(stream, encoding='utf-8'):
+    """
+    Lazily yield (line_number, record, error) tuples from an NDJSON stream.
+    Blank lines are skipped; malformed lines yield an error instead of a record.
+    """
+    for line_number, raw_line in enumerate(stream, start=1):
+        line = raw_line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line.decode(encoding) if isinstance(line, bytes) else line)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            yield line_number, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, 'Each line must be a JSON object'
+            continue
+        yield line_number, record, None
+
+
+class NDJSONParser(BaseParser):
+    """
+    Newline-delimited JSON parser.
+    Returns a generator so large gateway uploads are never held in memory at once.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return iter(())
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        return iter_ndjson(stream, encoding)
@@ -4,7 +4,7 @@ IoT integration serializers
 from rest_framework import serializers
 from .models import (
     RFIDReader, RFIDLog, CCTVCamera, CCTVFeed,
-    Sensor, SensorReading, IncidentValidation
+    Sensor, SensorReading, IncidentValidation, ValidationJob
 )
 
 
@@ -72,3 +72,14 @@ class IncidentValidationSerializer(serializers.ModelSerializer):
         fields = ['id', 'incident_id', 'validation_source', 'confidence_score',
                  'validation_status', 'correlation_details', 'validated_at']
         read_only_fields = ['id', 'validated_at']
+
+
+class ValidationJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.UUIDField(source='id', read_only=True)
+    incident_id = serializers.CharField(source='incident.incident_id', read_only=True)
+    
+    class Meta:
+        model = ValidationJob
+        fields = ['job_id', 'incident_id', 'status', 'result', 'error',
+                 'created_at', 'started_at', 'completed_at']
+        read_only_fields = fields
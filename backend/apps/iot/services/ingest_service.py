@@ -0,0 +1,475 @@
+"""
+High-volume IoT ingest service
+Bulk-writes RFID reads and sensor readings pushed by gateways without one round-trip per row
+"""
+import io
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.core.geo import geohash_or_blank
+from apps.iot.models import RFIDReader, RFIDLog, Sensor, SensorReading
+from apps.iot.signals import sensor_readings_ingested
+
+
+def iter_records(data):
+    """
+    Normalise a parsed request body into (index, record, error) tuples.
+    Accepts a JSON array, a single JSON object, or the generator produced by NDJSONParser.
+    """
+    if isinstance(data, dict):
+        data = [data] if data else []
+    for index, item in enumerate(data, start=1):
+        if isinstance(item, tuple):
+            yield item
+        elif isinstance(item, dict):
+            yield index, item, None
+        else:
+            yield index, None, 'Each record must be a JSON object'
+
+
+def chunked(iterable, size):
+    """Yield lists of at most `size` items from any iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_timestamp(value):
+    """Parse an ISO-8601 timestamp into an aware datetime, or return None"""
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str):
+        parsed = parse_datetime(value)
+    else:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def to_decimal(value, places):
+    """Coerce a JSON number/string to a quantized Decimal (None stays None)"""
+    if value is None or value == '':
+        return None
+    try:
+        number = Decimal(str(value))
+        if not number.is_finite():
+            raise ValueError
+        return number.quantize(Decimal(1).scaleb(-places))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f'Invalid decimal value: {value!r}')
+
+
+class DeviceCache:
+    """
+    In-process device ID -> row values cache (e.g. reader_id -> RFIDReader.pk).
+    Misses for a whole batch are resolved in a single query; entries expire after `ttl` seconds.
+    """
+
+    def __init__(self, model, lookup_field, value_fields=('pk',), ttl=300):
+        self.model = model
+        self.lookup_field = lookup_field
+        self.value_fields = list(value_fields)
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, device_ids):
+        """Return {device_id: value} for every known device in `device_ids`"""
+        now = time.monotonic()
+        resolved = {}
+        missing = set()
+        with self._lock:
+            for device_id in device_ids:
+                entry = self._entries.get(device_id)
+                if entry and entry[1] > now:
+                    resolved[device_id] = entry[0]
+                else:
+                    missing.add(device_id)
+
+        if missing:
+            rows = self.model.objects.filter(
+                **{f'{self.lookup_field}__in': missing}
+            ).values_list(self.lookup_field, *self.value_fields)
+            fetched = {
+                row[0]: row[1] if len(row) == 2 else row[1:]
+                for row in rows
+            }
+            expires = now + self.ttl
+            with self._lock:
+                for device_id, value in fetched.items():
+                    self._entries[device_id] = (value, expires)
+            resolved.update(fetched)
+        return resolved
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Reads without their own coordinates are placed at their reader
+reader_cache = DeviceCache(RFIDReader, 'reader_id', ('pk', 'latitude', 'longitude', 'geohash'))
+sensor_cache = DeviceCache(Sensor, 'sensor_id', ('pk', 'sensor_type'))
+
+
+class RFIDIngestService:
+    """
+    Bulk ingest of RFID reads.
+    Uses PostgreSQL COPY when available, otherwise chunked bulk_create.
+    """
+
+    BATCH_SIZE = getattr(settings, 'IOT_INGEST_BATCH_SIZE', 5000)
+    MAX_REPORTED_ERRORS = 100
+
+    COPY_COLUMNS = [
+        'reader_id', 'vehicle_tag', 'vehicle_registration', 'timestamp',
+        'latitude', 'longitude', 'geohash', 'direction', 'lane', 'speed',
+        'vehicle_type', 'vehicle_class', 'created_at',
+    ]
+
+    def __init__(self, cache=None, use_copy=None):
+        self.cache = cache or reader_cache
+        if use_copy is None:
+            use_copy = connection.vendor == 'postgresql'
+        self.use_copy = use_copy
+
+    def ingest(self, records) -> dict:
+        """
+        Ingest an iterable of (index, record, error) tuples.
+
+        Returns:
+            dict with received, created, rejected counts and the first errors
+        """
+        received = 0
+        created = 0
+        errors = []
+        rejected = 0
+
+        for chunk in chunked(records, self.BATCH_SIZE):
+            received += len(chunk)
+            rows, chunk_errors = self._build_rows(chunk)
+            rejected += len(chunk_errors)
+            if len(errors) < self.MAX_REPORTED_ERRORS:
+                errors.extend(chunk_errors[:self.MAX_REPORTED_ERRORS - len(errors)])
+            if rows:
+                self._write(rows)
+                created += len(rows)
+
+        return {
+            'received': received,
+            'created': created,
+            'rejected': rejected,
+            'errors': errors,
+        }
+
+    def _build_rows(self, chunk):
+        """Validate a chunk and turn it into RFIDLog rows (one reader lookup per chunk)"""
+        reader_ids = {
+            str(record.get('reader_id'))
+            for _, record, error in chunk
+            if record is not None and record.get('reader_id')
+        }
+        readers = self.cache.resolve(reader_ids)
+
+        rows = []
+        errors = []
+        for index, record, error in chunk:
+            if error:
+                errors.append({'index': index, 'error': error})
+                continue
+            try:
+                rows.append(self._build_log(record, readers))
+            except ValueError as e:
+                errors.append({'index': index, 'error': str(e)})
+        return rows, errors
+
+    def _build_log(self, record, readers):
+        reader_id = record.get('reader_id')
+        if not reader_id:
+            raise ValueError('reader_id is required')
+        reader = readers.get(str(reader_id))
+        if reader is None:
+            raise ValueError(f'Unknown reader_id: {reader_id}')
+        reader_pk, reader_latitude, reader_longitude, reader_geohash = reader
+
+        vehicle_tag = record.get('vehicle_tag')
+        if not vehicle_tag:
+            raise ValueError('vehicle_tag is required')
+
+        timestamp = parse_timestamp(record.get('timestamp'))
+        if timestamp is None:
+            raise ValueError('timestamp is required and must be ISO-8601')
+
+        lane = record.get('lane')
+        if lane is not None:
+            try:
+                lane = int(lane)
+            except (TypeError, ValueError):
+                raise ValueError(f'Invalid lane: {lane!r}')
+
+        latitude = to_decimal(record.get('latitude'), 6)
+        longitude = to_decimal(record.get('longitude'), 6)
+        if latitude is None or longitude is None:
+            latitude, longitude, geohash = reader_latitude, reader_longitude, reader_geohash
+        else:
+            geohash = geohash_or_blank(latitude, longitude)
+
+        return RFIDLog(
+            reader_id=reader_pk,
+            vehicle_tag=str(vehicle_tag)[:255],
+            vehicle_registration=str(record.get('vehicle_registration') or '')[:255],
+            timestamp=timestamp,
+            latitude=latitude,
+            longitude=longitude,
+            geohash=geohash,
+            direction=str(record.get('direction') or '')[:20],
+            lane=lane,
+            speed=to_decimal(record.get('speed'), 2),
+            vehicle_type=str(record.get('vehicle_type') or '')[:50],
+            vehicle_class=str(record.get('vehicle_class') or '')[:20],
+        )
+
+    def _write(self, rows):
+        if self.use_copy:
+            self._copy(rows)
+        else:
+            RFIDLog.objects.bulk_create(rows, batch_size=self.BATCH_SIZE)
+
+    def _copy(self, rows):
+        """Stream rows into rfid_logs with COPY FROM STDIN"""
+        now = timezone.now()
+        buffer = io.StringIO()
+        for row in rows:
+            values = [
+                row.reader_id, row.vehicle_tag, row.vehicle_registration, row.timestamp,
+                row.latitude, row.longitude, row.geohash, row.direction, row.lane, row.speed,
+                row.vehicle_type, row.vehicle_class, now,
+            ]
+            buffer.write('\t'.join(self._copy_value(value) for value in values))
+            buffer.write('\n')
+        buffer.seek(0)
+
+        sql = 'COPY {table} ({columns}) FROM STDIN'.format(
+            table=connection.ops.quote_name(RFIDLog._meta.db_table),
+            columns=', '.join(connection.ops.quote_name(column) for column in self.COPY_COLUMNS),
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.copy_expert(sql, buffer)
+
+    @staticmethod
+    def _copy_value(value):
+        """Encode a value in PostgreSQL COPY text format"""
+        if value is None:
+            return '\\N'
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return (
+            str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r')
+        )
+
+
+def _scalar(minimum, maximum, *aliases):
+    """Schema for a single numeric reading stored as {'value': n} (or an alias key)"""
+    return {key: ('number', minimum, maximum) for key in ('value',) + aliases}
+
+
+# Accepted reading types and value keys per Sensor.sensor_type.
+# Numeric specs are ('number', min, max); text specs are ('text', allowed values or None).
+SENSOR_READING_SCHEMAS = {
+    'traffic_flow': {
+        'vehicle_count': _scalar(0, 100000, 'count'),
+        'speed': _scalar(0, 300, 'speed'),
+        'occupancy': _scalar(0, 100, 'occupancy'),
+    },
+    'weather': {
+        'temperature': _scalar(-30, 70, 'temperature'),
+        'humidity': _scalar(0, 100, 'humidity'),
+        'wind_speed': _scalar(0, 300, 'wind_speed'),
+        'precipitation': _scalar(0, 1000, 'precipitation', 'rainfall'),
+        'visibility': _scalar(0, 100000, 'visibility'),
+        'conditions': {
+            'temperature': ('number', -30, 70),
+            'humidity': ('number', 0, 100),
+            'rainfall': ('number', 0, 1000),
+            'wind_speed': ('number', 0, 300),
+            'visibility': ('number', 0, 100000),
+        },
+    },
+    'road_surface': {
+        'temperature': _scalar(-30, 90, 'temperature'),
+        'moisture': _scalar(0, 100, 'moisture'),
+        'roughness': _scalar(0, 100, 'roughness'),
+        'conditions': {
+            'condition': ('text', {'dry', 'wet', 'icy', 'flooded', 'debris', 'unknown'}),
+            'temperature': ('number', -30, 90),
+            'surface_type': ('text', None),
+            'roughness': ('number', 0, 100),
+        },
+    },
+    'air_quality': {
+        'pm25': _scalar(0, 1000),
+        'pm10': _scalar(0, 1000),
+        'no2': _scalar(0, 10000),
+        'co2': _scalar(0, 100000),
+    },
+    'vibration': {
+        'amplitude': _scalar(0, 10000),
+        'frequency': _scalar(0, 100000),
+    },
+}
+
+
+def validate_reading_value(sensor_type, reading_type, value):
+    """
+    Validate a reading value against the schema for its sensor type.
+    Bare numbers are wrapped as {'value': n}. Returns the normalised dict or raises ValueError.
+    """
+    schemas = SENSOR_READING_SCHEMAS.get(sensor_type)
+    if schemas is None:
+        raise ValueError(f'No reading schema for sensor type: {sensor_type}')
+    schema = schemas.get(reading_type)
+    if schema is None:
+        raise ValueError(f'Unsupported reading_type "{reading_type}" for {sensor_type} sensor')
+
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = {'value': value}
+    if not isinstance(value, dict) or not value:
+        raise ValueError('value must be a number or a non-empty object')
+
+    for key, item in value.items():
+        spec = schema.get(key)
+        if spec is None:
+            raise ValueError(f'Unexpected key "{key}" in value for {reading_type}')
+        if item is None:
+            continue
+        if spec[0] == 'number':
+            if isinstance(item, bool) or not isinstance(item, (int, float)):
+                raise ValueError(f'{key} must be numeric')
+            if not spec[1] <= item <= spec[2]:
+                raise ValueError(f'{key}={item} outside range [{spec[1]}, {spec[2]}]')
+        elif not isinstance(item, str) or (spec[1] is not None and item not in spec[1]):
+            raise ValueError(f'Invalid {key}: {item!r}')
+    return value
+
+
+class SensorReadingIngestService:
+    """
+    Streaming ingest of sensor readings.
+    Records are validated one at a time and flushed in bounded batches, so memory
+    stays proportional to the batch size rather than the upload size.
+    """
+
+    BATCH_SIZE = getattr(settings, 'SENSOR_INGEST_BATCH_SIZE', 1000)
+    # Errors reported across all batches of one upload; the rest are only counted
+    MAX_REPORTED_ERRORS = 100
+
+    def __init__(self, cache=None, batch_size=None):
+        self.cache = cache or sensor_cache
+        self.batch_size = batch_size or self.BATCH_SIZE
+
+    def ingest(self, records) -> dict:
+        """
+        Ingest an iterable of (index, record, error) tuples.
+
+        Returns:
+            dict with overall accepted/rejected counts and one report per batch
+            (batch errors list the first MAX_REPORTED_ERRORS of the upload)
+        """
+        batches = []
+        accepted = 0
+        rejected = 0
+        reported_errors = 0
+        for number, chunk in enumerate(chunked(records, self.batch_size), start=1):
+            report = self._ingest_batch(chunk, self.MAX_REPORTED_ERRORS - reported_errors)
+            reported_errors += len(report['errors'])
+            report['batch'] = number
+            accepted += report['accepted']
+            rejected += report['rejected']
+            batches.append(report)
+
+        return {
+            'accepted': accepted,
+            'rejected': rejected,
+            'batches': batches,
+        }
+
+    def _ingest_batch(self, chunk, max_errors):
+        sensor_ids = {
+            str(record.get('sensor_id'))
+            for _, record, error in chunk
+            if record is not None and record.get('sensor_id')
+        }
+        sensors = self.cache.resolve(sensor_ids)
+
+        rows = []
+        errors = []
+        rejected = 0
+        for index, record, error in chunk:
+            if not error:
+                try:
+                    rows.append(self._build_reading(record, sensors))
+                    continue
+                except ValueError as e:
+                    error = str(e)
+            rejected += 1
+            if len(errors) < max_errors:
+                errors.append({'index': index, 'error': error})
+
+        if rows:
+            SensorReading.objects.bulk_create(rows, batch_size=self.batch_size)
+            sensor_readings_ingested.send(sender=self.__class__, readings=rows)
+
+        return {
+            'first_index': chunk[0][0],
+            'last_index': chunk[-1][0],
+            'accepted': len(rows),
+            'rejected': rejected,
+            'errors': errors,
+        }
+
+    def _build_reading(self, record, sensors):
+        sensor_id = record.get('sensor_id')
+        if not sensor_id:
+            raise ValueError('sensor_id is required')
+        sensor = sensors.get(str(sensor_id))
+        if sensor is None:
+            raise ValueError(f'Unknown sensor_id: {sensor_id}')
+        sensor_pk, sensor_type = sensor
+
+        timestamp = parse_timestamp(record.get('timestamp'))
+        if timestamp is None:
+            raise ValueError('timestamp is required and must be ISO-8601')
+
+        reading_type = record.get('reading_type')
+        if not reading_type:
+            raise ValueError('reading_type is required')
+        value = validate_reading_value(sensor_type, reading_type, record.get('value'))
+
+        quality_score = to_decimal(record.get('quality_score'), 2)
+        if quality_score is not None and not 0 <= quality_score <= 100:
+            raise ValueError('quality_score must be between 0 and 100')
+
+        return SensorReading(
+            sensor_id=sensor_pk,
+            timestamp=timestamp,
+            reading_type=str(reading_type)[:50],
+            value=value,
+            unit=str(record.get('unit') or '')[:20],
+            quality_score=quality_score,
+            anomaly_detected=bool(record.get('anomaly_detected', False)),
+        )
@@ -0,0 +1,93 @@
+"""
+Latest reading per sensor
+Maintains SensorLatestReading on ingest and serves "current conditions" lookups
+"""
+from django.db import connection
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from apps.iot.models import Sensor, SensorLatestReading, SensorReading
+
+LATEST_FIELDS = ['timestamp', 'reading_type', 'value', 'unit', 'quality_score', 'anomaly_detected']
+
+
+class LatestReadingService:
+    """
+    Upserts the newest reading of each sensor and reads it back in O(sensors).
+
+    Writes use INSERT ... ON CONFLICT DO UPDATE guarded by the stored timestamp, so
+    late or out-of-order batches never replace a newer reading.
+    """
+    UPSERT_BATCH_SIZE = 500
+
+    def record(self, readings):
+        """Store the newest of `readings` (SensorReading instances) per sensor"""
+        newest = {}
+        for reading in readings:
+            current = newest.get(reading.sensor_id)
+            if current is None or reading.timestamp >= current.timestamp:
+                newest[reading.sensor_id] = reading
+        if not newest:
+            return 0
+
+        rows = list(newest.items())
+        for start in range(0, len(rows), self.UPSERT_BATCH_SIZE):
+            self._upsert(rows[start:start + self.UPSERT_BATCH_SIZE])
+        return len(rows)
+
+    def _upsert(self, rows):
+        opts = SensorLatestReading._meta
+        fields = [opts.get_field(name) for name in LATEST_FIELDS + ['updated_at']]
+        columns = [opts.get_field('sensor').column] + [field.column for field in fields]
+        quote = connection.ops.quote_name
+        table = quote(opts.db_table)
+        now = timezone.now()
+
+        params = []
+        for sensor_id, reading in rows:
+            params.append(sensor_id)
+            for field in fields:
+                value = now if field.name == 'updated_at' else getattr(reading, field.name)
+                params.append(field.get_db_prep_save(value, connection))
+
+        row = '(%s)' % ', '.join(['%s'] * len(columns))
+        updates = ', '.join(f'{quote(column)} = excluded.{quote(column)}' for column in columns[1:])
+        timestamp = quote(opts.get_field('timestamp').column)
+        sql = (
+            f'INSERT INTO {table} ({", ".join(quote(column) for column in columns)}) '
+            f'VALUES {", ".join([row] * len(rows))} '
+            f'ON CONFLICT ({quote(columns[0])}) DO UPDATE SET {updates} '
+            f'WHERE excluded.{timestamp} >= {table}.{timestamp}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def for_sensor_type(self, sensor_type, active_only=True):
+        """Latest readings (with their sensor) for every sensor of a type that has reported"""
+        queryset = SensorLatestReading.objects.filter(sensor__sensor_type=sensor_type).select_related('sensor')
+        if active_only:
+            queryset = queryset.filter(sensor__status='active')
+        return queryset.order_by('sensor__sensor_id')
+
+    def for_sensors(self, sensor_ids):
+        """{sensor pk: SensorLatestReading} for the given sensor primary keys"""
+        return SensorLatestReading.objects.in_bulk(list(sensor_ids))
+
+    def rebuild(self, sensor_ids=None):
+        """Recompute the store from SensorReading (one index lookup per sensor)"""
+        sensors = Sensor.objects.all()
+        if sensor_ids:
+            sensors = sensors.filter(pk__in=sensor_ids)
+        latest_ids = sensors.annotate(
+            latest_reading_id=Subquery(
+                SensorReading.objects.filter(sensor=OuterRef('pk')).order_by('-timestamp', '-id').values('id')[:1]
+            )
+        ).exclude(latest_reading_id=None).values_list('latest_reading_id', flat=True)
+
+        latest_ids = list(latest_ids)
+        stored = 0
+        for start in range(0, len(latest_ids), self.UPSERT_BATCH_SIZE):
+            stored += self.record(
+                SensorReading.objects.filter(pk__in=latest_ids[start:start + self.UPSERT_BATCH_SIZE])
+            )
+        return stored
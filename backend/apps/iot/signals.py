@@ -0,0 +1,32 @@
+"""
+IoT signals
+"""
+from django.db.models.signals import post_save
+from django.dispatch import Signal, receiver
+
+# Sent after a batch of SensorReading rows is written with bulk_create (no post_save fires).
+# Receivers get `readings`: the list of SensorReading instances just stored.
+sensor_readings_ingested = Signal()
+
+
+@receiver(post_save, sender='incidents.Incident')
+def validate_new_incident(sender, instance, created, **kwargs):
+    """Queue multi-source validation for every newly reported incident"""
+    if created and not kwargs.get('raw'):
+        from .tasks import enqueue_validation
+        enqueue_validation(instance, requested_by_id=instance.reporter_id)
+
+
+@receiver(post_save, sender='iot.SensorReading')
+def store_latest_saved_reading(sender, instance, created, **kwargs):
+    """Keep the per-sensor latest reading store current for individually saved readings"""
+    if not kwargs.get('raw'):
+        from .services.latest_reading_service import LatestReadingService
+        LatestReadingService().record([instance])
+
+
+@receiver(sensor_readings_ingested)
+def store_latest_ingested_readings(sender, readings, **kwargs):
+    """Keep the per-sensor latest reading store current for bulk-ingested readings"""
+    from .services.latest_reading_service import LatestReadingService
+    LatestReadingService().record(readings)
@@ -0,0 +1,56 @@
+"""
+IoT background tasks
+"""
+from celery import shared_task
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.core import partitioning
+from apps.incidents.models import Incident, VerificationStatus
+from .models import ValidationJob
+from .services.validation_service import IncidentValidationService
+
+
+def enqueue_validation(incident, requested_by_id=None):
+    """Create a ValidationJob and dispatch it once the current transaction commits"""
+    job = ValidationJob.objects.create(incident=incident, requested_by_id=requested_by_id)
+    transaction.on_commit(lambda: run_validation_job.delay(str(job.pk)))
+    return job
+
+
+@shared_task
+def run_validation_job(job_id):
+    """Run IncidentValidationService for a queued job and store the verdict"""
+    job = ValidationJob.objects.select_related('incident').get(pk=job_id)
+    ValidationJob.objects.filter(pk=job.pk).update(status='running', started_at=timezone.now())
+    
+    try:
+        service = IncidentValidationService()
+        result = service.validate_incident(job.incident)
+        
+        # Update incident with validation results; a human verdict is never overridden
+        incident = Incident.objects.get(pk=job.incident_id)
+        incident.ai_confidence_score = result['confidence_score']
+        update_fields = ['ai_confidence_score', 'updated_at']
+        if incident.verification_status == VerificationStatus.PENDING:
+            incident.verification_status = service.incident_verification_status(result['validation_status'])
+            update_fields.append('verification_status')
+        incident.save(update_fields=update_fields)
+    except Exception as e:
+        ValidationJob.objects.filter(pk=job.pk).update(
+            status='failed', error=str(e), completed_at=timezone.now()
+        )
+        raise
+    
+    ValidationJob.objects.filter(pk=job.pk).update(
+        status='completed', result=result, completed_at=timezone.now()
+    )
+    return result
+
+
+@shared_task
+def maintain_partitions():
+    """Periodic partition upkeep for rfid_logs / sensor_readings (see IOT_PARTITIONS)"""
+    with transaction.atomic():
+        report = partitioning.maintain_partitions(connection)
+    return report
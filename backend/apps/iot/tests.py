@@ -0,0 +1,260 @@
+"""
+IoT tests
+"""
+import json
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.renderers import FastJSONRenderer
+from apps.core.serializers import ValuesSerializer
+from apps.core.testing import assert_list_queries_constant
+from apps.incidents.models import Incident, IncidentSeverity, IncidentType
+from apps.users.models import User
+from .models import CCTVCamera, CCTVFeed, RFIDLog, RFIDReader, Sensor, SensorReading
+from .serializers import RFIDLogSerializer, SensorReadingSerializer
+from .services.ingest_service import DeviceCache, RFIDIngestService, SensorReadingIngestService, to_decimal
+from .services.validation_service import IncidentValidationService
+
+LOCATION = {'latitude': Decimal('-1.286389'), 'longitude': Decimal('36.817223')}
+
+
+def ndjson(records):
+    return '\n'.join(json.dumps(record) for record in records)
+
+
+class SensorReadingIngestTests(TestCase):
+    """NDJSON sensor ingest rejects bad rows one at a time"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='gateway', email='gateway@example.com', password=None, role='system_admin',
+        )
+        cls.sensor = Sensor.objects.create(sensor_id='SENSOR-1', sensor_type='traffic_flow', **LOCATION)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def reading(self, **fields):
+        return {
+            'sensor_id': 'SENSOR-1', 'timestamp': timezone.now().isoformat(),
+            'reading_type': 'speed', 'value': 62.5, **fields,
+        }
+
+    def post(self, records):
+        return self.client.post(
+            '/api/iot/sensors/readings/ingest/', ndjson(records), content_type='application/x-ndjson',
+        )
+
+    def test_non_finite_quality_score_rejects_only_its_row(self):
+        response = self.post([
+            self.reading(quality_score='NaN'),
+            self.reading(quality_score='Infinity'),
+            self.reading(quality_score=90),
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['accepted'], response.data['rejected']), (1, 2))
+        self.assertEqual([error['index'] for error in response.data['batches'][0]['errors']], [1, 2])
+        self.assertEqual(SensorReading.objects.count(), 1)
+
+    def test_to_decimal_rejects_non_finite_values(self):
+        for value in ('NaN', 'sNaN', 'Infinity', '-inf'):
+            with self.assertRaises(ValueError):
+                to_decimal(value, 2)
+        self.assertEqual(to_decimal('1.005', 2), Decimal('1.00'))
+
+    def test_reported_errors_are_capped_across_batches(self):
+        service = SensorReadingIngestService(batch_size=50)
+        records = [(index, self.reading(sensor_id='UNKNOWN'), None) for index in range(1, 301)]
+        result = service.ingest(records)
+
+        self.assertEqual(result['rejected'], 300)
+        self.assertEqual([batch['rejected'] for batch in result['batches']], [50] * 6)
+        self.assertEqual(sum(len(batch['errors']) for batch in result['batches']), service.MAX_REPORTED_ERRORS)
+
+
+class ValidationJobStatusTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            username='dispatcher', email='dispatcher@example.com', password=None, role='dispatcher',
+        ))
+
+    def test_unknown_or_malformed_job_id_is_not_found(self):
+        for job_id in (uuid.uuid4(), 'abc', '1234-', 'deadbeef'):
+            response = self.client.get(f'/api/iot/validation/jobs/{job_id}/')
+            self.assertEqual(response.status_code, 404, job_id)
+
+
+class RFIDCorrelationTests(TestCase):
+    """Reads that carry only a reader id are located at their reader"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = RFIDReader.objects.create(reader_id='RFID-1', **LOCATION)
+        cls.far_reader = RFIDReader.objects.create(
+            reader_id='RFID-2', latitude=Decimal('-0.5'), longitude=Decimal('36.0'),
+        )
+        incident_type = IncidentType.objects.create(name='Collision', category='accident')
+        severity = IncidentSeverity.objects.create(
+            level='P2', name='High', description='High severity', response_time_target_minutes=15,
+            escalation_time_minutes=30, priority_score=3,
+        )
+        cls.incident = Incident.objects.create(
+            incident_id='INC-00001', incident_type=incident_type, severity=severity,
+            description='Two vehicles collided at the junction', timestamp=timezone.now(),
+            latitude=LOCATION['latitude'] + Decimal('0.001'), longitude=LOCATION['longitude'],
+        )
+
+    def ingest(self, *records):
+        # A fresh cache: the module-level one would outlive this test's rows
+        cache = DeviceCache(RFIDReader, 'reader_id', ('pk', 'latitude', 'longitude', 'geohash'))
+        service = RFIDIngestService(cache=cache, use_copy=False)
+        return service.ingest((index, record, None) for index, record in enumerate(records, start=1))
+
+    def test_ingested_log_without_coordinates_takes_its_readers(self):
+        timestamp = timezone.now().isoformat()
+        result = self.ingest(
+            {'reader_id': 'RFID-1', 'vehicle_tag': 'tag-a', 'timestamp': timestamp},
+            {'reader_id': 'RFID-1', 'vehicle_tag': 'tag-b', 'timestamp': timestamp, 'latitude': -1.3, 'longitude': 36.9},
+        )
+        self.assertEqual(result['created'], 2)
+
+        located = RFIDLog.objects.get(vehicle_tag='tag-a')
+        self.assertEqual((located.latitude, located.longitude), (self.reader.latitude, self.reader.longitude))
+        self.assertEqual(located.geohash, self.reader.geohash)
+        own = RFIDLog.objects.get(vehicle_tag='tag-b')
+        self.assertEqual(own.latitude, Decimal('-1.300000'))
+
+    def test_saved_log_without_coordinates_takes_its_readers(self):
+        log = RFIDLog.objects.create(reader=self.reader, vehicle_tag='tag-a', timestamp=timezone.now())
+        self.assertEqual(log.geohash, self.reader.geohash)
+
+    def test_coordinate_less_logs_at_a_nearby_reader_count(self):
+        service = IncidentValidationService()
+        self.assertEqual(service._check_rfid_correlation(self.incident), 0)
+
+        self.ingest(*[
+            {'reader_id': reader_id, 'vehicle_tag': f'{reader_id}-{n}',
+             'timestamp': (self.incident.timestamp - timedelta(minutes=n)).isoformat()}
+            for reader_id in ('RFID-1', 'RFID-2') for n in range(3)
+        ])
+        # Only the three reads at the nearby reader
+        self.assertEqual(service._check_rfid_correlation(self.incident), service._rfid_score(3))
+
+
+class IoTListQueryTests(TestCase):
+    """Device ids in list rows come from the list query, not one query per row"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='operator', email='operator@example.com', password=None, role='tmc_operator',
+        )
+        incident_type = IncidentType.objects.create(name='Collision', category='accident')
+        severity = IncidentSeverity.objects.create(
+            level='P2', name='High', description='High severity', response_time_target_minutes=15,
+            escalation_time_minutes=30, priority_score=3,
+        )
+        now = timezone.now()
+        for n in range(50):
+            timestamp = now - timedelta(minutes=n)
+            reader = RFIDReader.objects.create(reader_id=f'RFID-{n}', **LOCATION)
+            RFIDLog.objects.create(reader=reader, vehicle_tag=f'tag-{n}', timestamp=timestamp)
+            sensor = Sensor.objects.create(sensor_id=f'SENSOR-{n}', sensor_type='traffic_flow', **LOCATION)
+            SensorReading.objects.create(
+                sensor=sensor, timestamp=timestamp, reading_type='speed', value={'value': 60}, unit='km/h',
+            )
+            camera = CCTVCamera.objects.create(camera_id=f'CAM-{n}', **LOCATION)
+            incident = Incident.objects.create(
+                incident_id=f'INC-{n:05d}', incident_type=incident_type, severity=severity,
+                description='Two vehicles collided at the junction', timestamp=timestamp,
+                latitude=LOCATION['latitude'] - Decimal(n) / 100, longitude=LOCATION['longitude'],
+            )
+            CCTVFeed.objects.create(
+                camera=camera, incident=incident, start_time=timestamp, end_time=timestamp + timedelta(minutes=5),
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_rfid_log_list(self):
+        assert_list_queries_constant(self.client, '/api/iot/rfid/logs/')
+
+    def test_sensor_reading_list(self):
+        assert_list_queries_constant(self.client, '/api/iot/sensors/readings/')
+
+    def test_cctv_feed_list(self):
+        assert_list_queries_constant(self.client, '/api/iot/cctv/feeds/')
+
+
+class FastListSerializationTests(TestCase):
+    """The .values() list path returns the same body as the DRF serializer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='operator', email='operator@example.com', password=None, role='tmc_operator',
+        )
+        reader = RFIDReader.objects.create(reader_id='RFID-1', **LOCATION)
+        sensor = Sensor.objects.create(sensor_id='SENSOR-1', sensor_type='air_quality', **LOCATION)
+        timestamps = [
+            datetime(2026, 3, 1, 8, 30, tzinfo=dt_timezone.utc),
+            datetime(2026, 3, 1, 11, 45, 12, 345678, tzinfo=dt_timezone(timedelta(hours=3))),
+            datetime(2026, 3, 1, 23, 59, 59, 1, tzinfo=dt_timezone(timedelta(hours=-5))),
+        ]
+        RFIDLog.objects.bulk_create([
+            RFIDLog(reader=reader, vehicle_tag='tag-a', timestamp=timestamps[0], latitude=None, longitude=None),
+            RFIDLog(reader=reader, vehicle_tag='tag-b', timestamp=timestamps[1], direction='north', lane=2,
+                    speed=Decimal('48.50'), vehicle_type='car', latitude=Decimal('-1.300000'),
+                    longitude=Decimal('36.9')),
+            RFIDLog(reader=reader, vehicle_tag='tag-ü', timestamp=timestamps[2], speed=Decimal('0'), **LOCATION),
+        ])
+        SensorReading.objects.bulk_create([
+            SensorReading(sensor=sensor, timestamp=timestamps[0], reading_type='pm25', value={}),
+            SensorReading(sensor=sensor, timestamp=timestamps[1], reading_type='pm25', unit='µg/m³',
+                          value={'value': 12.5, 'samples': [1, 2.25, None]}, quality_score=Decimal('97.5')),
+            SensorReading(sensor=sensor, timestamp=timestamps[2], reading_type='pm25', value={'value': 1e-7},
+                          anomaly_detected=True, quality_score=Decimal('0.00')),
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_same_body(self, url):
+        regular = self.client.get(url)
+        # Same URL either way, so the pagination links match too
+        with override_settings(FAST_LIST_SERIALIZATION=True):
+            fast = self.client.get(url)
+
+        self.assertEqual(regular.status_code, 200)
+        self.assertIsInstance(fast.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(len(regular.json()['results']), 3)
+        self.assertEqual(fast.content, regular.content)
+
+    def assert_same_data(self, serializer_class, queryset):
+        values_serializer = ValuesSerializer(serializer_class)
+        rows = values_serializer.values(queryset)
+        self.assertEqual(values_serializer.to_representation(rows), serializer_class(queryset, many=True).data)
+
+    def test_rfid_log_list(self):
+        self.assert_same_body('/api/iot/rfid/logs/')
+        self.assert_same_data(RFIDLogSerializer, RFIDLog.objects.select_related('reader').order_by('pk'))
+
+    def test_sensor_reading_list(self):
+        self.assert_same_body('/api/iot/sensors/readings/')
+        self.assert_same_data(SensorReadingSerializer, SensorReading.objects.select_related('sensor').order_by('pk'))
+
+    @override_settings(FAST_LIST_SERIALIZATION=True)
+    def test_query_param_opts_out(self):
+        response = self.client.get('/api/iot/rfid/logs/?fast=0')
+        self.assertNotIsInstance(response.accepted_renderer, FastJSONRenderer)
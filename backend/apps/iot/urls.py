@@ -17,8 +17,9 @@ router.register(r'rfid/readers', RFIDReaderViewSet, basename='rfid-reader')
 router.register(r'rfid/logs', RFIDLogViewSet, basename='rfid-log')
 router.register(r'cctv/cameras', CCTVCameraViewSet, basename='cctv-camera')
 router.register(r'cctv/feeds', CCTVFeedViewSet, basename='cctv-feed')
-router.register(r'sensors', SensorViewSet, basename='sensor')
+# Readings must be registered before sensors so 'readings' is not captured as a sensor_id
 router.register(r'sensors/readings', SensorReadingViewSet, basename='sensor-reading')
+router.register(r'sensors', SensorViewSet, basename='sensor')
 router.register(r'validation', IncidentValidationViewSet, basename='incident-validation')
 
 urlpatterns = [
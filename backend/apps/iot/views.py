@@ -3,20 +3,28 @@ IoT integration views
 """
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from django.shortcuts import get_object_or_404
 
 from .models import (
     RFIDReader, RFIDLog, CCTVCamera, CCTVFeed,
-    Sensor, SensorReading, IncidentValidation
+    Sensor, SensorReading, IncidentValidation, ValidationJob
 )
 from .serializers import (
     RFIDReaderSerializer, RFIDLogSerializer, CCTVCameraSerializer,
     CCTVFeedSerializer, SensorSerializer, SensorReadingSerializer,
-    IncidentValidationSerializer
+    IncidentValidationSerializer, ValidationJobSerializer
 )
+from apps.core.exports import ExportMixin
+from apps.core.filters import TimeRangeFilter
+from apps.core.mixins import FastListMixin
+from apps.core.pagination import TimeKeysetPagination
 from apps.incidents.models import Incident
-from .services.validation_service import IncidentValidationService
+from .parsers import NDJSONParser
+from .tasks import enqueue_validation
+from .services.ingest_service import RFIDIngestService, SensorReadingIngestService, iter_records
 
 
 class RFIDReaderViewSet(viewsets.ModelViewSet):
@@ -27,11 +35,19 @@ class RFIDReaderViewSet(viewsets.ModelViewSet):
     lookup_field = 'reader_id'
 
 
-class RFIDLogViewSet(viewsets.ReadOnlyModelViewSet):
+class RFIDLogViewSet(ExportMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     """RFID log queries"""
-    queryset = RFIDLog.objects.all()
+    queryset = RFIDLog.objects.select_related('reader')
     serializer_class = RFIDLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimeKeysetPagination
+    filter_backends = [*api_settings.DEFAULT_FILTER_BACKENDS, TimeRangeFilter]
+    export_fields = [
+        ('id', 'id'), ('reader_id', 'reader__reader_id'), ('vehicle_tag', 'vehicle_tag'),
+        ('timestamp', 'timestamp'), ('direction', 'direction'), ('lane', 'lane'), ('speed', 'speed'),
+        ('vehicle_type', 'vehicle_type'), ('vehicle_class', 'vehicle_class'),
+        ('latitude', 'latitude'), ('longitude', 'longitude'),
+    ]
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -40,6 +56,18 @@ class RFIDLogViewSet(viewsets.ReadOnlyModelViewSet):
         if reader_id:
             queryset = queryset.filter(reader__reader_id=reader_id)
         return queryset
+    
+    @action(detail=False, methods=['post'], url_path='bulk',
+            parser_classes=[JSONParser, NDJSONParser])
+    def bulk_ingest(self, request):
+        """Bulk ingest RFID reads from reader gateways (JSON array or NDJSON)"""
+        result = RFIDIngestService().ingest(iter_records(request.data))
+        
+        if result['received'] == 0:
+            return Response({'error': 'No records supplied.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response_status = status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(result, status=response_status)
 
 
 class CCTVCameraViewSet(viewsets.ModelViewSet):
@@ -52,7 +80,7 @@ class CCTVCameraViewSet(viewsets.ModelViewSet):
 
 class CCTVFeedViewSet(viewsets.ModelViewSet):
     """CCTV feed management"""
-    queryset = CCTVFeed.objects.all()
+    queryset = CCTVFeed.objects.select_related('camera', 'incident')
     serializer_class = CCTVFeedSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -74,11 +102,18 @@ class SensorViewSet(viewsets.ModelViewSet):
     lookup_field = 'sensor_id'
 
 
-class SensorReadingViewSet(viewsets.ReadOnlyModelViewSet):
+class SensorReadingViewSet(ExportMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     """Sensor reading queries"""
-    queryset = SensorReading.objects.all()
+    queryset = SensorReading.objects.select_related('sensor')
     serializer_class = SensorReadingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimeKeysetPagination
+    filter_backends = [*api_settings.DEFAULT_FILTER_BACKENDS, TimeRangeFilter]
+    export_fields = [
+        ('id', 'id'), ('sensor_id', 'sensor__sensor_id'), ('sensor_type', 'sensor__sensor_type'),
+        ('timestamp', 'timestamp'), ('reading_type', 'reading_type'), ('value', 'value'),
+        ('unit', 'unit'), ('anomaly_detected', 'anomaly_detected'), ('quality_score', 'quality_score'),
+    ]
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -86,27 +121,42 @@ class SensorReadingViewSet(viewsets.ReadOnlyModelViewSet):
         if sensor_id:
             queryset = queryset.filter(sensor__sensor_id=sensor_id)
         return queryset
+    
+    @action(detail=False, methods=['post'], url_path='ingest',
+            parser_classes=[NDJSONParser, JSONParser])
+    def ingest(self, request):
+        """Stream sensor readings (NDJSON) into the database in bounded batches"""
+        result = SensorReadingIngestService().ingest(iter_records(request.data))
+        
+        if not result['batches']:
+            return Response({'error': 'No records supplied.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response_status = status.HTTP_201_CREATED if result['accepted'] else status.HTTP_400_BAD_REQUEST
+        return Response(result, status=response_status)
 
 
 class IncidentValidationViewSet(viewsets.ModelViewSet):
     """Incident validation management"""
-    queryset = IncidentValidation.objects.all()
+    queryset = IncidentValidation.objects.select_related('incident')
     serializer_class = IncidentValidationSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     @action(detail=False, methods=['post'])
-    def validate_incident(self, request):
-        """Trigger multi-source validation for an incident"""
-        incident_id = request.data.get('incident_id')
+    def validate_incident(self, request, incident_id=None):
+        """Queue multi-source validation for an incident; returns a job id immediately"""
+        incident_id = incident_id or request.data.get('incident_id')
         incident = get_object_or_404(Incident, incident_id=incident_id)
         
-        # Run validation service
-        service = IncidentValidationService()
-        result = service.validate_incident(incident)
+        job = enqueue_validation(incident, requested_by_id=request.user.pk)
         
-        # Update incident with validation results
-        incident.verification_status = result['validation_status']
-        incident.ai_confidence_score = result['confidence_score']
-        incident.save()
-        
-        return Response(result, status=status.HTTP_200_OK)
+        return Response({
+            'job_id': str(job.pk),
+            'incident_id': incident.incident_id,
+            'status': job.status,
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'], url_path=r'jobs/(?P<job_id>[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})')
+    def job_status(self, request, job_id=None):
+        """Get the status and verdict of a validation job"""
+        job = get_object_or_404(ValidationJob.objects.select_related('incident'), pk=job_id)
+        return Response(ValidationJobSerializer(job).data)
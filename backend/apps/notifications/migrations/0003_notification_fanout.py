@@ -0,0 +1,74 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(choices=[('sms', 'SMS'), ('email', 'Email'), ('push', 'Push')], max_length=10, verbose_name='channel')),
+                ('address', models.CharField(help_text='Phone number, email address or user ID', max_length=254, verbose_name='address')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10, verbose_name='status')),
+                ('provider', models.CharField(blank=True, max_length=50, verbose_name='provider')),
+                ('provider_message_id', models.CharField(blank=True, max_length=100, verbose_name='provider message ID')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='attempts')),
+                ('error', models.TextField(blank=True, verbose_name='error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='sent at')),
+            ],
+            options={
+                'verbose_name': 'notification delivery',
+                'verbose_name_plural': 'notification deliveries',
+                'db_table': 'notification_deliveries',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RegionSubscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(db_index=True, max_length=12, verbose_name='region')),
+                ('channels', models.JSONField(blank=True, default=list, help_text='Delivery channels besides in-app, e.g. ["push", "sms"]', verbose_name='channels')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+            ],
+            options={
+                'verbose_name': 'region subscription',
+                'verbose_name_plural': 'region subscriptions',
+                'db_table': 'notification_region_subscriptions',
+                'ordering': ['region'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'is_read'], name='notificatio_recipie_4e3567_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificationdelivery',
+            name='notification',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='notifications.notification'),
+        ),
+        migrations.AddField(
+            model_name='regionsubscription',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='region_subscriptions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='notificationdelivery',
+            index=models.Index(fields=['status', 'channel'], name='notificatio_status_41c368_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='regionsubscription',
+            unique_together={('user', 'region')},
+        ),
+    ]
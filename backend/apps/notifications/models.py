@@ -12,3 +12,67 @@ class Notification(models.Model):
     is_read = models.BooleanField(_('is read'), default=False)
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Rebuilding a recipient's unread counter
+            models.Index(fields=['recipient', 'is_read']),
+        ]
+
+
+class DeliveryChannel(models.TextChoices):
+    """Out-of-app delivery channels"""
+    SMS = 'sms', _('SMS')
+    EMAIL = 'email', _('Email')
+    PUSH = 'push', _('Push')
+
+
+class DeliveryStatus(models.TextChoices):
+    """Delivery status enumeration"""
+    PENDING = 'pending', _('Pending')
+    SENT = 'sent', _('Sent')
+    FAILED = 'failed', _('Failed')
+
+
+class NotificationDelivery(models.Model):
+    """One notification sent over one channel (SMS, email or push)"""
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='deliveries')
+    channel = models.CharField(_('channel'), max_length=10, choices=DeliveryChannel.choices)
+    address = models.CharField(_('address'), max_length=254, help_text=_('Phone number, email address or user ID'))
+    status = models.CharField(_('status'), max_length=10, choices=DeliveryStatus.choices, default=DeliveryStatus.PENDING)
+    provider = models.CharField(_('provider'), max_length=50, blank=True)
+    provider_message_id = models.CharField(_('provider message ID'), max_length=100, blank=True)
+    attempts = models.PositiveSmallIntegerField(_('attempts'), default=0)
+    error = models.TextField(_('error'), blank=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    sent_at = models.DateTimeField(_('sent at'), null=True, blank=True)
+
+    class Meta:
+        db_table = 'notification_deliveries'
+        verbose_name = _('notification delivery')
+        verbose_name_plural = _('notification deliveries')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'channel']),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} -> {self.address} ({self.status})"
+
+
+class RegionSubscription(models.Model):
+    """A user following alerts for a region (geohash cell of REALTIME_REGION_PRECISION)"""
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='region_subscriptions')
+    region = models.CharField(_('region'), max_length=12, db_index=True)
+    channels = models.JSONField(_('channels'), default=list, blank=True,
+                                help_text=_('Delivery channels besides in-app, e.g. ["push", "sms"]'))
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        db_table = 'notification_region_subscriptions'
+        verbose_name = _('region subscription')
+        verbose_name_plural = _('region subscriptions')
+        ordering = ['region']
+        unique_together = [['user', 'region']]
+
+    def __str__(self):
+        return f"{self.user.email} -> {self.region}"
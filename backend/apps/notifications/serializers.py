@@ -2,7 +2,11 @@
 Notification serializers
 """
 from rest_framework import serializers
-from .models import Notification
+
+from apps.core.events import REGION_PRECISION, REGION_RE
+from apps.incidents.models import Incident
+from apps.users.models import UserRole
+from .models import DeliveryChannel, Notification, RegionSubscription
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -13,3 +17,51 @@ class NotificationSerializer(serializers.ModelSerializer):
         fields = ['id', 'recipient_email', 'notification_type', 'title',
                  'message', 'is_read', 'created_at']
         read_only_fields = ['id', 'created_at']
+
+
+class RegionSubscriptionSerializer(serializers.ModelSerializer):
+    channels = serializers.ListField(
+        child=serializers.ChoiceField(choices=DeliveryChannel.choices), required=False, max_length=3,
+    )
+    
+    class Meta:
+        model = RegionSubscription
+        fields = ['id', 'region', 'channels', 'created_at']
+        read_only_fields = ['id', 'created_at']
+    
+    def validate_region(self, value):
+        value = value.strip().lower()
+        if not REGION_RE.match(value):
+            raise serializers.ValidationError(f'Region must be a geohash cell of {REGION_PRECISION} characters')
+        return value
+    
+    def validate_channels(self, value):
+        return sorted(set(value))
+
+
+class BroadcastSerializer(serializers.Serializer):
+    """Alert sent to everyone around an incident or point"""
+    title = serializers.CharField(max_length=200)
+    message = serializers.CharField()
+    notification_type = serializers.CharField(max_length=50, default='alert')
+    incident_id = serializers.CharField(required=False)
+    latitude = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    longitude = serializers.FloatField(required=False, min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(required=False, min_value=0.1, max_value=500)
+    roles = serializers.ListField(child=serializers.ChoiceField(choices=UserRole.choices), required=False, default=list)
+    channels = serializers.ListField(
+        child=serializers.ChoiceField(choices=DeliveryChannel.choices), required=False, default=list,
+    )
+    subscribers = serializers.BooleanField(default=True)
+    
+    def validate(self, attrs):
+        if 'incident_id' in attrs:
+            incident = Incident.objects.filter(incident_id=attrs['incident_id']).only('latitude', 'longitude').first()
+            if incident is None:
+                raise serializers.ValidationError({'incident_id': 'Incident not found'})
+            attrs['latitude'], attrs['longitude'] = incident.latitude, incident.longitude
+        if ('latitude' in attrs) != ('longitude' in attrs):
+            raise serializers.ValidationError('latitude and longitude go together')
+        if 'latitude' not in attrs and not attrs['roles']:
+            raise serializers.ValidationError('Give an incident_id, a location or roles to notify')
+        return attrs
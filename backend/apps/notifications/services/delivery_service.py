@@ -0,0 +1,112 @@
+"""
+Notification delivery
+Sends pending NotificationDelivery rows through their channel's transport, rate limited per provider
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.notifications.models import DeliveryStatus, NotificationDelivery
+from apps.notifications.transports import get_transport
+
+
+class ProviderRateLimiter:
+    """
+    Messages-per-second budget of one provider, shared by every worker through the cache.
+
+    Each second has a counter `notifications:rate:<provider>:<second>`; acquire(n) takes
+    what is left of the current second's budget and sleeps into the next second when
+    the budget is spent.
+    """
+
+    KEY_PREFIX = 'notifications:rate'
+
+    def __init__(self, provider, per_second, clock=time.time, sleep=time.sleep):
+        self.provider = provider
+        self.per_second = per_second
+        self.clock = clock
+        self.sleep = sleep
+
+    def acquire(self, count):
+        """Block until `count` messages may be sent; returns how many were granted (all of them)"""
+        if not self.per_second:
+            return count
+        granted = 0
+        while granted < count:
+            now = self.clock()
+            second = int(now)
+            key = f'{self.KEY_PREFIX}:{self.provider}:{second}'
+            cache.add(key, 0, timeout=5)
+            wanted = count - granted
+            try:
+                used = cache.incr(key, wanted)
+            except ValueError:
+                continue
+            allowed = min(wanted, max(0, self.per_second - (used - wanted)))
+            if allowed < wanted:
+                # Give back what this second could not cover
+                cache.decr(key, wanted - allowed)
+            granted += allowed
+            if granted < count:
+                self.sleep(max(0.0, second + 1 - now))
+        return granted
+
+
+class NotificationDeliveryService:
+    """Delivers batches of pending NotificationDelivery rows of one channel"""
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, channel, transport=None, sleep=time.sleep):
+        self.channel = channel
+        self.transport = transport or get_transport(channel)
+        per_second = getattr(settings, 'NOTIFICATION_RATE_LIMITS', {}).get(self.transport.provider)
+        self.limiter = ProviderRateLimiter(self.transport.provider, per_second, sleep=sleep)
+        self.max_attempts = getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', self.MAX_ATTEMPTS)
+
+    def deliver(self, delivery_ids):
+        """
+        Send the still-pending deliveries among delivery_ids.
+        Returns (sent, ids to retry) - deliveries that failed but have attempts left.
+        """
+        deliveries = list(
+            NotificationDelivery.objects.filter(
+                pk__in=delivery_ids, channel=self.channel, status=DeliveryStatus.PENDING,
+            ).select_related('notification').order_by('pk')
+        )
+        sent = 0
+        retry = []
+        batch_size = self.transport.batch_size
+        for start in range(0, len(deliveries), batch_size):
+            batch = deliveries[start:start + batch_size]
+            self.limiter.acquire(len(batch))
+            results = self.transport.send_many([
+                {
+                    'notification_id': delivery.notification_id,
+                    'address': delivery.address,
+                    'title': delivery.notification.title,
+                    'body': delivery.notification.message,
+                }
+                for delivery in batch
+            ])
+            now = timezone.now()
+            for delivery, result in zip(batch, results):
+                delivery.attempts += 1
+                delivery.provider = self.transport.provider
+                if result.ok:
+                    delivery.status = DeliveryStatus.SENT
+                    delivery.provider_message_id = result.provider_message_id
+                    delivery.sent_at = now
+                    delivery.error = ''
+                    sent += 1
+                else:
+                    delivery.error = result.error
+                    if delivery.attempts >= self.max_attempts:
+                        delivery.status = DeliveryStatus.FAILED
+                    else:
+                        retry.append(delivery.pk)
+            NotificationDelivery.objects.bulk_update(
+                batch, ['attempts', 'provider', 'status', 'provider_message_id', 'sent_at', 'error'],
+            )
+        return sent, retry
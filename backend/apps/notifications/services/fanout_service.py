@@ -0,0 +1,121 @@
+"""
+Notification fan-out
+Resolves recipients by user, role and region, stores their notifications in bulk and
+queues SMS, email and push delivery
+"""
+from django.conf import settings
+from django.db import transaction
+
+from apps.core.events import REGION_PRECISION, region_for
+from apps.core.geo import bbox_cells, bounding_box, within_radius
+from apps.notifications.models import DeliveryChannel, Notification, NotificationDelivery, RegionSubscription
+from apps.notifications.services.unread_counter import UnreadCounter
+from apps.response.models import ResponderCurrentLocation
+from apps.users.models import User
+
+
+class NotificationFanoutService:
+    """
+    Sends one notification to many users.
+
+    Recipients are the union of explicit user ids, active users with one of `roles`
+    (only those whose current responder position is within radius_m of the point,
+    when a point and radius are given) and users subscribed to the regions around the
+    point. Each recipient gets one Notification row; every requested channel they
+    can be reached on gets a NotificationDelivery row. Both are written with
+    bulk_create, and delivery is handed to the per-channel workers after commit.
+    """
+    BATCH_SIZE = 1000
+
+    def __init__(self, counter=None):
+        self.counter = counter or UnreadCounter()
+        self.batch_size = getattr(settings, 'NOTIFICATION_FANOUT_BATCH_SIZE', self.BATCH_SIZE)
+
+    def fan_out(self, notification_type, title, message, user_ids=(), roles=(), latitude=None, longitude=None,
+                radius_m=None, channels=(), subscribers=True):
+        """
+        Returns {'notifications': n, 'deliveries': {channel: n}}.
+
+        channels are the out-of-app channels for users reached by id or role; region
+        subscribers get the channels of their subscription that are also requested.
+        """
+        channels = set(channels)
+        recipients = {user_id: set(channels) for user_id in user_ids}
+        for user_id in self._role_recipients(roles, latitude, longitude, radius_m):
+            recipients.setdefault(user_id, set()).update(channels)
+        if subscribers and latitude is not None and longitude is not None:
+            for user_id, subscribed in self._subscribers(latitude, longitude, radius_m):
+                recipients.setdefault(user_id, set()).update(set(subscribed) & channels)
+        if not recipients:
+            return {'notifications': 0, 'deliveries': {}}
+
+        addresses = self._addresses(recipients)
+        with transaction.atomic():
+            notifications = Notification.objects.bulk_create([
+                Notification(recipient_id=user_id, notification_type=notification_type, title=title, message=message)
+                for user_id in addresses
+            ], batch_size=self.batch_size)
+            deliveries = NotificationDelivery.objects.bulk_create([
+                NotificationDelivery(notification=notification, channel=channel, address=address)
+                for notification in notifications
+                for channel, address in addresses[notification.recipient_id].items()
+            ], batch_size=self.batch_size)
+
+            by_channel = {}
+            for delivery in deliveries:
+                by_channel.setdefault(delivery.channel, []).append(delivery.pk)
+            recipient_ids = list(addresses)
+            transaction.on_commit(lambda: self._dispatch(recipient_ids, by_channel))
+
+        return {
+            'notifications': len(notifications),
+            'deliveries': {channel: len(ids) for channel, ids in by_channel.items()},
+        }
+
+    def _dispatch(self, recipient_ids, by_channel):
+        from apps.notifications.tasks import enqueue_deliveries
+
+        self.counter.add(recipient_ids)
+        for channel, delivery_ids in by_channel.items():
+            enqueue_deliveries(channel, delivery_ids)
+
+    def _role_recipients(self, roles, latitude, longitude, radius_m):
+        if not roles:
+            return []
+        if latitude is None or longitude is None or not radius_m:
+            return list(User.objects.filter(is_active=True, role__in=roles).values_list('pk', flat=True))
+
+        min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_m)
+        rows = ResponderCurrentLocation.objects.filter(
+            is_active=True, responder__is_active=True, responder__role__in=roles,
+            latitude__gte=min_lat, latitude__lte=max_lat, longitude__gte=min_lng, longitude__lte=max_lng,
+        ).values_list('latitude', 'longitude', 'responder_id')
+        return [row[2] for row, _ in within_radius(rows, latitude, longitude, radius_m)]
+
+    def _subscribers(self, latitude, longitude, radius_m):
+        if radius_m:
+            regions = bbox_cells(*bounding_box(latitude, longitude, radius_m), precision=REGION_PRECISION)
+        else:
+            regions = {region_for(latitude, longitude)}
+        return RegionSubscription.objects.filter(
+            region__in=regions, user__is_active=True,
+        ).values_list('user_id', 'channels')
+
+    def _addresses(self, recipients):
+        """{user id: {channel: address}} for active recipients, on channels they can be reached on"""
+        user_ids = list(recipients)
+        addresses = {}
+        for start in range(0, len(user_ids), self.batch_size):
+            users = User.objects.filter(
+                pk__in=user_ids[start:start + self.batch_size], is_active=True,
+            ).values_list('pk', 'email', 'phone')
+            for user_id, email, phone in users:
+                reachable = {
+                    DeliveryChannel.PUSH: str(user_id),
+                    DeliveryChannel.EMAIL: email,
+                    DeliveryChannel.SMS: phone,
+                }
+                addresses[user_id] = {
+                    channel: reachable[channel] for channel in recipients[user_id] if reachable.get(channel)
+                }
+        return addresses
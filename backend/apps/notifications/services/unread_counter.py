@@ -0,0 +1,55 @@
+"""
+Per-user unread notification counters
+Kept in the cache so polling unread_count does not COUNT(*) notifications each time
+"""
+from collections import Counter
+
+from django.core.cache import cache
+
+from apps.notifications.models import Notification
+
+
+class UnreadCounter:
+    """
+    Unread notification count per user under `notifications:unread:<user id>`.
+
+    A missing counter is rebuilt with one COUNT on the (recipient, is_read) index.
+    Writers adjust counters that exist and leave missing ones for the next read;
+    counters expire after TTL_SECONDS so any drift heals itself.
+    """
+
+    KEY_PREFIX = 'notifications:unread'
+    TTL_SECONDS = 3600
+
+    def _key(self, user_id):
+        return f'{self.KEY_PREFIX}:{user_id}'
+
+    def get(self, user_id):
+        count = cache.get(self._key(user_id))
+        if count is None:
+            count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+            cache.add(self._key(user_id), count, timeout=self.TTL_SECONDS)
+        return count
+
+    def add(self, user_ids):
+        """Count new unread notifications (one per occurrence of a user id)"""
+        for user_id, count in Counter(user_ids).items():
+            self._adjust(user_id, count)
+
+    def read(self, user_id, count=1):
+        if count:
+            self._adjust(user_id, -count)
+
+    def reset(self, user_id):
+        cache.set(self._key(user_id), 0, timeout=self.TTL_SECONDS)
+
+    def invalidate(self, user_id):
+        cache.delete(self._key(user_id))
+
+    def _adjust(self, user_id, delta):
+        try:
+            if cache.incr(self._key(user_id), delta) < 0:
+                self.invalidate(user_id)
+        except ValueError:
+            # Not cached: the next get() counts from the database
+            pass
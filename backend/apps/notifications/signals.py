@@ -0,0 +1,22 @@
+"""
+Notification signals
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Notification
+from .services.unread_counter import UnreadCounter
+
+
+@receiver(post_save, sender=Notification)
+def count_unread_notification(sender, instance, created, **kwargs):
+    """Notifications created one at a time (fan-out counts its bulk inserts itself)"""
+    if created and not instance.is_read and not kwargs.get('raw'):
+        transaction.on_commit(lambda: UnreadCounter().add([instance.recipient_id]))
+
+
+@receiver(post_delete, sender=Notification)
+def forget_unread_count(sender, instance, **kwargs):
+    # Covers cascades and bulk deletes; the next read recounts
+    transaction.on_commit(lambda: UnreadCounter().invalidate(instance.recipient_id))
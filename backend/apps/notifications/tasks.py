@@ -0,0 +1,27 @@
+"""
+Notification background tasks
+"""
+from celery import shared_task
+from django.conf import settings
+
+from .services.delivery_service import NotificationDeliveryService
+
+
+def enqueue_deliveries(channel, delivery_ids):
+    """Hand delivery ids of one channel to workers in batches (call after commit)"""
+    batch_size = getattr(settings, 'NOTIFICATION_DELIVERY_BATCH_SIZE', 200)
+    queue = getattr(settings, 'NOTIFICATION_DELIVERY_QUEUES', {}).get(channel)
+    for start in range(0, len(delivery_ids), batch_size):
+        deliver_notifications.apply_async((channel, delivery_ids[start:start + batch_size]), queue=queue)
+
+
+@shared_task
+def deliver_notifications(channel, delivery_ids):
+    """Send pending deliveries of one channel; failures are retried with backoff"""
+    service = NotificationDeliveryService(channel)
+    sent, retry = service.deliver(delivery_ids)
+    if retry:
+        countdown = getattr(settings, 'NOTIFICATION_RETRY_SECONDS', 60)
+        queue = getattr(settings, 'NOTIFICATION_DELIVERY_QUEUES', {}).get(channel)
+        deliver_notifications.apply_async((channel, retry), countdown=countdown, queue=queue)
+    return {'sent': sent, 'retrying': len(retry)}
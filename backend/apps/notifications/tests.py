@@ -0,0 +1,122 @@
+"""
+Notification tests
+"""
+from django.test import TestCase, override_settings
+
+from apps.users.models import User
+from .models import DeliveryChannel, DeliveryStatus, Notification, NotificationDelivery
+from .services.delivery_service import NotificationDeliveryService, ProviderRateLimiter
+from .services.fanout_service import NotificationFanoutService
+from .transports import BaseTransport, LocalTransport, SendResult
+
+
+class FailingTransport(BaseTransport):
+    """Stub provider that rejects every message"""
+    provider = 'failing'
+
+    def __init__(self):
+        self.sent = []
+
+    def send_many(self, messages):
+        self.sent.extend(messages)
+        return [SendResult(False, error='provider unavailable') for _ in messages]
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@override_settings(NOTIFICATION_TRANSPORTS={
+    'sms': 'local', 'email': 'local', 'push': 'local',
+}, NOTIFICATION_RATE_LIMITS={})
+class NotificationDeliveryTests(TestCase):
+    """Fan-out and delivery against stub transports"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(
+                username=f'user{n}', email=f'user{n}@example.com', phone=f'+25470000000{n}', password=None,
+            )
+            for n in range(3)
+        ]
+
+    def setUp(self):
+        LocalTransport.clear_outbox()
+
+    def test_fan_out_delivers_through_transport_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = NotificationFanoutService().fan_out(
+                'incident_alert', 'Crash ahead', 'Expect delays on the A2',
+                user_ids=[user.pk for user in self.users], channels=[DeliveryChannel.SMS],
+            )
+
+        self.assertEqual(result, {'notifications': 3, 'deliveries': {DeliveryChannel.SMS: 3}})
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(
+            sorted(message['address'] for message in LocalTransport.outbox),
+            sorted(user.phone for user in self.users),
+        )
+        self.assertFalse(NotificationDelivery.objects.exclude(status=DeliveryStatus.SENT).exists())
+
+    def test_nothing_is_sent_before_commit(self):
+        NotificationFanoutService().fan_out(
+            'incident_alert', 'Crash ahead', 'Expect delays on the A2',
+            user_ids=[self.users[0].pk], channels=[DeliveryChannel.SMS],
+        )
+        self.assertEqual(len(LocalTransport.outbox), 0)
+
+    def test_failed_deliveries_are_retried_until_max_attempts(self):
+        NotificationFanoutService().fan_out(
+            'incident_alert', 'Crash ahead', 'Expect delays on the A2',
+            user_ids=[user.pk for user in self.users], channels=[DeliveryChannel.SMS],
+        )
+        ids = list(NotificationDelivery.objects.values_list('pk', flat=True))
+        transport = FailingTransport()
+        service = NotificationDeliveryService(DeliveryChannel.SMS, transport=transport)
+        service.max_attempts = 2
+
+        sent, retry = service.deliver(ids)
+        self.assertEqual((sent, sorted(retry)), (0, sorted(ids)))
+        sent, retry = service.deliver(retry)
+        self.assertEqual((sent, retry), (0, []))
+
+        self.assertEqual(len(transport.sent), 6)
+        deliveries = NotificationDelivery.objects.all()
+        self.assertTrue(all(delivery.status == DeliveryStatus.FAILED for delivery in deliveries))
+        self.assertTrue(all(delivery.attempts == 2 for delivery in deliveries))
+        self.assertTrue(all(delivery.error == 'provider unavailable' for delivery in deliveries))
+
+    def test_local_outbox_is_bounded(self):
+        transport = LocalTransport()
+        messages = [{'address': str(n)} for n in range(LocalTransport.OUTBOX_SIZE + 10)]
+        results = transport.send_many(messages)
+
+        self.assertEqual(len(LocalTransport.outbox), LocalTransport.OUTBOX_SIZE)
+        self.assertEqual(LocalTransport.outbox[-1], messages[-1])
+        self.assertEqual(len({result.provider_message_id for result in results}), len(messages))
+
+
+class ProviderRateLimiterTests(TestCase):
+    def test_sleeps_into_the_next_second_when_the_budget_is_spent(self):
+        clock = FakeClock()
+        limiter = ProviderRateLimiter('test-provider', 2, clock=clock, sleep=clock.sleep)
+
+        self.assertEqual(limiter.acquire(5), 5)
+        self.assertEqual(clock.sleeps, [1.0, 1.0])
+
+    def test_no_limit(self):
+        clock = FakeClock()
+        limiter = ProviderRateLimiter('test-provider', None, clock=clock, sleep=clock.sleep)
+
+        self.assertEqual(limiter.acquire(500), 500)
+        self.assertEqual(clock.sleeps, [])
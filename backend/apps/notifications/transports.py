@@ -0,0 +1,196 @@
+"""
+Notification delivery transports
+One class per provider; NOTIFICATION_TRANSPORTS picks the transport of each channel
+"""
+import base64
+import itertools
+import json
+import logging
+from collections import deque
+from urllib import parse, request
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def user_group(user_id):
+    """Channel layer group of one user's notification sockets"""
+    return f'notifications.user.{user_id}'
+
+
+class SendResult:
+    """Outcome of sending one message"""
+
+    def __init__(self, ok, provider_message_id='', error=''):
+        self.ok = ok
+        self.provider_message_id = provider_message_id or ''
+        self.error = error or ''
+
+
+class BaseTransport:
+    """
+    Sends batches of messages (dicts with address, title, body and notification_id)
+    for one provider. send_many returns one SendResult per message, in order.
+    """
+    provider = ''
+    # Largest batch handed to send_many at once
+    batch_size = 100
+
+    def send_many(self, messages):
+        raise NotImplementedError
+
+
+class LocalTransport(BaseTransport):
+    """
+    Keeps the last OUTBOX_SIZE messages in `outbox` instead of sending them
+    (development and tests; tests call clear_outbox() in setUp)
+    """
+    provider = 'local'
+    OUTBOX_SIZE = 1000
+    outbox = deque(maxlen=OUTBOX_SIZE)
+    _sequence = itertools.count(1)
+
+    @classmethod
+    def clear_outbox(cls):
+        cls.outbox.clear()
+
+    def send_many(self, messages):
+        results = []
+        for message in messages:
+            LocalTransport.outbox.append(message)
+            results.append(SendResult(True, f'local-{next(LocalTransport._sequence)}'))
+        return results
+
+
+class _HTTPTransport(BaseTransport):
+    timeout = 10
+
+    def _post(self, url, data, headers):
+        req = request.Request(url, data=parse.urlencode(data, doseq=True).encode(), headers=headers, method='POST')
+        with request.urlopen(req, timeout=self.timeout) as response:
+            return json.loads(response.read().decode() or '{}')
+
+
+class TwilioSMSTransport(_HTTPTransport):
+    """Twilio Messages API (one request per message); SMS_USERNAME is the account SID"""
+    provider = 'twilio'
+    api_url = 'https://api.twilio.com/2010-04-01/Accounts/{account}/Messages.json'
+
+    def send_many(self, messages):
+        credentials = base64.b64encode(f'{settings.SMS_USERNAME}:{settings.SMS_API_KEY}'.encode()).decode()
+        headers = {'Authorization': f'Basic {credentials}'}
+        url = self.api_url.format(account=settings.SMS_USERNAME)
+        results = []
+        for message in messages:
+            try:
+                reply = self._post(url, {
+                    'To': message['address'],
+                    'From': settings.SMS_SENDER_ID,
+                    'Body': message['body'],
+                }, headers)
+                results.append(SendResult(True, reply.get('sid')))
+            except Exception as e:
+                results.append(SendResult(False, error=str(e)))
+        return results
+
+
+class AfricasTalkingSMSTransport(_HTTPTransport):
+    """Africa's Talking bulk SMS (one request per identical message); SMS_USERNAME is the app username"""
+    provider = 'africas-talking'
+    api_url = 'https://api.africastalking.com/version1/messaging'
+
+    def send_many(self, messages):
+        headers = {'apiKey': settings.SMS_API_KEY, 'Accept': 'application/json'}
+        # A fan-out sends the same text to everyone, so group recipients by body
+        by_body = {}
+        for index, message in enumerate(messages):
+            by_body.setdefault(message['body'], []).append(index)
+
+        results = [None] * len(messages)
+        for body, indexes in by_body.items():
+            numbers = [messages[index]['address'] for index in indexes]
+            try:
+                reply = self._post(self.api_url, {
+                    'username': settings.SMS_USERNAME,
+                    'to': ','.join(numbers),
+                    'message': body,
+                    'from': settings.SMS_SENDER_ID,
+                }, headers)
+                recipients = {
+                    recipient.get('number'): recipient
+                    for recipient in reply.get('SMSMessageData', {}).get('Recipients', [])
+                }
+                for index, number in zip(indexes, numbers):
+                    recipient = recipients.get(number, {})
+                    ok = recipient.get('status') == 'Success'
+                    results[index] = SendResult(ok, recipient.get('messageId'), '' if ok else recipient.get('status', 'No status'))
+            except Exception as e:
+                for index in indexes:
+                    results[index] = SendResult(False, error=str(e))
+        return results
+
+
+class EmailTransport(BaseTransport):
+    """Django's EMAIL_BACKEND over one connection per batch"""
+    provider = 'email'
+    batch_size = 50
+
+    def send_many(self, messages):
+        results = []
+        with get_connection() as connection:
+            for message in messages:
+                try:
+                    EmailMessage(
+                        subject=message['title'], body=message['body'], to=[message['address']], connection=connection,
+                    ).send()
+                    results.append(SendResult(True))
+                except Exception as e:
+                    results.append(SendResult(False, error=str(e)))
+        return results
+
+
+class ChannelLayerPushTransport(BaseTransport):
+    """In-app push to the recipient's open notification sockets (ws/notifications/)"""
+    provider = 'channels'
+    batch_size = 500
+
+    def send_many(self, messages):
+        from channels.layers import get_channel_layer
+
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return [SendResult(False, error='No channel layer configured') for _ in messages]
+        results = []
+        for message in messages:
+            try:
+                async_to_sync(channel_layer.group_send)(user_group(message['address']), {
+                    'type': 'notification.message',
+                    'id': message['notification_id'],
+                    'title': message['title'],
+                    'message': message['body'],
+                })
+                results.append(SendResult(True))
+            except Exception as e:
+                results.append(SendResult(False, error=str(e)))
+        return results
+
+
+SMS_TRANSPORTS = {
+    'twilio': 'apps.notifications.transports.TwilioSMSTransport',
+    'africas-talking': 'apps.notifications.transports.AfricasTalkingSMSTransport',
+    'local': 'apps.notifications.transports.LocalTransport',
+}
+
+_transports = {}
+
+
+def get_transport(channel):
+    """Transport instance for a delivery channel, from settings.NOTIFICATION_TRANSPORTS"""
+    path = settings.NOTIFICATION_TRANSPORTS[channel]
+    if path not in _transports:
+        _transports[path] = import_string(SMS_TRANSPORTS.get(path, path))()
+    return _transports[path]
@@ -3,11 +3,12 @@ Notification URLs
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import NotificationViewSet
+from .views import NotificationViewSet, RegionSubscriptionViewSet
 
 app_name = 'notifications'
 
 router = DefaultRouter()
+router.register(r'subscriptions', RegionSubscriptionViewSet, basename='region-subscription')
 router.register(r'', NotificationViewSet, basename='notification')
 
 urlpatterns = [
@@ -5,8 +5,11 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from .models import Notification
-from .serializers import NotificationSerializer
+from apps.users.permissions import IsOperationsStaff
+from .models import Notification, RegionSubscription
+from .serializers import BroadcastSerializer, NotificationSerializer, RegionSubscriptionSerializer
+from .services.fanout_service import NotificationFanoutService
+from .services.unread_counter import UnreadCounter
 
 
 class NotificationViewSet(viewsets.ModelViewSet):
@@ -16,24 +19,68 @@ class NotificationViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         # Users can only see their own notifications
-        return Notification.objects.filter(recipient=self.request.user)
+        return Notification.objects.filter(recipient=self.request.user).select_related('recipient')
     
     @action(detail=True, methods=['patch'])
     def mark_read(self, request, pk=None):
         """Mark notification as read"""
         notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        if Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True):
+            UnreadCounter().read(request.user.pk)
         return Response({'message': 'Notification marked as read'})
     
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Mark all notifications as read"""
         Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+        UnreadCounter().reset(request.user.pk)
         return Response({'message': 'All notifications marked as read'})
     
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
         """Get count of unread notifications"""
-        count = Notification.objects.filter(recipient=request.user, is_read=False).count()
-        return Response({'unread_count': count})
+        return Response({'unread_count': UnreadCounter().get(request.user.pk)})
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsOperationsStaff])
+    def broadcast(self, request):
+        """
+        Alert users by role and around an incident or point:
+        {"title", "message", "incident_id" | "latitude"+"longitude", "radius_km",
+         "roles": ["ems", ...], "channels": ["sms", "email", "push"]}
+        """
+        serializer = BroadcastSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        result = NotificationFanoutService().fan_out(
+            data['notification_type'], data['title'], data['message'],
+            roles=data['roles'],
+            latitude=data.get('latitude'),
+            longitude=data.get('longitude'),
+            radius_m=data['radius_km'] * 1000 if 'radius_km' in data else None,
+            channels=data['channels'],
+            subscribers=data['subscribers'],
+        )
+        return Response(result, status=status.HTTP_202_ACCEPTED)
+
+
+class RegionSubscriptionViewSet(viewsets.ModelViewSet):
+    """Regions the current user receives alerts for"""
+    serializer_class = RegionSubscriptionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+    
+    def get_queryset(self):
+        return RegionSubscription.objects.filter(user=self.request.user)
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        subscription, created = RegionSubscription.objects.update_or_create(
+            user=request.user, region=serializer.validated_data['region'],
+            defaults={'channels': serializer.validated_data.get('channels', [])},
+        )
+        return Response(
+            self.get_serializer(subscription).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
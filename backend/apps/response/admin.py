@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import IncidentAssignment, ResponseMilestone, ResponderLocation, ResponderChecklist
+from .models import (
+    IncidentAssignment, ResponseMilestone, ResponderLocation, ResponderCurrentLocation, ResponderChecklist,
+)
 
 
 @admin.register(IncidentAssignment)
@@ -23,6 +25,14 @@ class ResponderLocationAdmin(admin.ModelAdmin):
     search_fields = ['responder__email']
 
 
+@admin.register(ResponderCurrentLocation)
+class ResponderCurrentLocationAdmin(admin.ModelAdmin):
+    list_display = ['responder', 'latitude', 'longitude', 'timestamp', 'is_active']
+    list_filter = ['is_active']
+    search_fields = ['responder__email']
+    raw_id_fields = ['responder']
+
+
 @admin.register(ResponderChecklist)
 class ResponderChecklistAdmin(admin.ModelAdmin):
     list_display = ['incident_type', 'responder_role', 'is_required', 'order']
@@ -5,3 +5,6 @@ class ResponseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.response'
     verbose_name = 'Response Coordination'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,78 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:08
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.core.geo import geohash_encode
+
+
+def populate_current_locations(apps, schema_editor):
+    # Until now the newest ping of each responder was the one row left active
+    ResponderLocation = apps.get_model('response', 'ResponderLocation')
+    ResponderCurrentLocation = apps.get_model('response', 'ResponderCurrentLocation')
+    latest = {}
+    for location in ResponderLocation.objects.filter(is_active=True).order_by('responder_id', 'timestamp').iterator():
+        latest[location.responder_id] = location
+    ResponderCurrentLocation.objects.bulk_create([
+        ResponderCurrentLocation(
+            responder_id=responder_id,
+            latitude=location.latitude,
+            longitude=location.longitude,
+            geohash=geohash_encode(location.latitude, location.longitude),
+            timestamp=location.timestamp,
+            accuracy=location.accuracy,
+            speed=location.speed,
+            heading=location.heading,
+            is_active=True,
+            device_id=location.device_id,
+            track_latitude=location.latitude,
+            track_longitude=location.longitude,
+            track_timestamp=location.timestamp,
+        )
+        for responder_id, location in latest.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('response', '0002_initial'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='responderlocation',
+            name='timestamp',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='timestamp'),
+        ),
+        migrations.CreateModel(
+            name='ResponderCurrentLocation',
+            fields=[
+                ('responder', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='current_location', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('latitude', models.DecimalField(decimal_places=6, max_digits=9, verbose_name='latitude')),
+                ('longitude', models.DecimalField(decimal_places=6, max_digits=9, verbose_name='longitude')),
+                ('geohash', models.CharField(blank=True, db_index=True, max_length=12, verbose_name='geohash cell')),
+                ('timestamp', models.DateTimeField(verbose_name='timestamp')),
+                ('accuracy', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='accuracy (meters)')),
+                ('speed', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='speed (km/h)')),
+                ('heading', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='heading (degrees)')),
+                ('is_active', models.BooleanField(default=True, verbose_name='is active')),
+                ('device_id', models.CharField(blank=True, max_length=100, verbose_name='device ID')),
+                ('track_latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='last track latitude')),
+                ('track_longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='last track longitude')),
+                ('track_timestamp', models.DateTimeField(blank=True, null=True, verbose_name='last track timestamp')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'verbose_name': 'responder current location',
+                'verbose_name_plural': 'responder current locations',
+                'db_table': 'responder_current_locations',
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['is_active', 'timestamp'], name='responder_c_is_acti_502d3f_idx')],
+            },
+        ),
+        migrations.RunPython(populate_current_locations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-18 01:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0003_incident_geohash'),
+        ('response', '0003_responder_current_locations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='incidentassignment',
+            index=models.Index(fields=['assigned_to', 'status'], name='incident_as_assigne_b3405c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='respondercurrentlocation',
+            index=models.Index(fields=['updated_at'], name='responder_c_updated_95ae08_idx'),
+        ),
+    ]
@@ -2,9 +2,12 @@
 Response coordination models for incident assignment and tracking
 """
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.db.models import JSONField
 
+from apps.core.geo import geohash_encode
+
 
 class AssignmentStatus(models.TextChoices):
     """Assignment status enumeration"""
@@ -47,6 +50,10 @@ class IncidentAssignment(models.Model):
         verbose_name = _('incident assignment')
         verbose_name_plural = _('incident assignments')
         ordering = ['-assigned_at']
+        indexes = [
+            # Which responders are engaged, for nearest-available search
+            models.Index(fields=['assigned_to', 'status']),
+        ]
     
     def __str__(self):
         return f"{self.incident.incident_id} -> {self.assigned_to.email} ({self.status})"
@@ -95,7 +102,10 @@ class ResponseMilestone(models.Model):
 
 
 class ResponderLocation(models.Model):
-    """Real-time responder location tracking"""
+    """
+    Responder location track (append-only, downsampled).
+    The live position of each responder is kept in ResponderCurrentLocation.
+    """
     responder = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='locations')
     
     # Location
@@ -103,7 +113,8 @@ class ResponderLocation(models.Model):
     longitude = models.DecimalField(_('longitude'), max_digits=9, decimal_places=6)
     
     # Metadata
-    timestamp = models.DateTimeField(_('timestamp'), auto_now_add=True, db_index=True)
+    # Device time of the ping, so pings flushed after an offline period keep their place in the track
+    timestamp = models.DateTimeField(_('timestamp'), default=timezone.now, db_index=True)
     accuracy = models.DecimalField(_('accuracy (meters)'), max_digits=8, decimal_places=2, null=True, blank=True)
     speed = models.DecimalField(_('speed (km/h)'), max_digits=5, decimal_places=2, null=True, blank=True)
     heading = models.DecimalField(_('heading (degrees)'), max_digits=5, decimal_places=2, null=True, blank=True)
@@ -126,6 +137,53 @@ class ResponderLocation(models.Model):
         return f"{self.responder.email} @ ({self.latitude}, {self.longitude}) - {self.timestamp}"
 
 
+class ResponderCurrentLocation(models.Model):
+    """
+    Latest known position of each responder: one row per responder, updated in place
+    on every ping (see services.location_service)
+    """
+    responder = models.OneToOneField('users.User', on_delete=models.CASCADE, primary_key=True,
+                                     related_name='current_location')
+    
+    # Location
+    latitude = models.DecimalField(_('latitude'), max_digits=9, decimal_places=6)
+    longitude = models.DecimalField(_('longitude'), max_digits=9, decimal_places=6)
+    geohash = models.CharField(_('geohash cell'), max_length=12, blank=True, db_index=True)
+    timestamp = models.DateTimeField(_('timestamp'))
+    accuracy = models.DecimalField(_('accuracy (meters)'), max_digits=8, decimal_places=2, null=True, blank=True)
+    speed = models.DecimalField(_('speed (km/h)'), max_digits=5, decimal_places=2, null=True, blank=True)
+    heading = models.DecimalField(_('heading (degrees)'), max_digits=5, decimal_places=2, null=True, blank=True)
+    
+    # Status
+    is_active = models.BooleanField(_('is active'), default=True)
+    device_id = models.CharField(_('device ID'), max_length=100, blank=True)
+    
+    # Last point written to the ResponderLocation track (drives downsampling)
+    track_latitude = models.DecimalField(_('last track latitude'), max_digits=9, decimal_places=6, null=True, blank=True)
+    track_longitude = models.DecimalField(_('last track longitude'), max_digits=9, decimal_places=6, null=True, blank=True)
+    track_timestamp = models.DateTimeField(_('last track timestamp'), null=True, blank=True)
+    
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    
+    class Meta:
+        db_table = 'responder_current_locations'
+        verbose_name = _('responder current location')
+        verbose_name_plural = _('responder current locations')
+        ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['is_active', 'timestamp']),
+            # Incremental refresh of the in-process responder search index
+            models.Index(fields=['updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.responder_id} @ ({self.latitude}, {self.longitude}) - {self.timestamp}"
+    
+    def save(self, *args, **kwargs):
+        self.geohash = geohash_encode(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+
+
 class ResponderChecklist(models.Model):
     """Responder checklists and protocol guidance"""
     incident_type = models.ForeignKey('incidents.IncidentType', on_delete=models.CASCADE, related_name='checklists')
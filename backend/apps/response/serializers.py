@@ -1,8 +1,14 @@
 """
 Response coordination serializers
 """
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
 from rest_framework import serializers
-from .models import IncidentAssignment, ResponseMilestone, ResponderLocation, ResponderChecklist
+from .models import (
+    IncidentAssignment, ResponseMilestone, ResponderLocation, ResponderCurrentLocation, ResponderChecklist,
+)
 
 
 class IncidentAssignmentSerializer(serializers.ModelSerializer):
@@ -39,6 +45,59 @@ class ResponderLocationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'timestamp']
 
 
+class ResponderCurrentLocationSerializer(serializers.ModelSerializer):
+    responder_id = serializers.IntegerField(read_only=True)
+    responder_email = serializers.EmailField(source='responder.email', read_only=True)
+    
+    class Meta:
+        model = ResponderCurrentLocation
+        fields = ['responder_id', 'responder_email', 'latitude', 'longitude', 'timestamp',
+                 'accuracy', 'speed', 'heading', 'is_active', 'device_id']
+        read_only_fields = fields
+
+
+def _decimal(value, places):
+    return None if value is None else Decimal(str(round(value, places)))
+
+
+class LocationPingSerializer(serializers.Serializer):
+    """One GPS fix from a responder device (raw device precision is rounded to the stored precision)"""
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    timestamp = serializers.DateTimeField(required=False, help_text='Device time of the fix (default: now)')
+    accuracy = serializers.FloatField(min_value=0, max_value=999999.99, required=False, allow_null=True)
+    speed = serializers.FloatField(min_value=0, max_value=999.99, required=False, allow_null=True)
+    heading = serializers.FloatField(min_value=0, max_value=360, required=False, allow_null=True)
+    
+    # Allowed device clock drift ahead of the server
+    max_clock_skew = timedelta(minutes=5)
+    
+    def validate_timestamp(self, value):
+        if value > timezone.now() + self.max_clock_skew:
+            raise serializers.ValidationError('Timestamp is in the future.')
+        return value
+    
+    def validate(self, attrs):
+        attrs['latitude'] = _decimal(attrs['latitude'], 6)
+        attrs['longitude'] = _decimal(attrs['longitude'], 6)
+        for field in ('accuracy', 'speed', 'heading'):
+            attrs[field] = _decimal(attrs.get(field), 2)
+        return attrs
+
+
+class LocationUpdateSerializer(LocationPingSerializer):
+    """A live ping with the sending device and whether the responder is on duty"""
+    device_id = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    is_active = serializers.BooleanField(required=False, default=True)
+
+
+class LocationBatchSerializer(serializers.Serializer):
+    """Buffered pings flushed by a device, e.g. after an offline period"""
+    pings = LocationPingSerializer(many=True, allow_empty=False, max_length=1000)
+    device_id = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    is_active = serializers.BooleanField(required=False, default=True)
+
+
 class ResponderChecklistSerializer(serializers.ModelSerializer):
     incident_type_name = serializers.CharField(source='incident_type.name', read_only=True)
     
@@ -0,0 +1,126 @@
+"""
+Responder location service
+Keeps the one-row-per-responder current position and a downsampled location track
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.core.events import publish_event
+from apps.core.geo import geohash_encode, haversine_m
+from apps.response.models import ResponderCurrentLocation, ResponderLocation
+
+PING_FIELDS = ['latitude', 'longitude', 'timestamp', 'accuracy', 'speed', 'heading']
+
+
+class ResponderLocationService:
+    """
+    Records GPS pings from responder devices.
+
+    Every ping moves the responder's ResponderCurrentLocation row (an UPDATE of one
+    row, or an INSERT the first time). A ping only becomes a ResponderLocation track
+    point when it is at least TRACK_MIN_INTERVAL_SECONDS after or TRACK_MIN_DISTANCE_M
+    away from the previous track point, so the track grows with movement rather than
+    ping rate. Pings older than the stored position (a flushed offline buffer) extend
+    the track but never replace a newer current position.
+    """
+    TRACK_MIN_INTERVAL_SECONDS = 30
+    TRACK_MIN_DISTANCE_M = 50
+
+    def __init__(self):
+        self.min_interval = getattr(settings, 'RESPONDER_TRACK_MIN_INTERVAL_SECONDS', self.TRACK_MIN_INTERVAL_SECONDS)
+        self.min_distance_m = getattr(settings, 'RESPONDER_TRACK_MIN_DISTANCE_M', self.TRACK_MIN_DISTANCE_M)
+
+    def record(self, responder_id, pings, device_id='', is_active=True):
+        """
+        Store pings (dicts of PING_FIELDS; timestamp defaults to now) for one responder.
+        Returns {'accepted', 'tracked', 'current'} where current is the responder's
+        ResponderCurrentLocation after the update.
+        """
+        now = timezone.now()
+        pings = sorted(
+            ({**ping, 'timestamp': ping.get('timestamp') or now} for ping in pings),
+            key=lambda ping: ping['timestamp'],
+        )
+        if not pings:
+            return {'accepted': 0, 'tracked': 0, 'current': None}
+
+        with transaction.atomic():
+            current = ResponderCurrentLocation.objects.select_for_update().filter(pk=responder_id).first()
+            track = self._downsample(pings, current)
+            ResponderLocation.objects.bulk_create([
+                ResponderLocation(
+                    responder_id=responder_id,
+                    device_id=device_id,
+                    is_active=is_active,
+                    **{field: ping.get(field) for field in PING_FIELDS},
+                )
+                for ping in track
+            ])
+
+            newest = pings[-1]
+            if current is None or newest['timestamp'] >= current.timestamp:
+                current = self._move(responder_id, current, newest, track, device_id, is_active)
+                publish_event('responder.location', {
+                    'responder_id': responder_id,
+                    'is_active': current.is_active,
+                    **{field: getattr(current, field) for field in PING_FIELDS},
+                }, current.latitude, current.longitude)
+
+        return {'accepted': len(pings), 'tracked': len(track), 'current': current}
+
+    def _downsample(self, pings, current):
+        """Pings that become track points"""
+        last = None
+        if current is not None and current.track_timestamp is not None and pings[0]['timestamp'] >= current.track_timestamp:
+            last = {
+                'latitude': current.track_latitude,
+                'longitude': current.track_longitude,
+                'timestamp': current.track_timestamp,
+            }
+
+        track = []
+        for ping in pings:
+            if last is None or self._moved_on(last, ping):
+                track.append(ping)
+                last = ping
+        return track
+
+    def _moved_on(self, last, ping):
+        if (ping['timestamp'] - last['timestamp']).total_seconds() >= self.min_interval:
+            return True
+        distance = haversine_m(last['latitude'], last['longitude'], [ping['latitude']], [ping['longitude']])[0]
+        return distance >= self.min_distance_m
+
+    def _move(self, responder_id, current, ping, track, device_id, is_active):
+        fields = {field: ping.get(field) for field in PING_FIELDS}
+        fields.update(
+            geohash=geohash_encode(ping['latitude'], ping['longitude']),
+            device_id=device_id,
+            is_active=is_active,
+            updated_at=timezone.now(),
+        )
+        if track and (current is None or current.track_timestamp is None
+                      or track[-1]['timestamp'] >= current.track_timestamp):
+            fields.update(
+                track_latitude=track[-1]['latitude'],
+                track_longitude=track[-1]['longitude'],
+                track_timestamp=track[-1]['timestamp'],
+            )
+
+        if current is not None:
+            ResponderCurrentLocation.objects.filter(pk=responder_id).update(**fields)
+        else:
+            try:
+                with transaction.atomic():
+                    ResponderCurrentLocation.objects.create(responder_id=responder_id, **fields)
+            except IntegrityError:
+                # First ping raced another request for the same responder
+                ResponderCurrentLocation.objects.filter(
+                    pk=responder_id, timestamp__lte=fields['timestamp'],
+                ).update(**fields)
+
+        current = current or ResponderCurrentLocation(responder_id=responder_id)
+        for field, value in fields.items():
+            setattr(current, field, value)
+        return current
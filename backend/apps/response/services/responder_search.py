@@ -0,0 +1,208 @@
+"""
+Nearest available responder search
+An in-process grid index over current responder positions, kept fresh incrementally
+"""
+import math
+import threading
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from apps.core.geo import EARTH_RADIUS_M, haversine_m
+from apps.response.models import AssignmentStatus, IncidentAssignment, ResponderCurrentLocation
+from apps.users.models import User, UserRole
+
+# Roles dispatched to incidents
+RESPONDER_ROLES = (UserRole.POLICE, UserRole.EMS, UserRole.FIRE_RESCUE, UserRole.TOWING)
+
+# Assignment states that keep a responder busy
+ENGAGED_STATUSES = (AssignmentStatus.PENDING, AssignmentStatus.ACCEPTED, AssignmentStatus.IN_PROGRESS)
+
+METRES_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+
+class ResponderIndex:
+    """
+    Uniform lat/lng grid of active responder positions.
+
+    The index is loaded from ResponderCurrentLocation once, then brought up to date
+    before each search with the rows updated since the previous sync (one query on
+    the updated_at index). A full reload every FULL_REBUILD_SECONDS also picks up
+    role changes, which do not touch the location rows.
+    """
+    CELL_DEGREES = 0.05
+    FULL_REBUILD_SECONDS = 300
+    # Re-read rows this far before the last sync, for transactions that committed late
+    SYNC_OVERLAP_SECONDS = 5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._positions = {}
+        self._cells = {}
+        self._built_at = None
+        self._synced_at = None
+
+    def refresh(self):
+        """Apply location changes since the last sync (or reload everything when due)"""
+        with self._lock:
+            now = timezone.now()
+            rows = ResponderCurrentLocation.objects.values_list(
+                'responder_id', 'latitude', 'longitude', 'timestamp', 'is_active', 'responder__role',
+            )
+            if self._built_at is None or (now - self._built_at).total_seconds() > self.FULL_REBUILD_SECONDS:
+                self._positions = {}
+                self._cells = {}
+                self._built_at = now
+                rows = rows.filter(is_active=True)
+            else:
+                rows = rows.filter(updated_at__gte=self._synced_at - timedelta(seconds=self.SYNC_OVERLAP_SECONDS))
+            self._synced_at = now
+            for responder_id, latitude, longitude, timestamp, is_active, role in rows:
+                self._remove(responder_id)
+                if is_active:
+                    self._add(responder_id, float(latitude), float(longitude), timestamp, role)
+
+    def _cell(self, latitude, longitude):
+        return math.floor(latitude / self.CELL_DEGREES), math.floor(longitude / self.CELL_DEGREES)
+
+    def _add(self, responder_id, latitude, longitude, timestamp, role):
+        cell = self._cell(latitude, longitude)
+        self._positions[responder_id] = (latitude, longitude, timestamp, role, cell)
+        self._cells.setdefault(cell, set()).add(responder_id)
+
+    def _remove(self, responder_id):
+        position = self._positions.pop(responder_id, None)
+        if position is not None:
+            members = self._cells[position[4]]
+            members.discard(responder_id)
+            if not members:
+                del self._cells[position[4]]
+
+    def nearest(self, latitude, longitude, limit, roles, max_distance_m, seen_since=None, exclude=()):
+        """
+        Up to `limit` (responder_id, distance_m, position) nearest first, searching rings
+        of cells outwards until no unvisited cell can hold anything closer.
+        """
+        latitude, longitude = float(latitude), float(longitude)
+        center_i, center_j = self._cell(latitude, longitude)
+        # Smallest width of a cell here, i.e. how much each ring adds to the search radius
+        ring_m = self.CELL_DEGREES * METRES_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01)
+
+        with self._lock:
+            found = []
+            remaining = len(self._positions)
+            ring = 0
+            while remaining and (ring - 1) * ring_m <= max_distance_m:
+                ids = []
+                for cell in self._ring_cells(center_i, center_j, ring):
+                    members = self._cells.get(cell)
+                    if members:
+                        remaining -= len(members)
+                        ids.extend(members)
+
+                candidates = [
+                    (responder_id, self._positions[responder_id]) for responder_id in ids
+                    if responder_id not in exclude
+                    and self._positions[responder_id][3] in roles
+                    and (seen_since is None or self._positions[responder_id][2] >= seen_since)
+                ]
+                if candidates:
+                    distances = haversine_m(
+                        latitude, longitude,
+                        [position[0] for _, position in candidates],
+                        [position[1] for _, position in candidates],
+                    )
+                    found.extend(
+                        (responder_id, float(distance), position)
+                        for (responder_id, position), distance in zip(candidates, distances)
+                        if distance <= max_distance_m
+                    )
+
+                # Everything outside ring r is at least r cell widths away
+                if len(found) >= limit:
+                    kth = np.partition([distance for _, distance, _ in found], limit - 1)[limit - 1]
+                    if kth <= ring * ring_m:
+                        break
+                ring += 1
+
+        found.sort(key=lambda match: match[1])
+        return found[:limit]
+
+    @staticmethod
+    def _ring_cells(center_i, center_j, ring):
+        if ring == 0:
+            yield center_i, center_j
+            return
+        for dj in range(-ring, ring + 1):
+            yield center_i - ring, center_j + dj
+            yield center_i + ring, center_j + dj
+        for di in range(-ring + 1, ring):
+            yield center_i + di, center_j - ring
+            yield center_i + di, center_j + ring
+
+
+_index = ResponderIndex()
+
+
+class NearestResponderService:
+    """
+    Nearest-K available responders to a point: active, of a dispatchable role, seen
+    recently, and not holding a pending, accepted or in-progress assignment.
+    """
+    MAX_DISTANCE_M = 50000
+    LOCATION_MAX_AGE_MINUTES = 15
+
+    def __init__(self, index=None):
+        self.index = index or _index
+        self.max_distance_m = getattr(settings, 'RESPONDER_SEARCH_MAX_DISTANCE_M', self.MAX_DISTANCE_M)
+        self.max_age = timedelta(
+            minutes=getattr(settings, 'RESPONDER_LOCATION_MAX_AGE_MINUTES', self.LOCATION_MAX_AGE_MINUTES)
+        )
+
+    def find(self, latitude, longitude, k=5, roles=None, max_distance_m=None):
+        """
+        Returns up to k dicts (responder_id, email, name, role, latitude, longitude,
+        distance_m, last_seen), nearest first.
+        """
+        roles = set(roles or RESPONDER_ROLES)
+        max_distance_m = max_distance_m or self.max_distance_m
+        seen_since = timezone.now() - self.max_age
+        self.index.refresh()
+
+        # Busy responders are only known after a lookup; widen the candidate set until
+        # k free ones are found or the search area is exhausted
+        engaged = set()
+        limit = k * 2
+        while True:
+            matches = self.index.nearest(latitude, longitude, limit, roles, max_distance_m, seen_since, engaged)
+            busy = set(
+                IncidentAssignment.objects.filter(
+                    assigned_to_id__in=[responder_id for responder_id, _, _ in matches],
+                    status__in=ENGAGED_STATUSES,
+                ).values_list('assigned_to_id', flat=True)
+            )
+            engaged |= busy
+            free = [match for match in matches if match[0] not in busy]
+            if len(free) >= k or len(matches) < limit:
+                break
+            limit *= 4
+
+        free = free[:k]
+        # Accounts removed since the last full reload drop out here
+        users = User.objects.filter(is_active=True).in_bulk([responder_id for responder_id, _, _ in free])
+        return [
+            {
+                'responder_id': responder_id,
+                'email': users[responder_id].email,
+                'name': users[responder_id].get_full_name(),
+                'role': position[3],
+                'latitude': position[0],
+                'longitude': position[1],
+                'distance_m': round(distance, 1),
+                'last_seen': position[2],
+            }
+            for responder_id, distance, position in free
+            if responder_id in users
+        ]
@@ -0,0 +1,38 @@
+"""
+Response coordination signals
+"""
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+
+from apps.core.events import publish_event
+
+
+@receiver(post_init, sender='response.IncidentAssignment')
+def remember_loaded_status(sender, instance, **kwargs):
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender='response.IncidentAssignment')
+def publish_assignment_event(sender, instance, created, **kwargs):
+    """Push new assignments and assignment status changes to live dispatcher screens"""
+    if kwargs.get('raw'):
+        return
+    previous_status = getattr(instance, '_loaded_status', None)
+    instance._loaded_status = instance.status
+    if created:
+        event = 'assignment.created'
+    elif previous_status is not None and previous_status != instance.status:
+        event = 'assignment.status_changed'
+    else:
+        return
+    incident = instance.incident
+    publish_event(event, {
+        'assignment_id': instance.pk,
+        'incident_id': incident.incident_id,
+        'assigned_to_id': instance.assigned_to_id,
+        'assignment_type': instance.assignment_type,
+        'status': instance.status,
+        'previous_status': None if created else previous_status,
+        'estimated_arrival_time': instance.estimated_arrival_time,
+    }, incident.latitude, incident.longitude)
+
@@ -6,17 +6,21 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 
-from .models import IncidentAssignment, ResponseMilestone, ResponderLocation, ResponderChecklist
+from .models import (
+    IncidentAssignment, ResponseMilestone, ResponderLocation, ResponderCurrentLocation, ResponderChecklist,
+)
 from .serializers import (
     IncidentAssignmentSerializer, ResponseMilestoneSerializer,
-    ResponderLocationSerializer, ResponderChecklistSerializer
+    ResponderLocationSerializer, ResponderChecklistSerializer,
+    ResponderCurrentLocationSerializer, LocationUpdateSerializer, LocationBatchSerializer,
 )
+from .services.location_service import ResponderLocationService
 from apps.incidents.models import Incident
 
 
 class IncidentAssignmentViewSet(viewsets.ModelViewSet):
     """Incident assignment management"""
-    queryset = IncidentAssignment.objects.all()
+    queryset = IncidentAssignment.objects.select_related('incident', 'assigned_to', 'assigned_by')
     serializer_class = IncidentAssignmentSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -49,7 +53,7 @@ class IncidentAssignmentViewSet(viewsets.ModelViewSet):
 
 class ResponseMilestoneViewSet(viewsets.ModelViewSet):
     """Response milestone tracking"""
-    queryset = ResponseMilestone.objects.all()
+    queryset = ResponseMilestone.objects.select_related('incident', 'responder')
     serializer_class = ResponseMilestoneSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -63,38 +67,60 @@ class ResponseMilestoneViewSet(viewsets.ModelViewSet):
 
 class ResponderLocationViewSet(viewsets.ModelViewSet):
     """Responder location tracking"""
-    queryset = ResponderLocation.objects.all()
+    queryset = ResponderLocation.objects.select_related('responder')
     serializer_class = ResponderLocationSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     @action(detail=False, methods=['post'])
     def update_location(self, request):
         """Update responder's current location"""
-        responder = request.user
-        latitude = request.data.get('latitude')
-        longitude = request.data.get('longitude')
+        serializer = LocationUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        # Deactivate previous locations
-        ResponderLocation.objects.filter(responder=responder, is_active=True).update(is_active=False)
+        # Moves the one current-position row; only every ~30s / 50m also lands in the track
+        data = serializer.validated_data
+        result = ResponderLocationService().record(
+            request.user.pk, [data], device_id=data['device_id'], is_active=data['is_active'],
+        )
+        current = result['current']
+        current.responder = request.user
+        return Response(ResponderCurrentLocationSerializer(current).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'], url_path='batch')
+    def update_locations_batch(self, request):
+        """Store pings a device buffered while offline (up to 1000 per request)"""
+        serializer = LocationBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        # Create new location
-        location = ResponderLocation.objects.create(
-            responder=responder,
-            latitude=latitude,
-            longitude=longitude,
-            accuracy=request.data.get('accuracy'),
-            speed=request.data.get('speed'),
-            heading=request.data.get('heading'),
-            is_active=True
+        data = serializer.validated_data
+        result = ResponderLocationService().record(
+            request.user.pk, data['pings'], device_id=data['device_id'], is_active=data['is_active'],
         )
+        current = result['current']
+        current.responder = request.user
+        return Response({
+            'accepted': result['accepted'],
+            'tracked': result['tracked'],
+            'current': ResponderCurrentLocationSerializer(current).data,
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['get'])
+    def current(self, request):
+        """Latest position of every responder (?is_active=true|false)"""
+        queryset = ResponderCurrentLocation.objects.select_related('responder')
+        is_active = request.query_params.get('is_active')
+        if is_active is not None:
+            queryset = queryset.filter(is_active=is_active.lower() == 'true')
         
-        serializer = self.get_serializer(location)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(ResponderCurrentLocationSerializer(page, many=True).data)
+        return Response(ResponderCurrentLocationSerializer(queryset, many=True).data)
 
 
 class ResponderChecklistViewSet(viewsets.ReadOnlyModelViewSet):
     """Responder checklist queries"""
-    queryset = ResponderChecklist.objects.all()
+    queryset = ResponderChecklist.objects.select_related('incident_type')
     serializer_class = ResponderChecklistSerializer
     permission_classes = [permissions.IsAuthenticated]
 
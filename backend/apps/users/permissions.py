@@ -0,0 +1,37 @@
+"""
+Role-based API permissions
+"""
+from rest_framework import permissions
+
+from .models import UserRole
+
+ADMIN_ROLES = (UserRole.SUPER_ADMIN, UserRole.SYSTEM_ADMIN)
+
+# Control room and field roles that see live incident and responder activity
+OPERATIONS_ROLES = (
+    UserRole.TMC_OPERATOR, UserRole.DISPATCHER, UserRole.FIELD_INSPECTOR, UserRole.MAINTENANCE_CREW,
+    UserRole.POLICE, UserRole.EMS, UserRole.FIRE_RESCUE, UserRole.TOWING, UserRole.QA_REVIEWER,
+)
+
+
+def user_has_role(user, roles):
+    """Whether an authenticated user's role is in `roles` (administrators always pass)"""
+    if not user or not user.is_authenticated:
+        return False
+    return user.is_superuser or user.role in (*roles, *ADMIN_ROLES)
+
+
+class HasRole(permissions.IsAuthenticated):
+    """Authenticated users whose role is in `roles` (administrators always pass)"""
+    roles = ()
+
+    def has_permission(self, request, view):
+        return super().has_permission(request, view) and user_has_role(request.user, self.roles)
+
+
+class IsAnalyst(HasRole):
+    roles = (UserRole.ANALYST,)
+
+
+class IsOperationsStaff(HasRole):
+    roles = OPERATIONS_ROLES
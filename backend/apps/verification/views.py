@@ -13,7 +13,7 @@ from apps.incidents.models import Incident
 
 class AIVerificationResultViewSet(viewsets.ReadOnlyModelViewSet):
     """AI verification results"""
-    queryset = AIVerificationResult.objects.all()
+    queryset = AIVerificationResult.objects.select_related('incident')
     serializer_class = AIVerificationResultSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -27,7 +27,7 @@ class AIVerificationResultViewSet(viewsets.ReadOnlyModelViewSet):
 
 class HumanReviewViewSet(viewsets.ModelViewSet):
     """Human review management"""
-    queryset = HumanReview.objects.all()
+    queryset = HumanReview.objects.select_related('incident', 'reviewer')
     serializer_class = HumanReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
     
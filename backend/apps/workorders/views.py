@@ -8,7 +8,7 @@ from .serializers import WorkOrderSerializer, InfrastructureInspectionSerializer
 
 class WorkOrderViewSet(viewsets.ModelViewSet):
     """Work order management"""
-    queryset = WorkOrder.objects.all()
+    queryset = WorkOrder.objects.select_related('incident', 'assigned_to')
     serializer_class = WorkOrderSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -22,7 +22,7 @@ class WorkOrderViewSet(viewsets.ModelViewSet):
 
 class InfrastructureInspectionViewSet(viewsets.ModelViewSet):
     """Infrastructure inspection management"""
-    queryset = InfrastructureInspection.objects.all()
+    queryset = InfrastructureInspection.objects.select_related('work_order', 'inspector')
     serializer_class = InfrastructureInspectionSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -6,19 +6,21 @@ import os
 
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
+from channels.security.websocket import AllowedHostsOriginValidator
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'esafety.settings')
 
 django_asgi_app = get_asgi_application()
 
-# WebSocket routing (to be configured later)
+# Imported after the app registry is ready
+from apps.core.routing import websocket_urlpatterns  # noqa: E402
+from apps.users.middleware import JWTAuthMiddlewareStack  # noqa: E402
+
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
-    "websocket": AuthMiddlewareStack(
-        URLRouter([
-            # WebSocket routes will be added here
-        ])
+    "websocket": AllowedHostsOriginValidator(
+        JWTAuthMiddlewareStack(
+            URLRouter(websocket_urlpatterns)
+        )
     ),
 })
-
@@ -0,0 +1,15 @@
+"""
+Celery application for esafety project.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'esafety.settings')
+
+app = Celery('esafety')
+
+# All CELERY_* settings in esafety.settings configure the app
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
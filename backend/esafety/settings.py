@@ -31,7 +31,7 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'corsheaders',
     'django_filters',
-    # 'channels',  # Uncomment when channels is installed
+    'channels',
     
     # Local apps
     'apps.core',
@@ -80,7 +80,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'esafety.wsgi.application'
-# ASGI_APPLICATION = 'esafety.asgi.application'  # Uncomment when channels is installed
+ASGI_APPLICATION = 'esafety.asgi.application'
 
 # Database
 if DEBUG:
@@ -181,17 +181,64 @@ CORS_ALLOW_CREDENTIALS = True
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = REDIS_URL
+# Run tasks in-process (no broker needed) for development and tests
+CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', str(DEBUG)).lower() == 'true'
+CELERY_TASK_EAGER_PROPAGATES = True
+# Periodic task intervals (seconds)
+AUDIT_ANCHOR_INTERVAL_SECONDS = int(os.getenv('AUDIT_ANCHOR_INTERVAL_SECONDS', 600))
+NOTARIZATION_INTERVAL_SECONDS = int(os.getenv('NOTARIZATION_INTERVAL_SECONDS', 60))
+CELERY_BEAT_SCHEDULE = {
+    'maintain-iot-partitions': {
+        'task': 'apps.iot.tasks.maintain_partitions',
+        'schedule': 6 * 60 * 60,
+    },
+    'anchor-audit-log': {
+        'task': 'apps.audit.tasks.anchor_audit_log',
+        'schedule': AUDIT_ANCHOR_INTERVAL_SECONDS,
+    },
+    'flush-notarizations': {
+        'task': 'apps.blockchain.tasks.flush_notarizations',
+        'schedule': NOTARIZATION_INTERVAL_SECONDS,
+    },
+}
+
+# Cache (Redis in production, in-process for development and tests)
+if DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+DASHBOARD_CACHE_BUCKET_SECONDS = int(os.getenv('DASHBOARD_CACHE_BUCKET_SECONDS', 60))
 
 # Channels Configuration (for WebSockets)
-# Uncomment when channels is installed
-# CHANNEL_LAYERS = {
-#     'default': {
-#         'BACKEND': 'channels_redis.core.RedisChannelLayer',
-#         'CONFIG': {
-#             "hosts": [(os.getenv('REDIS_HOST', 'localhost'), int(os.getenv('REDIS_PORT', 6379)))],
-#         },
-#     },
-# }
+# The in-memory layer only reaches consumers in the same process: use it for local
+# development and tests (CHANNEL_LAYER=memory), Redis everywhere else
+if DEBUG or os.getenv('CHANNEL_LAYER') == 'memory':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                "hosts": [(os.getenv('REDIS_HOST', 'localhost'), int(os.getenv('REDIS_PORT', 6379)))],
+            },
+        },
+    }
+# Live event regions are geohash cells of this precision (4 = ~39km x 20km)
+REALTIME_REGION_PRECISION = int(os.getenv('REALTIME_REGION_PRECISION', 4))
 
 # File Storage (S3)
 USE_S3 = os.getenv('USE_S3', 'False').lower() == 'true'
@@ -208,11 +255,35 @@ BLOCKCHAIN_NETWORK = os.getenv('BLOCKCHAIN_NETWORK', 'base-sepolia')
 BLOCKCHAIN_RPC_URL = os.getenv('BLOCKCHAIN_RPC_URL', 'https://sepolia.base.org')
 BLOCKCHAIN_RELAYER_ADDRESS = os.getenv('BLOCKCHAIN_RELAYER_ADDRESS')
 BLOCKCHAIN_RELAYER_PRIVATE_KEY = os.getenv('BLOCKCHAIN_RELAYER_PRIVATE_KEY')
+# 'web3' submits to BLOCKCHAIN_RPC_URL; 'local' is an in-memory chain for development and tests
+BLOCKCHAIN_RELAYER = os.getenv('BLOCKCHAIN_RELAYER', 'local' if DEBUG else 'web3')
+# Incidents and evidence are hashed on create (NOTARIZE_ON_CREATE) or on request and
+# notarized as one Merkle root per NOTARIZATION_BATCH_SIZE hashes every NOTARIZATION_INTERVAL_SECONDS
+# (see CELERY_BEAT_SCHEDULE)
+NOTARIZE_ON_CREATE = os.getenv('NOTARIZE_ON_CREATE', 'True').lower() == 'true'
+NOTARIZATION_BATCH_SIZE = int(os.getenv('NOTARIZATION_BATCH_SIZE', 1024))
+# Records claimed by a flush that died before recording its batch are requeued after this long
+NOTARIZATION_CLAIM_TIMEOUT_SECONDS = int(os.getenv('NOTARIZATION_CLAIM_TIMEOUT_SECONDS', 600))
+
+# Audit Log
+# Audit log write-behind buffer: entries are stored in bulk every AUDIT_BUFFER_MAX_ENTRIES
+# entries or AUDIT_BUFFER_FLUSH_MS; batches the database rejects go to AUDIT_FALLBACK_PATH
+# (replay with manage.py replay_audit_fallback)
+AUDIT_BUFFER_ENABLED = os.getenv('AUDIT_BUFFER_ENABLED', 'True').lower() == 'true'
+AUDIT_BUFFER_MAX_ENTRIES = int(os.getenv('AUDIT_BUFFER_MAX_ENTRIES', 200))
+AUDIT_BUFFER_FLUSH_MS = int(os.getenv('AUDIT_BUFFER_FLUSH_MS', 500))
+AUDIT_BUFFER_QUEUE_SIZE = int(os.getenv('AUDIT_BUFFER_QUEUE_SIZE', 10000))
+AUDIT_FALLBACK_PATH = os.getenv('AUDIT_FALLBACK_PATH', str(BASE_DIR / 'logs' / 'audit-fallback.jsonl'))
+# Audit entries are hash-chained on insert and anchored on chain as one Merkle root per
+# AUDIT_ANCHOR_BATCH_SIZE entries every AUDIT_ANCHOR_INTERVAL_SECONDS (see CELERY_BEAT_SCHEDULE)
+# (manage.py anchor_audit_log / verify_audit_chain)
+AUDIT_ANCHOR_BATCH_SIZE = int(os.getenv('AUDIT_ANCHOR_BATCH_SIZE', 4096))
 
 # SMS & Email Configuration
 SMS_PROVIDER = os.getenv('SMS_PROVIDER', 'twilio')  # or 'africas-talking'
 SMS_API_KEY = os.getenv('SMS_API_KEY')
 SMS_SENDER_ID = os.getenv('SMS_SENDER_ID', 'eSafety')
+SMS_USERNAME = os.getenv('SMS_USERNAME')  # Twilio account SID / Africa's Talking username
 
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
@@ -221,11 +292,91 @@ EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True').lower() == 'true'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 
+# Notification delivery: transport per channel ('twilio', 'africas-talking', 'local' or a
+# dotted path to a BaseTransport); 'local' keeps SMS in memory for development and tests
+NOTIFICATION_TRANSPORTS = {
+    'sms': os.getenv('NOTIFICATION_SMS_TRANSPORT', 'local' if DEBUG else SMS_PROVIDER),
+    'email': os.getenv('NOTIFICATION_EMAIL_TRANSPORT', 'apps.notifications.transports.EmailTransport'),
+    'push': os.getenv('NOTIFICATION_PUSH_TRANSPORT', 'apps.notifications.transports.ChannelLayerPushTransport'),
+}
+# Messages per second per provider, shared by all delivery workers
+NOTIFICATION_RATE_LIMITS = {
+    'twilio': int(os.getenv('NOTIFICATION_RATE_TWILIO', 30)),
+    'africas-talking': int(os.getenv('NOTIFICATION_RATE_AFRICAS_TALKING', 50)),
+    'email': int(os.getenv('NOTIFICATION_RATE_EMAIL', 10)),
+}
+# Optional Celery queue per channel, so e.g. slow SMS never holds up push delivery
+NOTIFICATION_DELIVERY_QUEUES = {
+    channel: queue for channel, queue in (
+        ('sms', os.getenv('NOTIFICATION_SMS_QUEUE')),
+        ('email', os.getenv('NOTIFICATION_EMAIL_QUEUE')),
+        ('push', os.getenv('NOTIFICATION_PUSH_QUEUE')),
+    ) if queue
+}
+NOTIFICATION_DELIVERY_BATCH_SIZE = int(os.getenv('NOTIFICATION_DELIVERY_BATCH_SIZE', 200))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', 3))
+NOTIFICATION_RETRY_SECONDS = int(os.getenv('NOTIFICATION_RETRY_SECONDS', 60))
+
 # IoT Integration Configuration
 RFID_API_ENDPOINT = os.getenv('RFID_API_ENDPOINT')
 RFID_MQTT_BROKER = os.getenv('RFID_MQTT_BROKER')
 CCTV_API_ENDPOINT = os.getenv('CCTV_API_ENDPOINT')
 SENSOR_MQTT_BROKER = os.getenv('SENSOR_MQTT_BROKER')
+IOT_INGEST_BATCH_SIZE = int(os.getenv('IOT_INGEST_BATCH_SIZE', 5000))
+SENSOR_INGEST_BATCH_SIZE = int(os.getenv('SENSOR_INGEST_BATCH_SIZE', 1000))
+# Serve RFID log / sensor reading lists through the .values() fast path by default (?fast=0 opts out)
+FAST_LIST_SERIALIZATION = os.getenv('FAST_LIST_SERIALIZATION', 'False').lower() == 'true'
+# Rows fetched per server-side cursor round trip (and per Parquet row group) in analyst exports
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 5000))
+
+# Time-partitioned IoT tables (PostgreSQL): partition interval ('day' or 'week'), number of
+# future partitions kept ready, and how long partitions are kept before they are expired
+IOT_PARTITIONS = {
+    'rfid_logs': {
+        'interval': os.getenv('RFID_LOG_PARTITION_INTERVAL', 'day'),
+        'premake': int(os.getenv('RFID_LOG_PARTITION_PREMAKE', 7)),
+        'retention_days': int(os.getenv('RFID_LOG_RETENTION_DAYS', 90)),
+    },
+    'sensor_readings': {
+        'interval': os.getenv('SENSOR_READING_PARTITION_INTERVAL', 'day'),
+        'premake': int(os.getenv('SENSOR_READING_PARTITION_PREMAKE', 7)),
+        'retention_days': int(os.getenv('SENSOR_READING_RETENTION_DAYS', 365)),
+    },
+}
+# 'detach' keeps expired partitions as standalone tables for archiving; 'drop' deletes them
+IOT_PARTITION_EXPIRY_ACTION = os.getenv('IOT_PARTITION_EXPIRY_ACTION', 'detach')
+
+# Duplicate incident detection: new reports within the radius and ±window of an existing
+# report are linked to it when their combined similarity score (0-1) reaches the threshold
+INCIDENT_DUPLICATE_DETECTION = os.getenv('INCIDENT_DUPLICATE_DETECTION', 'True').lower() == 'true'
+INCIDENT_DUPLICATE_RADIUS_M = float(os.getenv('INCIDENT_DUPLICATE_RADIUS_M', 500))
+INCIDENT_DUPLICATE_WINDOW_MINUTES = int(os.getenv('INCIDENT_DUPLICATE_WINDOW_MINUTES', 60))
+INCIDENT_DUPLICATE_THRESHOLD = float(os.getenv('INCIDENT_DUPLICATE_THRESHOLD', 0.7))
+
+# Responder GPS pings: every ping moves the current position; a ping is also kept in the
+# location track once this many seconds or metres separate it from the last track point
+RESPONDER_TRACK_MIN_INTERVAL_SECONDS = int(os.getenv('RESPONDER_TRACK_MIN_INTERVAL_SECONDS', 30))
+RESPONDER_TRACK_MIN_DISTANCE_M = float(os.getenv('RESPONDER_TRACK_MIN_DISTANCE_M', 50))
+
+# Incident SLA scheduler (manage.py run_sla_scheduler): escalates open incidents at their SLA
+# target and every severity escalation period after it, up to SLA_MAX_ESCALATION_LEVEL, and
+# reloads its deadline heap from the database every SLA_SCHEDULER_RESYNC_SECONDS
+SLA_MAX_ESCALATION_LEVEL = int(os.getenv('SLA_MAX_ESCALATION_LEVEL', 3))
+SLA_SCHEDULER_RESYNC_SECONDS = int(os.getenv('SLA_SCHEDULER_RESYNC_SECONDS', 900))
+
+# Nearest available responder search: responders further than this, or whose last ping
+# is older than this many minutes, are never proposed for an assignment
+RESPONDER_SEARCH_MAX_DISTANCE_M = float(os.getenv('RESPONDER_SEARCH_MAX_DISTANCE_M', 50000))
+RESPONDER_LOCATION_MAX_AGE_MINUTES = int(os.getenv('RESPONDER_LOCATION_MAX_AGE_MINUTES', 15))
+
+# Incident heatmap tiles: cell aggregates are kept for zoom levels 0..HEATMAP_MAX_ZOOM, with
+# 2^HEATMAP_GRID_BITS cells per tile side (4 -> 16x16 cells of 16px on a 256px tile)
+HEATMAP_MAX_ZOOM = int(os.getenv('HEATMAP_MAX_ZOOM', 16))
+HEATMAP_GRID_BITS = int(os.getenv('HEATMAP_GRID_BITS', 4))
+
+# Incident validation: run RFID/CCTV/sensor/AI correlators concurrently with a per-source time budget
+VALIDATION_PARALLEL_SOURCES = os.getenv('VALIDATION_PARALLEL_SOURCES', 'False').lower() == 'true'
+VALIDATION_SOURCE_TIMEOUT_SECONDS = float(os.getenv('VALIDATION_SOURCE_TIMEOUT_SECONDS', 2.0))
 
 # Security Settings
 SECURE_SSL_REDIRECT = not DEBUG